@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Coroutine, Dict, Tuple
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from litests import LiteSTS
+from litests.llm.context_manager import SQLiteContextManager
+from litests.llm.fake import FakeLLMService
+from litests.models import STSRequest, STSResponse, chunk_metadata
+from litests.performance_recorder.sqlite import SQLitePerformanceRecorder
+from litests.stt.fake import FakeSpeechRecognizer
+from litests.tts.fake import FakeSpeechSynthesizer
+from litests.vad import StandardSpeechDetector
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+BENCHMARKS: Dict[str, Tuple[Callable[[str, int], Coroutine], str]] = {}
+
+
+def benchmark(name: str, unit: str):
+    # Register the function that runs n operations and returns the number of processed units
+    def decorator(func):
+        BENCHMARKS[name] = (func, unit)
+        return func
+    return decorator
+
+
+@benchmark("invoke", "req")
+async def bench_invoke(workdir: str, n: int) -> int:
+    # Overhead of the pipeline itself with the providers that respond without latency
+    sts = LiteSTS(
+        stt=FakeSpeechRecognizer(text="Hello"),
+        llm=FakeLLMService(
+            response="Hello! This is a benchmark. How are you today? Tell me about yourself.",
+            context_manager=SQLiteContextManager(os.path.join(workdir, "invoke.db"))
+        ),
+        tts=FakeSpeechSynthesizer(seconds_per_char=0.001),
+        performance_recorder=SQLitePerformanceRecorder(os.path.join(workdir, "performance.db")),
+        voice_recorder_enabled=False
+    )
+    for _ in range(n):
+        user_id = f"bench_{uuid4()}"
+        async for _ in sts.invoke(STSRequest(session_id=user_id, user_id=user_id, audio_data=b"\x00" * 3200, audio_duration=0.1)):
+            pass
+    await sts.shutdown()
+    return n
+
+
+@benchmark("chunk_response", "chunk")
+async def bench_chunk_response(workdir: str, n: int) -> int:
+    # Responses of audio chunks built as invoke does, kept by the client until the end of the response
+    audio = b"\x00" * 4800
+    responses = []
+    for i in range(n):
+        responses.append(STSResponse(
+            type="chunk",
+            session_id="bench",
+            user_id="bench",
+            context_id="bench",
+            text="Hello.",
+            voice_text="Hello.",
+            audio_data=audio,
+            metadata=chunk_metadata(i == 0)
+        ))
+    return n
+
+
+@benchmark("vad", "frame")
+async def bench_vad(workdir: str, n: int) -> int:
+    # 20ms frames of 16kHz mono that alternate between voice and silence
+    vad = StandardSpeechDetector(volume_db_threshold=-40.0, silence_duration_threshold=0.2, sample_rate=16000)
+
+    async def on_speech_detected(data: bytes, recorded_duration: float, session_id: str):
+        pass
+    vad._on_speech_detected = on_speech_detected
+
+    voice = (b"\xff\x3f\x01\xc0" * 160)
+    silence = b"\x00" * 640
+    for i in range(n):
+        await vad.process_samples(voice if (i // 50) % 2 == 0 else silence, "bench")
+    return n
+
+
+@benchmark("segmenter", "char")
+async def bench_segmenter(workdir: str, n: int) -> int:
+    # Splitting streamed tokens into voice segments
+    text = "Hello! This is a benchmark of the segmenter, which splits streamed tokens into sentences. " * 10
+    llm = FakeLLMService(response=text, context_manager=SQLiteContextManager(os.path.join(workdir, "segmenter.db")))
+    for _ in range(n):
+        async for _ in llm.chat_stream(f"bench_{uuid4()}", "bench", "Hello"):
+            pass
+    return len(text) * n
+
+
+@benchmark("context_manager", "op")
+async def bench_context_manager(workdir: str, n: int) -> int:
+    # Add and get histories of a context in turn
+    context_manager = SQLiteContextManager(os.path.join(workdir, "context.db"))
+    context_id = f"bench_{uuid4()}"
+    messages = [{"role": "user", "content": "Hello"}, {"role": "assistant", "content": "Hi! How can I help you?"}]
+    for _ in range(n):
+        await context_manager.add_histories(context_id, messages, "chatgpt")
+        await context_manager.get_histories(context_id)
+    return n * 2
+
+
+def measure_reference(repeat: int) -> float:
+    # Pure Python workload measured in the same run. Results are compared as the ratio to it
+    # so that the baseline recorded on one machine can be used on the others (e.g. slower CI)
+    data = [{"text": f"Hello {i}", "value": i} for i in range(1000)]
+    best = None
+    for _ in range(repeat):
+        start_time = perf_counter()
+        for _ in range(20):
+            json.loads(json.dumps(data))
+        ops = 20 / (perf_counter() - start_time)
+        best = ops if best is None else max(best, ops)
+    return best
+
+
+async def run_benchmark(name: str, n: int, repeat: int, reference: float) -> dict:
+    func, unit = BENCHMARKS[name]
+    best = None
+    with tempfile.TemporaryDirectory() as workdir:
+        await func(workdir, 1)  # Warmup
+        for _ in range(repeat):
+            start_time = perf_counter()
+            count = await func(workdir, n)
+            ops = count / (perf_counter() - start_time)
+            best = ops if best is None else max(best, ops)
+
+        # Peak of memory allocated in a round
+        tracemalloc.start()
+        count = await func(workdir, n)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(best, 2),
+        "relative": round(best / reference, 4),
+        "peak_bytes_per_op": round(peak / count, 1),
+        "unit": unit
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> bool:
+    # Change is the ratio to the reference workload compared with the baseline, not the absolute ops/sec
+    ok = True
+    print(f"{'':<20}{'ops/sec':>14}{'relative':>14}{'baseline':>14}{'change':>10}{'bytes/op':>12}{'baseline':>12}")
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("relative")
+        base_bytes = baseline.get(name, {}).get("peak_bytes_per_op")
+        line = f"{name:<20}{result['ops_per_sec']:>14.2f}{result['relative']:>14.4f}"
+        if base:
+            change = result["relative"] / base - 1
+            regressed = change < -threshold
+            ok = ok and not regressed
+            line += f"{base:>14.4f}{change:>+10.1%}"
+        else:
+            regressed = False
+            line += f"{'-':>14}{'-':>10}"
+        line += f"{result['peak_bytes_per_op']:>12.1f}" + (f"{base_bytes:>12.1f}" if base_bytes else f"{'-':>12}")
+        print(line + ("  REGRESSION" if regressed else ""))
+    return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark LiteSTS pipeline overhead with fake providers.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument("-n", type=int, default=100, help="Operations in each round")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds to take the best of")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save", action="store_true", help="Save results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown to report as regression")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 when regression is reported")
+    args = parser.parse_args()
+
+    reference = measure_reference(args.repeat)
+    print(f"Reference workload: {reference:.2f} ops/sec")
+    results = {name: await run_benchmark(name, args.n, args.repeat, reference) for name in (args.names or BENCHMARKS)}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    ok = compare(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2)
+            f.write("\n")
+    elif args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,7 @@ import wave
 import pyaudio
 from ..models import STSResponse
 from ..pipeline import LiteSTS
+from ..tts.audio import AudioFormat
 from .base import Adapter
 
 logger = logging.getLogger(__name__)
@@ -22,9 +23,11 @@ class AudioDeviceAdapter(Adapter):
         input_channels: int = 1,
         input_chunk_size: int = 512,
         output_chunk_size: int = 1024,
+        output_sample_rate: int = None,
         cancel_echo: bool = True
     ):
-        super().__init__(sts)
+        # Receive PCM in fixed format to play without parsing WAV for each chunk
+        super().__init__(sts, AudioFormat("pcm", output_sample_rate, 1) if output_sample_rate else None)
 
         # Microphpne
         self.input_sample_rate = input_sample_rate
@@ -37,6 +40,7 @@ class AudioDeviceAdapter(Adapter):
         self.play_stream = None
         self.wave_params = None
         self.output_chunk_size = output_chunk_size
+        self.output_sample_rate = output_sample_rate
 
         # Echo cancellation
         self.cancel_echo = cancel_echo
@@ -74,6 +78,18 @@ class AudioDeviceAdapter(Adapter):
             try:
                 audio_data = self.response_queue.get()
                 self.is_playing_locally = True
+
+                if self.output_sample_rate:
+                    if not self.play_stream:
+                        self.play_stream = self.p.open(
+                            format=pyaudio.paInt16,
+                            channels=1,
+                            rate=self.output_sample_rate,
+                            output=True,
+                        )
+                    self.play_stream.write(audio_data)
+                    continue
+
                 wave_content = self.to_wave(audio_data) \
                     if self.to_wave else audio_data
 
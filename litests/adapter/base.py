@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
 from ..models import STSResponse
 from ..pipeline import LiteSTS
+from ..tts.audio import AudioFormat
 
 
 class Adapter(ABC):
-    def __init__(self, sts: LiteSTS):
+    def __init__(self, sts: LiteSTS, audio_format: AudioFormat = None):
         self.sts = sts
+        # Declare the audio format to receive
+        if audio_format:
+            self.sts.output_audio_format = audio_format
         self.sts.handle_response = self.handle_response
         self.sts.stop_response = self.stop_response
 
@@ -9,6 +9,7 @@ from sse_starlette.sse import EventSourceResponse   # pip install sse-starlette
 from litests import LiteSTS
 from litests.models import STSRequest, STSResponse
 from litests.adapter import Adapter
+from litests.tts.audio import AudioFormat
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +45,8 @@ class ChatChunkResponse(BaseModel):
 
 
 class HttpAdapter(Adapter):
-    def __init__(self, sts: LiteSTS):
-        super().__init__(sts)
+    def __init__(self, sts: LiteSTS, audio_format: AudioFormat = None):
+        super().__init__(sts, audio_format)
 
     def get_api_router(self, path: str = "/chat"):
         router = APIRouter()
@@ -68,7 +69,7 @@ class HttpAdapter(Adapter):
                             context_id=chunk.context_id,
                             text=chunk.text,
                             voice_text=chunk.voice_text,
-                            tool_call=json.dumps(chunk.tool_call.__dict__) if chunk.tool_call else None,
+                            tool_call=json.dumps(chunk.tool_call.to_dict()) if chunk.tool_call else None,
                             encoded_audio=b64_audio
                         ).model_dump_json()
                     
@@ -3,6 +3,7 @@ import logging
 from typing import Dict
 from fastapi import APIRouter, WebSocket
 from ..pipeline import LiteSTS
+from ..tts.audio import AudioFormat
 from .base import Adapter
 
 logger = logging.getLogger(__name__)
@@ -17,9 +18,10 @@ class WebSocketSessionData:
 class WebSocketAdapter(Adapter):
     def __init__(
         self,
-        sts: LiteSTS = None
+        sts: LiteSTS = None,
+        audio_format: AudioFormat = None
     ):
-        super().__init__(sts)
+        super().__init__(sts, audio_format)
         self.websockets: Dict[str, WebSocket] = {}
         self.sessions: Dict[str, WebSocketSessionData] = {}
 
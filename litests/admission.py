@@ -0,0 +1,136 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+import heapq
+from itertools import count
+import logging
+from time import time
+from typing import AsyncIterator, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PrioritySemaphore:
+    # Semaphore that wakes waiters in order of priority (smaller first), then arrival
+    def __init__(self, value: int):
+        self.value = value
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.sequence = count()
+
+    def locked(self) -> bool:
+        return self.value == 0 or any(not f.done() for _, _, f in self.waiters)
+
+    async def acquire(self, priority: int = 0):
+        if not self.locked():
+            self.value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Acquired just before cancellation
+                self.release()
+            raise
+
+    def release(self):
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.value += 1
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        max_transactions: int = None,
+        max_transactions_per_user: int = None,
+        max_stt: int = None,
+        max_llm: int = None,
+        max_tts: int = None,
+        max_queue_wait: float = None
+    ):
+        # Limits are disabled when None
+        self.transactions = PrioritySemaphore(max_transactions) if max_transactions else None
+        self.max_transactions_per_user = max_transactions_per_user
+        self.user_transactions: Dict[str, int] = {}
+        self.stt = PrioritySemaphore(max_stt) if max_stt else None
+        self.llm = PrioritySemaphore(max_llm) if max_llm else None
+        self.tts = PrioritySemaphore(max_tts) if max_tts else None
+        # Reject the transaction waiting longer than this (0 to reject without waiting)
+        self.max_queue_wait = max_queue_wait
+        self.rejected_count = 0
+
+    def is_busy(self) -> bool:
+        return self.transactions is not None and self.transactions.locked()
+
+    def will_queue(self) -> bool:
+        # New transaction waits for a slot (rejected without waiting when max_queue_wait is 0)
+        return self.is_busy() and self.max_queue_wait != 0
+
+    def check_user(self, user_id: str, supersedes: bool = False):
+        # Max in-flight transactions of each user
+        if self.max_transactions_per_user and not supersedes \
+                and self.user_transactions.get(user_id, 0) >= self.max_transactions_per_user:
+            self.rejected_count += 1
+            raise AdmissionRejected(f"Too many transactions of user: {user_id}")
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, priority: int = 0, wait_times: Counter = None, supersedes: bool = False) -> AsyncIterator[None]:
+        # Transaction that supersedes the cancelled one in the same session (barge-in) is exempted from the user limit,
+        # and takes over the slot released by the cancelled one ahead of the others
+        self.check_user(user_id, supersedes)
+        if supersedes:
+            priority = -1
+        self.user_transactions[user_id] = self.user_transactions.get(user_id, 0) + 1
+        try:
+            if self.transactions:
+                start_time = time()
+                try:
+                    if self.max_queue_wait == 0 and not supersedes:
+                        if self.transactions.locked():
+                            raise asyncio.TimeoutError
+                        await self.transactions.acquire(priority)
+                    else:
+                        await asyncio.wait_for(self.transactions.acquire(priority), self.max_queue_wait or None)
+                except asyncio.TimeoutError:
+                    self.rejected_count += 1
+                    raise AdmissionRejected("Too many transactions")
+                finally:
+                    if wait_times is not None:
+                        wait_times["transaction"] += time() - start_time
+            try:
+                yield
+            finally:
+                if self.transactions:
+                    self.transactions.release()
+        finally:
+            self.user_transactions[user_id] -= 1
+            if self.user_transactions[user_id] == 0:
+                del self.user_transactions[user_id]
+
+    @asynccontextmanager
+    async def slot(self, stage: str, priority: int = 0, wait_times: Counter = None) -> AsyncIterator[None]:
+        # Concurrency limit of each stage (stt, llm or tts)
+        semaphore: PrioritySemaphore = getattr(self, stage)
+        if semaphore is None:
+            yield
+            return
+
+        start_time = time()
+        await semaphore.acquire(priority)
+        if wait_times is not None:
+            wait_times[stage] += time() - start_time
+        try:
+            yield
+        finally:
+            semaphore.release()
@@ -0,0 +1,42 @@
+import math
+import random
+from typing import Union
+
+
+class LatencyDistribution:
+    # Latency in seconds sampled from the distribution (deterministic with seed)
+    def __init__(
+        self,
+        mean: float = 0.0,
+        stddev: float = 0.0,
+        *,
+        distribution: str = "normal",  # normal, lognormal or uniform (mean ± stddev * sqrt(3))
+        minimum: float = 0.0,
+        seed: int = None
+    ):
+        self.mean = mean
+        self.stddev = stddev
+        self.distribution = distribution
+        self.minimum = minimum
+        self.random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.stddev == 0:
+            value = self.mean
+        elif self.distribution == "lognormal":
+            # Parameters of underlying normal distribution to get the mean and stddev
+            sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+            mu = math.log(self.mean) - sigma2 / 2
+            value = self.random.lognormvariate(mu, sigma2 ** 0.5)
+        elif self.distribution == "uniform":
+            half_width = self.stddev * 3 ** 0.5
+            value = self.random.uniform(self.mean - half_width, self.mean + half_width)
+        else:
+            value = self.random.gauss(self.mean, self.stddev)
+        return max(value, self.minimum)
+
+
+def to_latency_distribution(latency: Union[float, LatencyDistribution]) -> LatencyDistribution:
+    if isinstance(latency, LatencyDistribution):
+        return latency
+    return LatencyDistribution(latency or 0.0)
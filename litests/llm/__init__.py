@@ -1 +1,2 @@
-from .base import LLMService, LLMResponse, ToolCall, Tool
+from .base import LLMService, LLMResponse, LLMUsage, ToolCall, Tool, ToolArgumentsParser, ToolExecutor
+from .tool_router import ToolRouter
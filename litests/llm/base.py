@@ -1,36 +1,200 @@
 from abc import ABC, abstractmethod
 import asyncio
+from collections import OrderedDict
+import copy
 import inspect
+import json
 import logging
 import re
-from typing import AsyncGenerator, List, Dict, Any, Callable, Optional
+from time import perf_counter_ns, time
+from typing import AsyncGenerator, List, Dict, Any, Callable, Optional, Tuple
 from .context_manager import ContextManager, SQLiteContextManager
+from .tool_router import ToolRouter
 
 logger = logging.getLogger(__name__)
 
 
 class ToolCall:
+    __slots__ = ("id", "name", "arguments", "is_cached", "start_ns", "end_ns")
+
     def __init__(self, id: str = None, name: str = None, arguments: any = None):
         self.id = id
         self.name = name
         self.arguments = arguments
+        self.is_cached = False
+        # Monotonic time of execution (perf_counter_ns)
+        self.start_ns = 0
+        self.end_ns = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class LLMUsage:
+    __slots__ = ("input_tokens", "output_tokens", "cached_tokens", "cache_creation_tokens")
+
+    def __init__(self, input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0, cache_creation_tokens: int = 0):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+        self.cache_creation_tokens = cache_creation_tokens
 
 
 class LLMResponse:
-    def __init__(self, context_id: str, text: str = None, voice_text: str = None, tool_call: ToolCall = None):
+    __slots__ = ("context_id", "text", "voice_text", "tool_call", "usage")
+
+    def __init__(self, context_id: str, text: str = None, voice_text: str = None, tool_call: ToolCall = None, usage: LLMUsage = None):
         self.context_id = context_id
         self.text = text
         self.voice_text = voice_text
         self.tool_call = tool_call
+        self.usage = usage
 
 
 class Tool:
-    def __init__(self, name: str, spec: Dict[str, Any], func: Callable, instruction: str = None, is_dynamic: bool = False):
+    def __init__(
+        self,
+        name: str,
+        spec: Dict[str, Any],
+        func: Callable,
+        instruction: str = None,
+        is_dynamic: bool = False,
+        cache_ttl: float = 0,
+        cache_size: int = 100,
+        cache_by_user: bool = None
+    ):
         self.name = name
         self.spec = spec
         self.func = func
         self.instruction = instruction
         self.is_dynamic = is_dynamic
+        self.use_metadata = "metadata" in inspect.signature(func).parameters
+        # Result cache (disabled when cache_ttl is 0)
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        # Tools that take metadata may return results depending on the user, so they are cached for each user by default
+        self.cache_by_user = self.use_metadata if cache_by_user is None else cache_by_user
+        self.cache: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def make_cache_key(self, arguments: dict, metadata: dict) -> str:
+        normalized_arguments = {k: v.strip() if isinstance(v, str) else v for k, v in arguments.items()}
+        user_id = (metadata or {}).get("user_id") if self.cache_by_user else None
+        return json.dumps([user_id, normalized_arguments], ensure_ascii=False, sort_keys=True, default=str)
+
+    def get_cache(self, key: str) -> Tuple[bool, Any]:
+        if key in self.cache:
+            expire_at, result = self.cache[key]
+            if expire_at > time():
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                # Copy not to share the mutable result with other callers
+                return True, copy.deepcopy(result)
+            del self.cache[key]
+        self.cache_misses += 1
+        return False, None
+
+    def set_cache(self, key: str, result: Any):
+        self.cache[key] = (time() + self.cache_ttl, copy.deepcopy(result))
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+class ToolArgumentsParser:
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.is_complete = False
+
+    def feed(self, text: str) -> bool:
+        # Track nesting of JSON streamed incrementally to detect the end of arguments
+        for c in text:
+            if self.is_complete:
+                break
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif c == "\\":
+                    self.escaped = True
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.is_complete = True
+        return self.is_complete
+
+
+class ToolExecutor:
+    def __init__(self, llm_service: "LLMService", metadata: dict):
+        self.llm_service = llm_service
+        self.metadata = metadata
+        self.semaphore = asyncio.Semaphore(llm_service.max_concurrent_tools)
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "ToolExecutor":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # Cancel dispatched tools when the stream is aborted (e.g. error or cancelled by barge-in)
+        if exc_type is not None:
+            self.cancel()
+
+    def parse_arguments(self, tool_call: ToolCall) -> Optional[dict]:
+        # Arguments are JSON string streamed by LLM (or dict already parsed by SDK). None if invalid
+        if isinstance(tool_call.arguments, dict):
+            return tool_call.arguments
+        try:
+            arguments = json.loads(tool_call.arguments or "{}")
+        except json.JSONDecodeError:
+            arguments = None
+        if not isinstance(arguments, dict):
+            logger.warning(f"Invalid arguments for tool {tool_call.name}: {tool_call.arguments}")
+            return None
+        return arguments
+
+    async def execute(self, tool_call: ToolCall, arguments: dict):
+        if tool_call.name not in self.llm_service.tools:
+            # Tools not registered (e.g. dynamic tool) are handled by each service
+            return None
+        if arguments is None:
+            return {"error": "Invalid arguments. Arguments must be a JSON object."}
+        async with self.semaphore:
+            tool_call.start_ns = perf_counter_ns()
+            try:
+                return await asyncio.wait_for(
+                    self.llm_service.execute_tool(tool_call.name, arguments, self.metadata, tool_call),
+                    self.llm_service.tool_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout at executing tool: {tool_call.name}")
+                return {"error": f"Tool execution timed out after {self.llm_service.tool_timeout} seconds."}
+            finally:
+                tool_call.end_ns = perf_counter_ns()
+
+    def dispatch(self, tool_call: ToolCall, arguments: dict):
+        # Start tool without waiting for the end of LLM stream
+        if id(tool_call) not in self.tasks:
+            if self.llm_service.debug:
+                logger.info(f"Dispatch tool: {tool_call.name}")
+            self.tasks[id(tool_call)] = asyncio.create_task(self.execute(tool_call, arguments))
+
+    async def gather(self, tool_calls: List[Tuple[ToolCall, dict]]) -> List[Any]:
+        # Execute independent tools concurrently and return their results in the original order
+        for tc, arguments in tool_calls:
+            self.dispatch(tc, arguments)
+        return await asyncio.gather(*(self.tasks[id(tc)] for tc, _ in tool_calls))
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
 
 
 class LLMService(ABC):
@@ -45,6 +209,9 @@ class LLMService(ABC):
         option_split_threshold: int = 50,
         voice_text_tag: str = None,
         use_dynamic_tools: bool = False,
+        use_prompt_cache: bool = False,
+        max_concurrent_tools: int = 5,
+        tool_timeout: float = None,
         context_manager: ContextManager = None,
         debug: bool = False
     ):
@@ -65,6 +232,9 @@ class LLMService(ABC):
         self.voice_text_tag = voice_text_tag
         self.tools: Dict[str, Tool] = {}
         self.use_dynamic_tools = use_dynamic_tools
+        self.use_prompt_cache = use_prompt_cache
+        self.max_concurrent_tools = max_concurrent_tools
+        self.tool_timeout = tool_timeout
         self.dynamic_tool_instruction = """
 
 ## Important: Use of `{dynamic_tool_name}`
@@ -87,8 +257,11 @@ The list of tools is as follows:
 
 """
         self._get_dynamic_tools = self.get_dynamic_tools_default
+        self.tool_router = ToolRouter()
         self._on_before_tool_calls = self.on_before_tool_calls_default
         self.context_manager = context_manager or SQLiteContextManager()
+        # Histories fetched in advance (e.g. during STT) by context_id
+        self.prefetched_histories: Dict[str, asyncio.Task] = {}
         self.debug = debug
 
     # Decorators
@@ -109,6 +282,7 @@ The list of tools is as follows:
         return func
 
     def on_before_tool_calls(self, func):
+        # Called after the LLM stream ends, so the tools dispatched during the stream may be already running
         self._on_before_tool_calls = func
         return func
 
@@ -135,21 +309,72 @@ The list of tools is as follows:
     async def get_dynamic_tools_default(self, messages: List[dict], metadata: Dict[str, any] = None) -> List[Dict[str, any]]:
         return []
 
+    async def select_dynamic_tools(self, messages: List[dict], arguments: Dict[str, any], metadata: Dict[str, any] = None) -> List[Dict[str, any]]:
+        if not isinstance(arguments, dict):
+            # Invalid arguments (e.g. failed to parse) can't be routed locally
+            arguments = {}
+        key = self.tool_router.make_key(arguments)
+        tool_names = self.tool_router.get_cache(key)
+        if tool_names is None:
+            # Select tools locally by the target and action of the dynamic tool call
+            tool_names = self.tool_router.route(arguments.get("target"), arguments.get("action"))
+            if not tool_names:
+                # Fallback to selecting tools by LLM
+                tool_specs = await self._get_dynamic_tools(messages, metadata)
+                tool_names = [name for name, t in self.tools.items() if t.spec in tool_specs]
+            if key:
+                self.tool_router.set_cache(key, tool_names)
+        return [self.tools[name].spec for name in tool_names if name in self.tools]
+
     @abstractmethod
     async def get_llm_stream_response(self, context_id: str, user_id: str, messages: List[dict], system_prompt_params: Dict[str, any] = None) -> AsyncGenerator[LLMResponse, None]:
         pass
 
+    async def warmup(self):
+        # Override to initialize client in advance (e.g. the first request takes long time)
+        pass
+
+    def prefetch_histories(self, context_id: str):
+        # Start fetching histories without waiting for it. The result is used once by get_histories
+        if context_id and context_id not in self.prefetched_histories:
+            self.prefetched_histories[context_id] = asyncio.create_task(self.context_manager.get_histories(context_id))
+
+    def discard_prefetched_histories(self, context_id: str):
+        if task := self.prefetched_histories.pop(context_id, None):
+            task.cancel()
+
+    async def get_histories(self, context_id: str) -> List[Dict]:
+        if task := self.prefetched_histories.pop(context_id, None):
+            return await task
+        return await self.context_manager.get_histories(context_id)
+
     def remove_control_tags(self, text: str) -> str:
         clean_text = text
         clean_text = re.sub(r"\[(\w+):([^\]]+)\]", "", clean_text)
         clean_text = clean_text.strip()
         return clean_text
 
-    async def execute_tool(self, name: str, arguments: dict, metadata: dict):
+    async def execute_tool(self, name: str, arguments: dict, metadata: dict, tool_call: ToolCall = None):
         tool = self.tools[name]
-        if "metadata" in inspect.signature(tool.func).parameters:
-            arguments["metadata"] = metadata
-        return await tool.func(**arguments)
+
+        if tool.cache_ttl:
+            cache_key = tool.make_cache_key(arguments, metadata)
+            is_cached, result = tool.get_cache(cache_key)
+            if is_cached:
+                if tool_call:
+                    tool_call.is_cached = True
+                return result
+
+        if tool.use_metadata:
+            arguments = {**arguments, "metadata": metadata}
+        result = await tool.func(**arguments)
+
+        if tool.cache_ttl:
+            tool.set_cache(cache_key, result)
+        return result
+
+    async def execute_tools(self, tool_calls: List[Tuple[ToolCall, dict]], metadata: dict, tool_executor: ToolExecutor = None) -> List[Any]:
+        return await (tool_executor or ToolExecutor(self, metadata)).gather(tool_calls)
 
     async def chat_stream(self, context_id: str, user_id: str, text: str, files: List[Dict[str, str]] = None, system_prompt_params: Dict[str, any] = None) -> AsyncGenerator[LLMResponse, None]:
         logger.info(f"User: {text}")
@@ -200,7 +425,7 @@ The list of tools is as follows:
             return None
 
         async for chunk in self.get_llm_stream_response(context_id, user_id, messages, system_prompt_params):
-            if chunk.tool_call:
+            if chunk.tool_call or chunk.usage:
                 yield chunk
                 continue
 
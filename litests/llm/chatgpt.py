@@ -4,7 +4,7 @@ import re
 from typing import AsyncGenerator, Dict, List
 from urllib.parse import urlparse, parse_qs
 import openai
-from . import LLMService, LLMResponse, ToolCall, Tool
+from . import LLMService, LLMResponse, LLMUsage, ToolCall, Tool, ToolArgumentsParser, ToolExecutor
 from .context_manager import ContextManager
 
 logger = getLogger(__name__)
@@ -24,6 +24,10 @@ class ChatGPTService(LLMService):
         option_split_threshold: int = 50,
         voice_text_tag: str = None,
         use_dynamic_tools: bool = False,
+        use_prompt_cache: bool = False,
+        include_usage: bool = True,
+        max_concurrent_tools: int = 5,
+        tool_timeout: float = None,
         context_manager: ContextManager = None,
         debug: bool = False
     ):
@@ -36,6 +40,9 @@ class ChatGPTService(LLMService):
             option_split_threshold=option_split_threshold,
             voice_text_tag=voice_text_tag,
             use_dynamic_tools=use_dynamic_tools,
+            use_prompt_cache=use_prompt_cache,
+            max_concurrent_tools=max_concurrent_tools,
+            tool_timeout=tool_timeout,
             context_manager=context_manager,
             debug=debug
         )
@@ -48,6 +55,8 @@ class ChatGPTService(LLMService):
             )
         else:
             self.openai_client = openai.AsyncClient(api_key=openai_api_key, base_url=base_url)
+        # Request token usage at the end of stream (disabled automatically if the server doesn't support it)
+        self.include_usage = include_usage
 
         self.dynamic_tool_spec = {
             "type": "function",
@@ -77,7 +86,7 @@ class ChatGPTService(LLMService):
             messages.append({"role": "system", "content": self.get_system_prompt(system_prompt_params)})
 
         # Extract the history starting from the first message where the role is 'user'
-        histories = await self.context_manager.get_histories(context_id)
+        histories = await self.get_histories(context_id)
         while histories and histories[0]["role"] != "user":
             histories.pop(0)
         messages.extend(histories)
@@ -99,14 +108,18 @@ class ChatGPTService(LLMService):
         messages.append({"role": "assistant", "content": response_text})
         await self.context_manager.add_histories(context_id, messages, "chatgpt")
 
-    def tool(self, spec: Dict):
+    def tool(self, spec: Dict, *, cache_ttl: float = 0, cache_size: int = 100, cache_by_user: bool = None):
         def decorator(func):
             tool_name = spec["function"]["name"]
             self.tools[tool_name] = Tool(
                 name=tool_name,
                 spec=spec,
-                func=func
+                func=func,
+                cache_ttl=cache_ttl,
+                cache_size=cache_size,
+                cache_by_user=cache_by_user
             )
+            self.tool_router.add_tool(tool_name, spec["function"].get("description"))
             return func
         return decorator
 
@@ -157,6 +170,20 @@ class ChatGPTService(LLMService):
 
         return tools
 
+    async def create_stream(self, **kwargs):
+        if self.include_usage:
+            try:
+                return await self.openai_client.chat.completions.create(
+                    **kwargs, stream=True, stream_options={"include_usage": True}
+                )
+            except openai.BadRequestError as brex:
+                if "stream_options" not in str(brex):
+                    raise
+                # e.g. Azure OpenAI with older api-version or OpenAI-compatible servers
+                logger.warning(f"stream_options is not supported. Token usage is not recorded: {brex}")
+                self.include_usage = False
+        return await self.openai_client.chat.completions.create(**kwargs, stream=True)
+
     async def get_llm_stream_response(self, context_id: str, user_id: str, messages: List[Dict], system_prompt_params: Dict[str, any] = None, tools: List[Dict[str, any]] = None) -> AsyncGenerator[LLMResponse, None]:
         # Select tools to use
         tool_instruction = ""
@@ -173,85 +200,108 @@ class ChatGPTService(LLMService):
         else:
             filtered_tools = [t.spec for _, t in self.tools.items() if not t.is_dynamic] or None
 
-        # Update system prompt
+        # Update system prompt (tool instruction is constant for the tools, so the prefix is stable for prompt caching)
         if tool_instruction and messages[0]["role"] == "system":
             system_message_for_tool = {"role": "system", "content": messages[0]["content"] + tool_instruction}
         else:
             system_message_for_tool = messages[0]
 
-        stream_resp = await self.openai_client.chat.completions.create(
+        stream_resp = await self.create_stream(
             messages=[system_message_for_tool] + messages[1:],
             model=self.model,
             temperature=self.temperature,
-            tools=filtered_tools,
-            stream=True
+            tools=filtered_tools
         )
 
         tool_calls: List[ToolCall] = []
+        tool_executor = ToolExecutor(self, {"user_id": user_id})
+        arguments_parser: ToolArgumentsParser = None
         try_dynamic_tools = False
-        async for chunk in stream_resp:
-            if not chunk.choices:
-                continue
+        # Cancel dispatched tools when aborted (e.g. cancelled by barge-in) until they are executed
+        async with tool_executor:
+            # Close HTTP stream not to keep generating tokens when aborted
+            async with stream_resp:
+                async for chunk in stream_resp:
+                    if chunk.usage:
+                        prompt_tokens_details = chunk.usage.prompt_tokens_details
+                        yield LLMResponse(context_id=context_id, text="", usage=LLMUsage(
+                            input_tokens=chunk.usage.prompt_tokens,
+                            output_tokens=chunk.usage.completion_tokens,
+                            cached_tokens=(prompt_tokens_details.cached_tokens or 0) if prompt_tokens_details else 0
+                        ))
 
-            if chunk.choices[0].delta.tool_calls:
-                t = chunk.choices[0].delta.tool_calls[0]
-                if t.id:
-                    tool_calls.append(ToolCall(t.id, t.function.name, ""))
-                    if t.function.name == self.dynamic_tool_spec["function"]["name"]:
-                        logger.info("Get dynamic tool")
-                        filtered_tools = await self._get_dynamic_tools(messages)
-                        logger.info(f"Dynamic tools: {filtered_tools}")
-                        try_dynamic_tools = True
-                if t.function.arguments:
-                    tool_calls[-1].arguments += t.function.arguments
+                    if not chunk.choices:
+                        continue
 
-            elif content := chunk.choices[0].delta.content:
-                if not try_dynamic_tools:
-                    yield LLMResponse(context_id=context_id, text=content)
+                    if chunk.choices[0].delta.tool_calls:
+                        t = chunk.choices[0].delta.tool_calls[0]
+                        if t.id:
+                            tool_calls.append(ToolCall(t.id, t.function.name, ""))
+                            arguments_parser = ToolArgumentsParser()
+                            if t.function.name == self.dynamic_tool_spec["function"]["name"]:
+                                try_dynamic_tools = True
+                        if t.function.arguments:
+                            tool_calls[-1].arguments += t.function.arguments
+                            if arguments_parser.feed(t.function.arguments):
+                                # Start tool as soon as its arguments are completed, while the rest is streamed
+                                tool_executor.dispatch(tool_calls[-1], tool_executor.parse_arguments(tool_calls[-1]))
 
-        if tool_calls:
-            # Do something before tool calls (e.g. say to user that it will take a long time)
-            await self._on_before_tool_calls(tool_calls)
+                    elif content := chunk.choices[0].delta.content:
+                        if not try_dynamic_tools:
+                            yield LLMResponse(context_id=context_id, text=content)
 
-            # Execute tools
-            messages_length = len(messages)
-            for tc in tool_calls:
-                if self.debug:
-                    logger.info(f"ToolCall: {tc.name}")
-                yield LLMResponse(context_id=context_id, tool_call=tc)
+            if try_dynamic_tools:
+                # Select tools after the arguments (target and action) are fixed
+                logger.info("Get dynamic tool")
+                dynamic_tool_call = next(tc for tc in tool_calls if tc.name == self.dynamic_tool_spec["function"]["name"])
+                filtered_tools = await self.select_dynamic_tools(messages, tool_executor.parse_arguments(dynamic_tool_call) or {})
+                logger.info(f"Dynamic tools: {filtered_tools}")
 
-                if tc.name == self.dynamic_tool_spec["function"]["name"]:
-                    if filtered_tools:
-                        tool_result = None
-                    else:
-                        tool_result = {"message": "No tools found"}
-                else:
-                    tool_result = await self.execute_tool(tc.name, json.loads(tc.arguments), {"user_id": user_id})
-                if self.debug:
-                    logger.info(f"ToolCall result: {tool_result}")
+            if tool_calls:
+                # Do something before tool calls (e.g. say to user that it will take a long time)
+                await self._on_before_tool_calls(tool_calls)
+
+                for tc in tool_calls:
+                    if self.debug:
+                        logger.info(f"ToolCall: {tc.name}")
+                    yield LLMResponse(context_id=context_id, tool_call=tc)
+
+                # Execute tools
+                messages_length = len(messages)
+                tool_results = await self.execute_tools(
+                    [(tc, tool_executor.parse_arguments(tc)) for tc in tool_calls], {"user_id": user_id}, tool_executor
+                )
+                for tc, tool_result in zip(tool_calls, tool_results):
+                    if tc.name == self.dynamic_tool_spec["function"]["name"]:
+                        if filtered_tools:
+                            tool_result = None
+                        else:
+                            tool_result = {"message": "No tools found"}
+                    if self.debug:
+                        logger.info(f"ToolCall result: {tool_result}")
 
-                if tool_result:
-                    messages.append({
-                        "role": "assistant",
-                        "tool_calls": [{
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": tc.arguments
-                            }
-                        }]
-                    })
+                    if tool_result:
+                        messages.append({
+                            "role": "assistant",
+                            "tool_calls": [{
+                                "id": tc.id,
+                                "type": "function",
+                                "function": {
+                                    "name": tc.name,
+                                    "arguments": tc.arguments
+                                }
+                            }]
+                        })
 
-                    messages.append({
-                        "role": "tool",
-                        "content": json.dumps(tool_result),
-                        "tool_call_id": tc.id
-                    })
+                        messages.append({
+                            "role": "tool",
+                            "content": json.dumps(tool_result),
+                            "tool_call_id": tc.id
+                        })
 
-            if len(messages) > messages_length or try_dynamic_tools:
-                # Generate human-friendly message that explains tool result
-                async for llm_response in self.get_llm_stream_response(
-                    context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
-                ):
-                    yield llm_response
+                if len(messages) > messages_length or try_dynamic_tools:
+                    # Generate human-friendly message that explains tool result
+                    async for llm_response in self.get_llm_stream_response(
+                        context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
+                    ):
+                        yield llm_response
@@ -1,9 +1,9 @@
 import json
 from logging import getLogger
 import re
-from typing import AsyncGenerator, Dict, List
+from typing import AsyncGenerator, Dict, List, Tuple
 from anthropic import AsyncAnthropic
-from . import LLMService, LLMResponse, ToolCall, Tool
+from . import LLMService, LLMResponse, LLMUsage, ToolCall, Tool, ToolExecutor
 from .context_manager import ContextManager
 
 logger = getLogger(__name__)
@@ -24,6 +24,9 @@ class ClaudeService(LLMService):
         option_split_threshold: int = 50,
         voice_text_tag: str = None,
         use_dynamic_tools: bool = False,
+        use_prompt_cache: bool = False,
+        max_concurrent_tools: int = 5,
+        tool_timeout: float = None,
         context_manager: ContextManager = None,
         debug: bool = False
     ):
@@ -36,6 +39,9 @@ class ClaudeService(LLMService):
             option_split_threshold=option_split_threshold,
             voice_text_tag=voice_text_tag,
             use_dynamic_tools=use_dynamic_tools,
+            use_prompt_cache=use_prompt_cache,
+            max_concurrent_tools=max_concurrent_tools,
+            tool_timeout=tool_timeout,
             context_manager=context_manager,
             debug=debug
         )
@@ -68,7 +74,7 @@ class ClaudeService(LLMService):
         messages = []
 
         # Extract the history starting from the first message where the role is 'user'
-        histories = await self.context_manager.get_histories(context_id)
+        histories = await self.get_histories(context_id)
         while histories and histories[0]["role"] != "user":
             histories.pop(0)
         messages.extend(histories)
@@ -88,17 +94,41 @@ class ClaudeService(LLMService):
         messages.append({"role": "assistant", "content": [{"type": "text", "text": response_text}]})
         await self.context_manager.add_histories(context_id, messages, "claude")
 
-    def tool(self, spec: Dict):
+    def tool(self, spec: Dict, *, cache_ttl: float = 0, cache_size: int = 100, cache_by_user: bool = None):
         def decorator(func):
             tool_name = spec["name"]
             self.tools[tool_name] = Tool(
                 name=tool_name,
                 spec=spec,
-                func=func
+                func=func,
+                cache_ttl=cache_ttl,
+                cache_size=cache_size,
+                cache_by_user=cache_by_user
             )
+            self.tool_router.add_tool(tool_name, spec.get("description"))
             return func
         return decorator
 
+    def make_cache_controlled_request(self, messages: List[dict], system_prompt: str, tool_instruction: str) -> Tuple[List[dict], List[dict]]:
+        # Cache breakpoint at the end of system prompt (tools are also cached as they come before system)
+        system = []
+        if system_prompt:
+            system.append({"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}})
+        if tool_instruction:
+            system.append({"type": "text", "text": tool_instruction})
+
+        # Cache breakpoint at the end of the latest message to reuse the whole history at the next request.
+        # Copy the message not to save cache_control to the context.
+        last_message = messages[-1]
+        content = last_message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        if not content:
+            return messages, system
+        content = content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+
+        return messages[:-1] + [{**last_message, "content": content}], system
+
     async def get_dynamic_tools_default(self, messages: List[dict], metadata: Dict[str, any] = None) -> List[Dict[str, any]]:
         # Make additional prompt with registered tools
         tool_listing_prompt = self.additional_prompt_for_tool_listing
@@ -164,91 +194,121 @@ class ClaudeService(LLMService):
         else:
             filtered_tools = [t.spec for _, t in self.tools.items() if not t.is_dynamic] or []
 
-        async with self.anthropic_client.messages.stream(
-            messages=messages,
-            system=self.get_system_prompt(system_prompt_params) + tool_instruction,
-            model=self.model,
-            temperature=self.temperature,
-            tools=filtered_tools,
-            max_tokens=self.max_tokens
-        ) as stream_resp:
-            tool_calls: List[ToolCall] = []
-            try_dynamic_tools = False
-            response_text = ""
-            async for chunk in stream_resp:
-                if chunk.type == "content_block_start":
-                    if chunk.content_block.type == "tool_use":
-                        tool_calls.append(ToolCall(chunk.content_block.id, chunk.content_block.name, ""))
-                        if chunk.content_block.name == self.dynamic_tool_spec["name"]:
-                            logger.info("Get dynamic tool")
-                            filtered_tools = await self._get_dynamic_tools(
-                                messages,
-                                {"system_prompt": self.get_system_prompt(system_prompt_params)}
-                            )
-                            logger.info(f"Dynamic tools: {filtered_tools}")
-                            try_dynamic_tools = True
-                elif chunk.type == "content_block_delta":
-                    if chunk.delta.type == "text_delta":
-                        if not try_dynamic_tools:
-                            response_text += chunk.delta.text
-                            yield LLMResponse(context_id=context_id, text=chunk.delta.text)
-                    elif chunk.delta.type == "input_json_delta":
-                        tool_calls[-1].arguments += chunk.delta.partial_json
-
-        if tool_calls:
-            # Do something before tool calls (e.g. say to user that it will take a long time)
-            await self._on_before_tool_calls(tool_calls)
-
-            # NOTE: Claude 3.5 Sonnet doesn't return multiple tools at once for now (2025-01-07), but it's not explicitly documented.
-            #       Multiple tools will be called sequentially: user -(llm)-> tool_use -> tool_result -(llm)-> tool_use -> tool_result -(llm)-> assistant
-            # Execute tools
-            messages_length = len(messages)
-            for tc in tool_calls:
-                if self.debug:
-                    logger.info(f"ToolCall: {tc.name}")
-                yield LLMResponse(context_id=context_id, tool_call=tc)
-
-                arguments_json = json.loads(tc.arguments)
-                if tc.name == self.dynamic_tool_spec["name"]:
-                    if filtered_tools:
-                        tool_result = None
-                    else:
-                        tool_result = {"message": "No tools found"}
-                else:
-                    tool_result = await self.execute_tool(tc.name, arguments_json, {"user_id": user_id})
-                if self.debug:
-                    logger.info(f"ToolCall result: {tool_result}")
+        if self.use_prompt_cache:
+            request_messages, system = self.make_cache_controlled_request(
+                messages, self.get_system_prompt(system_prompt_params), tool_instruction
+            )
+        else:
+            request_messages = messages
+            system = self.get_system_prompt(system_prompt_params) + tool_instruction
+
+        tool_calls: List[ToolCall] = []
+        tool_executor = ToolExecutor(self, {"user_id": user_id})
+        try_dynamic_tools = False
+        response_text = ""
+        # Cancel dispatched tools when aborted (e.g. cancelled by barge-in) until they are executed
+        async with tool_executor:
+            async with self.anthropic_client.messages.stream(
+                messages=request_messages,
+                system=system,
+                model=self.model,
+                temperature=self.temperature,
+                tools=filtered_tools,
+                max_tokens=self.max_tokens
+            ) as stream_resp:
+                async for chunk in stream_resp:
+                    if chunk.type == "content_block_start":
+                        if chunk.content_block.type == "tool_use":
+                            tool_calls.append(ToolCall(chunk.content_block.id, chunk.content_block.name, ""))
+                            if chunk.content_block.name == self.dynamic_tool_spec["name"]:
+                                try_dynamic_tools = True
+                    elif chunk.type == "content_block_delta":
+                        if chunk.delta.type == "text_delta":
+                            if not try_dynamic_tools:
+                                response_text += chunk.delta.text
+                                yield LLMResponse(context_id=context_id, text=chunk.delta.text)
+                        elif chunk.delta.type == "input_json_delta":
+                            tool_calls[-1].arguments += chunk.delta.partial_json
+                    elif chunk.type == "content_block_stop":
+                        if chunk.content_block.type == "tool_use":
+                            # Start tool as soon as its arguments are completed, while the rest is streamed
+                            tool_executor.dispatch(tool_calls[-1], tool_executor.parse_arguments(tool_calls[-1]))
 
-                if tool_result:
-                    assistant_content = []
-                    if response_text:
+                final_message = await stream_resp.get_final_message()
+                yield LLMResponse(context_id=context_id, text="", usage=LLMUsage(
+                    input_tokens=final_message.usage.input_tokens,
+                    output_tokens=final_message.usage.output_tokens,
+                    cached_tokens=final_message.usage.cache_read_input_tokens or 0,
+                    cache_creation_tokens=final_message.usage.cache_creation_input_tokens or 0
+                ))
+
+            if try_dynamic_tools:
+                # Select tools after the arguments (target and action) are fixed
+                logger.info("Get dynamic tool")
+                dynamic_tool_call = next(tc for tc in tool_calls if tc.name == self.dynamic_tool_spec["name"])
+                filtered_tools = await self.select_dynamic_tools(
+                    messages,
+                    tool_executor.parse_arguments(dynamic_tool_call) or {},
+                    {"system_prompt": self.get_system_prompt(system_prompt_params)}
+                )
+                logger.info(f"Dynamic tools: {filtered_tools}")
+
+            if tool_calls:
+                # Do something before tool calls (e.g. say to user that it will take a long time)
+                await self._on_before_tool_calls(tool_calls)
+
+                # NOTE: Claude 3.5 Sonnet doesn't return multiple tools at once for now (2025-01-07), but it's not explicitly documented.
+                #       Multiple tools will be called sequentially: user -(llm)-> tool_use -> tool_result -(llm)-> tool_use -> tool_result -(llm)-> assistant
+                for tc in tool_calls:
+                    if self.debug:
+                        logger.info(f"ToolCall: {tc.name}")
+                    yield LLMResponse(context_id=context_id, tool_call=tc)
+
+                # Execute tools
+                messages_length = len(messages)
+                arguments_jsons = [tool_executor.parse_arguments(tc) for tc in tool_calls]
+                tool_results = await self.execute_tools(
+                    list(zip(tool_calls, arguments_jsons)), {"user_id": user_id}, tool_executor
+                )
+                for tc, arguments_json, tool_result in zip(tool_calls, arguments_jsons, tool_results):
+                    if tc.name == self.dynamic_tool_spec["name"]:
+                        if filtered_tools:
+                            tool_result = None
+                        else:
+                            tool_result = {"message": "No tools found"}
+                    if self.debug:
+                        logger.info(f"ToolCall result: {tool_result}")
+
+                    if tool_result:
+                        assistant_content = []
+                        if response_text:
+                            assistant_content.append({
+                                "type": "text",
+                                "text": response_text
+                            })
                         assistant_content.append({
-                            "type": "text",
-                            "text": response_text
+                            "type": "tool_use",
+                            "id": tc.id,
+                            "name": tc.name,
+                            "input": arguments_json or {}
                         })
-                    assistant_content.append({
-                        "type": "tool_use",
-                        "id": tc.id,
-                        "name": tc.name,
-                        "input": arguments_json
-                    })
-                    messages.append({
-                        "role": "assistant",
-                        "content": assistant_content
-                    })
-
-                    messages.append({
-                        "role": "user",
-                        "content": [{
-                            "type": "tool_result",
-                            "tool_use_id": tc.id,
-                            "content": json.dumps(tool_result)
-                        }]
-                    })
-
-            if len(messages) > messages_length or try_dynamic_tools:
-                # Generate human-friendly message that explains tool result
-                async for llm_response in self.get_llm_stream_response(
-                    context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
-                ):
-                    yield llm_response
+                        messages.append({
+                            "role": "assistant",
+                            "content": assistant_content
+                        })
+
+                        messages.append({
+                            "role": "user",
+                            "content": [{
+                                "type": "tool_result",
+                                "tool_use_id": tc.id,
+                                "content": json.dumps(tool_result)
+                            }]
+                        })
+
+                if len(messages) > messages_length or try_dynamic_tools:
+                    # Generate human-friendly message that explains tool result
+                    async for llm_response in self.get_llm_stream_response(
+                        context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
+                    ):
+                        yield llm_response
@@ -0,0 +1,72 @@
+import asyncio
+import re
+from typing import AsyncGenerator, Callable, Dict, List, Union
+from . import LLMService, LLMResponse, LLMUsage
+from .context_manager import ContextManager
+from ..latency import LatencyDistribution, to_latency_distribution
+
+
+class FakeLLMService(LLMService):
+    # LLM service that streams the given response for tests and benchmarks without network access
+    def __init__(
+        self,
+        *,
+        response: Union[str, Callable[[List[dict]], str]] = "Hello! This is a fake response. How can I help you?",
+        first_token_latency: Union[float, LatencyDistribution] = 0.0,
+        tokens_per_second: float = None,   # None to stream without waiting
+        system_prompt: str = None,
+        split_chars: List[str] = None,
+        option_split_chars: List[str] = None,
+        option_split_threshold: int = 50,
+        voice_text_tag: str = None,
+        context_manager: ContextManager = None,
+        debug: bool = False
+    ):
+        super().__init__(
+            system_prompt=system_prompt,
+            model="fake",
+            split_chars=split_chars,
+            option_split_chars=option_split_chars,
+            option_split_threshold=option_split_threshold,
+            voice_text_tag=voice_text_tag,
+            context_manager=context_manager,
+            debug=debug
+        )
+        self.response = response
+        self.first_token_latency = to_latency_distribution(first_token_latency)
+        self.tokens_per_second = tokens_per_second
+        self.request_count = 0
+
+    def tokenize(self, text: str) -> List[str]:
+        # A word (or a character of CJK) with the following spaces as a token
+        return re.findall(r"[　-鿿]|[^\s　-鿿]+\s*|\s+", text)
+
+    async def compose_messages(self, context_id: str, text: str, files: List[Dict[str, str]] = None, system_prompt_params: Dict[str, any] = None) -> List[Dict]:
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.get_system_prompt(system_prompt_params)})
+        messages.extend(await self.get_histories(context_id))
+        messages.append({"role": "user", "content": text})
+        return messages
+
+    async def update_context(self, context_id: str, messages: List[Dict], response_text: str):
+        messages.append({"role": "assistant", "content": response_text})
+        await self.context_manager.add_histories(context_id, messages, "chatgpt")
+
+    async def get_llm_stream_response(self, context_id: str, user_id: str, messages: List[dict], system_prompt_params: Dict[str, any] = None) -> AsyncGenerator[LLMResponse, None]:
+        self.request_count += 1
+        response_text = self.response(messages) if callable(self.response) else self.response
+
+        if latency := self.first_token_latency.sample():
+            await asyncio.sleep(latency)
+
+        tokens = self.tokenize(response_text)
+        for i, token in enumerate(tokens):
+            if self.tokens_per_second and i > 0:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield LLMResponse(context_id=context_id, text=token)
+
+        yield LLMResponse(context_id=context_id, text="", usage=LLMUsage(
+            input_tokens=sum(len(self.tokenize(str(m["content"]))) for m in messages),
+            output_tokens=len(tokens)
+        ))
@@ -1,11 +1,16 @@
 import base64
+from collections import OrderedDict
+from contextlib import aclosing
+import hashlib
+import json
 from logging import getLogger
 import re
-from typing import AsyncGenerator, Dict, List
+from time import time
+from typing import AsyncGenerator, Dict, List, Tuple
 from google import genai
 from google.genai import types
 import httpx
-from . import LLMService, LLMResponse, ToolCall, Tool
+from . import LLMService, LLMResponse, LLMUsage, ToolCall, Tool, ToolExecutor
 from .context_manager import ContextManager
 
 logger = getLogger(__name__)
@@ -25,6 +30,12 @@ class GeminiService(LLMService):
         option_split_threshold: int = 50,
         voice_text_tag: str = None,
         use_dynamic_tools: bool = False,
+        use_prompt_cache: bool = False,
+        prompt_cache_ttl: int = 3600,
+        prompt_cache_min_tokens: int = 1024,
+        prompt_cache_size: int = 10,
+        max_concurrent_tools: int = 5,
+        tool_timeout: float = None,
         context_manager: ContextManager = None,
         debug: bool = False
     ):
@@ -37,6 +48,9 @@ class GeminiService(LLMService):
             option_split_threshold=option_split_threshold,
             voice_text_tag=voice_text_tag,
             use_dynamic_tools=use_dynamic_tools,
+            use_prompt_cache=use_prompt_cache,
+            max_concurrent_tools=max_concurrent_tools,
+            tool_timeout=tool_timeout,
             context_manager=context_manager,
             debug=debug
         )
@@ -44,6 +58,12 @@ class GeminiService(LLMService):
             api_key=gemini_api_key
         )
         self.thinking_budget = thinking_budget
+        self.prompt_cache_ttl = prompt_cache_ttl
+        # Minimum token count that the model accepts to cache (e.g. 1024 for Flash, 4096 for Pro)
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self.prompt_cache_size = prompt_cache_size
+        # Cache key -> (cached content name, expire time) in LRU order. Name is None if the content is not cached (e.g. too short)
+        self.cached_contents: OrderedDict[str, Tuple[str, float]] = OrderedDict()
 
         self.dynamic_tool_spec = {
             "functionDeclarations": [{
@@ -76,7 +96,7 @@ class GeminiService(LLMService):
         messages = []
 
         # Extract the history starting from the first message where the role is 'user'
-        histories = await self.context_manager.get_histories(context_id)
+        histories = await self.get_histories(context_id)
         while histories and histories[0]["role"] != "user":
             histories.pop(0)
         messages.extend(histories)
@@ -108,6 +128,9 @@ class GeminiService(LLMService):
             dict_messages.append(dumped)
         await self.context_manager.add_histories(context_id, dict_messages, "gemini")
 
+    async def warmup(self):
+        await self.preflight()
+
     async def preflight(self):
         # Dummy request to initialize client (The first message takes long time)
         stream_resp = await self.gemini_client.aio.models.generate_content_stream(
@@ -118,14 +141,75 @@ class GeminiService(LLMService):
             pass
         logger.info("Gemini client initialized.")
 
-    def tool(self, spec: Dict):
+    async def count_prompt_tokens(self, system_instruction: str, tools: List[Dict[str, any]]) -> int:
+        resp = await self.gemini_client.aio.models.count_tokens(
+            model=self.model,
+            contents=system_instruction + (json.dumps(tools, ensure_ascii=False) if tools else "")
+        )
+        return resp.total_tokens or 0
+
+    async def delete_cached_content(self, name: str):
+        # Delete not to be charged for the storage until the server side TTL
+        try:
+            await self.gemini_client.aio.caches.delete(name=name)
+            logger.info(f"Cached content deleted: {name}")
+        except Exception as ex:
+            logger.warning(f"Error at deleting cached content: {ex}")
+
+    async def get_cached_content(self, system_instruction: str, tools: List[Dict[str, any]]) -> str:
+        cache_key = hashlib.sha256(
+            json.dumps([self.model, system_instruction, tools], ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        now = time()
+        if cache_key in self.cached_contents:
+            name, expire_at = self.cached_contents[cache_key]
+            if expire_at > now:
+                self.cached_contents.move_to_end(cache_key)
+                return name
+            del self.cached_contents[cache_key]
+            if name:
+                await self.delete_cached_content(name)
+
+        name = None
+        try:
+            # Prompt that doesn't meet the minimum token count can't be cached
+            if (token_count := await self.count_prompt_tokens(system_instruction, tools)) >= self.prompt_cache_min_tokens:
+                cached_content = await self.gemini_client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=system_instruction,
+                        tools=tools,
+                        ttl=f"{self.prompt_cache_ttl}s"
+                    )
+                )
+                name = cached_content.name
+                logger.info(f"Cached content created: {name}")
+            else:
+                logger.info(f"Skip caching content: {token_count} tokens < {self.prompt_cache_min_tokens}")
+        except Exception as ex:
+            logger.warning(f"Error at caching content: {ex}")
+
+        # Expire slightly before the server side TTL
+        self.cached_contents[cache_key] = (name, now + self.prompt_cache_ttl * 0.9)
+        while len(self.cached_contents) > self.prompt_cache_size:
+            _, (evicted_name, _) = self.cached_contents.popitem(last=False)
+            if evicted_name:
+                await self.delete_cached_content(evicted_name)
+        return name
+
+    def tool(self, spec: Dict, *, cache_ttl: float = 0, cache_size: int = 100, cache_by_user: bool = None):
         def decorator(func):
             tool_name = spec["functionDeclarations"][0]["name"]
             self.tools[tool_name] = Tool(
                 name=tool_name,
                 spec=spec,
-                func=func
+                func=func,
+                cache_ttl=cache_ttl,
+                cache_size=cache_size,
+                cache_by_user=cache_by_user
             )
+            self.tool_router.add_tool(tool_name, spec["functionDeclarations"][0].get("description"))
             return func
         return decorator
 
@@ -208,80 +292,116 @@ class GeminiService(LLMService):
         else:
             filtered_tools = [t.spec for _, t in self.tools.items() if not t.is_dynamic] or None
 
-        stream_resp = await self.gemini_client.aio.models.generate_content_stream(
-            model=self.model,
+        system_instruction = self.get_system_prompt(system_prompt_params) + tool_instruction
+        if self.use_prompt_cache and (cached_content := await self.get_cached_content(system_instruction, filtered_tools)):
+            # System instruction and tools are provided by the cached content
+            config = types.GenerateContentConfig(
+                cached_content=cached_content,
+                temperature=self.temperature,
+                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
+                thinking_config=thinking_config
+            )
+        else:
             config = types.GenerateContentConfig(
-                system_instruction=self.get_system_prompt(system_prompt_params) + tool_instruction,
+                system_instruction=system_instruction,
                 temperature=self.temperature,
                 tools=filtered_tools,
                 automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
                 thinking_config=thinking_config
-            ),
+            )
+
+        stream_resp = await self.gemini_client.aio.models.generate_content_stream(
+            model=self.model,
+            config=config,
             contents=messages,
         )
 
         tool_calls: List[ToolCall] = []
+        tool_executor = ToolExecutor(self, {"user_id": user_id})
         try_dynamic_tools = False
         response_text = ""
-        async for chunk in stream_resp:
-            if not chunk.candidates or not chunk.candidates[0].content.parts:
-                continue
-            for part in chunk.candidates[0].content.parts:
-                if content := part.text:
-                    if not try_dynamic_tools:
-                        response_text += content
-                        yield LLMResponse(context_id=context_id, text=content)
-                elif part.function_call:
-                    tool_calls.append(ToolCall(part.function_call.id, part.function_call.name, dict(part.function_call.args)))
-                    if part.function_call.name == self.dynamic_tool_spec["functionDeclarations"][0]["name"]:
-                        logger.info("Get dynamic tool")
-                        filtered_tools = await self._get_dynamic_tools(
-                            messages,
-                            {"system_prompt": self.get_system_prompt(system_prompt_params)}
-                        )
-                        logger.info(f"Dynamic tools: {filtered_tools}")
-                        try_dynamic_tools = True
-
-        if tool_calls:
-            # Do something before tool calls (e.g. say to user that it will take a long time)
-            await self._on_before_tool_calls(tool_calls)
-
-            # NOTE: Gemini 2.0 Flash doesn't return multiple tools at once for now (2025-01-07), but it's not explicitly documented.
-            #       Multiple tools will be called sequentially: user -(llm)-> function_call -> function_response -(llm)-> function_call -> function_response -(llm)-> assistant
-            # Execute tools
-            messages_length = len(messages)
-            for tc in tool_calls:
-                if self.debug:
-                    logger.info(f"ToolCall: {tc.name}")
-                yield LLMResponse(context_id=context_id, tool_call=tc)
-
-                if tc.name == self.dynamic_tool_spec["functionDeclarations"][0]["name"]:
-                    if filtered_tools:
-                        tool_result = None
-                    else:
-                        tool_result = {"message": "No tools found"}
-                else:
-                    tool_result = await self.execute_tool(tc.name, tc.arguments, {"user_id": user_id})
-                if self.debug:
-                    logger.info(f"ToolCall result: {tool_result}")
-
-                if tool_result:
-                    model_parts = []
-                    if response_text:
-                        model_parts.append(types.Part.from_text(text=response_text))
-                    model_parts.append(types.Part.from_function_call(name=tc.name, args=tc.arguments))
-                    messages.append(types.Content(
-                        role="model",
-                        parts=model_parts
-                    ))
-                    messages.append(types.Content(
-                        role="user",
-                        parts=[types.Part.from_function_response(name=tc.name, response=tool_result)]
-                    ))
+        usage_metadata = None
+        # Cancel dispatched tools when aborted (e.g. cancelled by barge-in) until they are executed
+        async with tool_executor:
+            # Close HTTP stream not to keep generating tokens when aborted
+            async with aclosing(stream_resp):
+                async for chunk in stream_resp:
+                    if chunk.usage_metadata:
+                        usage_metadata = chunk.usage_metadata
+                    if not chunk.candidates or not chunk.candidates[0].content.parts:
+                        continue
+                    for part in chunk.candidates[0].content.parts:
+                        if content := part.text:
+                            if not try_dynamic_tools:
+                                response_text += content
+                                yield LLMResponse(context_id=context_id, text=content)
+                        elif part.function_call:
+                            tool_calls.append(ToolCall(part.function_call.id, part.function_call.name, dict(part.function_call.args)))
+                            # Start tool as soon as it arrives, while the rest is streamed
+                            tool_executor.dispatch(tool_calls[-1], tool_executor.parse_arguments(tool_calls[-1]))
+                            if part.function_call.name == self.dynamic_tool_spec["functionDeclarations"][0]["name"]:
+                                try_dynamic_tools = True
+
+            if usage_metadata:
+                yield LLMResponse(context_id=context_id, text="", usage=LLMUsage(
+                    input_tokens=usage_metadata.prompt_token_count or 0,
+                    output_tokens=usage_metadata.candidates_token_count or 0,
+                    cached_tokens=usage_metadata.cached_content_token_count or 0
+                ))
+
+            if try_dynamic_tools:
+                # Select tools after the arguments (target and action) are fixed
+                logger.info("Get dynamic tool")
+                dynamic_tool_call = next(tc for tc in tool_calls if tc.name == self.dynamic_tool_spec["functionDeclarations"][0]["name"])
+                filtered_tools = await self.select_dynamic_tools(
+                    messages,
+                    dynamic_tool_call.arguments or {},
+                    {"system_prompt": self.get_system_prompt(system_prompt_params)}
+                )
+                logger.info(f"Dynamic tools: {filtered_tools}")
+
+            if tool_calls:
+                # Do something before tool calls (e.g. say to user that it will take a long time)
+                await self._on_before_tool_calls(tool_calls)
+
+                # NOTE: Gemini 2.0 Flash doesn't return multiple tools at once for now (2025-01-07), but it's not explicitly documented.
+                #       Multiple tools will be called sequentially: user -(llm)-> function_call -> function_response -(llm)-> function_call -> function_response -(llm)-> assistant
+                for tc in tool_calls:
+                    if self.debug:
+                        logger.info(f"ToolCall: {tc.name}")
+                    yield LLMResponse(context_id=context_id, tool_call=tc)
+
+                # Execute tools
+                messages_length = len(messages)
+                tool_results = await self.execute_tools(
+                    [(tc, tc.arguments) for tc in tool_calls], {"user_id": user_id}, tool_executor
+                )
+                for tc, tool_result in zip(tool_calls, tool_results):
+                    if tc.name == self.dynamic_tool_spec["functionDeclarations"][0]["name"]:
+                        if filtered_tools:
+                            tool_result = None
+                        else:
+                            tool_result = {"message": "No tools found"}
+                    if self.debug:
+                        logger.info(f"ToolCall result: {tool_result}")
+
+                    if tool_result:
+                        model_parts = []
+                        if response_text:
+                            model_parts.append(types.Part.from_text(text=response_text))
+                        model_parts.append(types.Part.from_function_call(name=tc.name, args=tc.arguments))
+                        messages.append(types.Content(
+                            role="model",
+                            parts=model_parts
+                        ))
+                        messages.append(types.Content(
+                            role="user",
+                            parts=[types.Part.from_function_response(name=tc.name, response=tool_result)]
+                        ))
 
-            if len(messages) > messages_length or try_dynamic_tools:
-                # Generate human-friendly message that explains tool result
-                async for llm_response in self.get_llm_stream_response(
-                    context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
-                ):
-                    yield llm_response
+                if len(messages) > messages_length or try_dynamic_tools:
+                    # Generate human-friendly message that explains tool result
+                    async for llm_response in self.get_llm_stream_response(
+                        context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
+                    ):
+                        yield llm_response
@@ -3,7 +3,7 @@ from logging import getLogger
 import re
 from typing import AsyncGenerator, Dict, List
 from litellm import acompletion
-from . import LLMService, LLMResponse, ToolCall, Tool
+from . import LLMService, LLMResponse, ToolCall, Tool, ToolArgumentsParser, ToolExecutor
 from .context_manager import ContextManager
 
 logger = getLogger(__name__)
@@ -24,6 +24,8 @@ class LiteLLMService(LLMService):
         option_split_threshold: int = 50,
         voice_text_tag: str = None,
         use_dynamic_tools: bool = False,
+        max_concurrent_tools: int = 5,
+        tool_timeout: float = None,
         context_manager: ContextManager = None,
         debug: bool = False
     ):
@@ -36,6 +38,8 @@ class LiteLLMService(LLMService):
             option_split_threshold=option_split_threshold,
             voice_text_tag=voice_text_tag,
             use_dynamic_tools=use_dynamic_tools,
+            max_concurrent_tools=max_concurrent_tools,
+            tool_timeout=tool_timeout,
             context_manager=context_manager,
             debug=debug
         )
@@ -76,7 +80,7 @@ class LiteLLMService(LLMService):
                 messages.append({"role": "system", "content": self.get_system_prompt(system_prompt_params)})
 
         # Extract the history starting from the first message where the role is 'user'
-        histories = await self.context_manager.get_histories(context_id)
+        histories = await self.get_histories(context_id)
         while histories and histories[0]["role"] != "user":
             histories.pop(0)
         messages.extend(histories)
@@ -98,14 +102,18 @@ class LiteLLMService(LLMService):
         messages.append({"role": "assistant", "content": response_text})
         await self.context_manager.add_histories(context_id, messages, "chatgpt")
 
-    def tool(self, spec: Dict):
+    def tool(self, spec: Dict, *, cache_ttl: float = 0, cache_size: int = 100, cache_by_user: bool = None):
         def decorator(func):
             tool_name = spec["function"]["name"]
             self.tools[tool_name] = Tool(
                 name=tool_name,
                 spec=spec,
-                func=func
+                func=func,
+                cache_ttl=cache_ttl,
+                cache_size=cache_size,
+                cache_by_user=cache_by_user
             )
+            self.tool_router.add_tool(tool_name, spec["function"].get("description"))
         return decorator
 
     async def get_dynamic_tools_default(self, messages: List[dict], metadata: Dict[str, any] = None) -> List[Dict[str, any]]:
@@ -195,73 +203,87 @@ class LiteLLMService(LLMService):
         )
 
         tool_calls: List[ToolCall] = []
+        tool_executor = ToolExecutor(self, {"user_id": user_id})
+        arguments_parser: ToolArgumentsParser = None
         try_dynamic_tools = False
         response_text = ""
-        async for chunk in stream_resp:
-            if not chunk.choices:
-                continue
+        # Cancel dispatched tools when aborted (e.g. cancelled by barge-in) until they are executed
+        async with tool_executor:
+            async for chunk in stream_resp:
+                if not chunk.choices:
+                    continue
 
-            if chunk.choices[0].delta.tool_calls:
-                t = chunk.choices[0].delta.tool_calls[0]
-                if t.id:
-                    tool_calls.append(ToolCall(t.id, t.function.name, ""))
-                    if t.function.name == self.dynamic_tool_spec["function"]["name"]:
-                        logger.info("Get dynamic tool")
-                        filtered_tools = await self._get_dynamic_tools(messages)
-                        logger.info(f"Dynamic tools: {filtered_tools}")
-                        try_dynamic_tools = True
-                if t.function.arguments:
-                    tool_calls[-1].arguments += t.function.arguments
+                if chunk.choices[0].delta.tool_calls:
+                    t = chunk.choices[0].delta.tool_calls[0]
+                    if t.id:
+                        tool_calls.append(ToolCall(t.id, t.function.name, ""))
+                        arguments_parser = ToolArgumentsParser()
+                        if t.function.name == self.dynamic_tool_spec["function"]["name"]:
+                            try_dynamic_tools = True
+                    if t.function.arguments:
+                        tool_calls[-1].arguments += t.function.arguments
+                        if arguments_parser.feed(t.function.arguments):
+                            # Start tool as soon as its arguments are completed, while the rest is streamed
+                            tool_executor.dispatch(tool_calls[-1], tool_executor.parse_arguments(tool_calls[-1]))
 
-            elif content := chunk.choices[0].delta.content:
-                if not try_dynamic_tools:
-                    response_text += content
-                    yield LLMResponse(context_id=context_id, text=content)
+                elif content := chunk.choices[0].delta.content:
+                    if not try_dynamic_tools:
+                        response_text += content
+                        yield LLMResponse(context_id=context_id, text=content)
 
-        if tool_calls:
-            # Do something before tool calls (e.g. say to user that it will take a long time)
-            await self._on_before_tool_calls(tool_calls)
+            if try_dynamic_tools:
+                # Select tools after the arguments (target and action) are fixed
+                logger.info("Get dynamic tool")
+                dynamic_tool_call = next(tc for tc in tool_calls if tc.name == self.dynamic_tool_spec["function"]["name"])
+                filtered_tools = await self.select_dynamic_tools(messages, tool_executor.parse_arguments(dynamic_tool_call) or {})
+                logger.info(f"Dynamic tools: {filtered_tools}")
 
-            # Execute tools
-            messages_length = len(messages)
-            for tc in tool_calls:
-                if self.debug:
-                    logger.info(f"ToolCall: {tc.name}")
-                yield LLMResponse(context_id=context_id, tool_call=tc)
+            if tool_calls:
+                # Do something before tool calls (e.g. say to user that it will take a long time)
+                await self._on_before_tool_calls(tool_calls)
 
-                if tc.name == self.dynamic_tool_spec["function"]["name"]:
-                    if filtered_tools:
-                        tool_result = None
-                    else:
-                        tool_result = {"message": "No tools found"}
-                else:
-                    tool_result = await self.execute_tool(tc.name, json.loads(tc.arguments), {"user_id": user_id})
-                if self.debug:
-                    logger.info(f"ToolCall result: {tool_result}")
+                for tc in tool_calls:
+                    if self.debug:
+                        logger.info(f"ToolCall: {tc.name}")
+                    yield LLMResponse(context_id=context_id, tool_call=tc)
+
+                # Execute tools
+                messages_length = len(messages)
+                tool_results = await self.execute_tools(
+                    [(tc, tool_executor.parse_arguments(tc)) for tc in tool_calls], {"user_id": user_id}, tool_executor
+                )
+                for tc, tool_result in zip(tool_calls, tool_results):
+                    if tc.name == self.dynamic_tool_spec["function"]["name"]:
+                        if filtered_tools:
+                            tool_result = None
+                        else:
+                            tool_result = {"message": "No tools found"}
+                    if self.debug:
+                        logger.info(f"ToolCall result: {tool_result}")
 
-                if tool_result:
-                    messages.append({
-                        "role": "assistant",
-                        "tool_calls": [{
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": tc.arguments
-                            }
-                        }],
-                        "content": response_text if response_text else None
-                    })
+                    if tool_result:
+                        messages.append({
+                            "role": "assistant",
+                            "tool_calls": [{
+                                "id": tc.id,
+                                "type": "function",
+                                "function": {
+                                    "name": tc.name,
+                                    "arguments": tc.arguments
+                                }
+                            }],
+                            "content": response_text if response_text else None
+                        })
 
-                    messages.append({
-                        "role": "tool",
-                        "content": json.dumps(tool_result),
-                        "tool_call_id": tc.id
-                    })
+                        messages.append({
+                            "role": "tool",
+                            "content": json.dumps(tool_result),
+                            "tool_call_id": tc.id
+                        })
 
-            if len(messages) > messages_length or try_dynamic_tools:
-                # Generate human-friendly message that explains tool result
-                async for llm_response in self.get_llm_stream_response(
-                    context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
-                ):
-                    yield llm_response
+                if len(messages) > messages_length or try_dynamic_tools:
+                    # Generate human-friendly message that explains tool result
+                    async for llm_response in self.get_llm_stream_response(
+                        context_id, user_id, messages, system_prompt_params=system_prompt_params, tools=filtered_tools
+                    ):
+                        yield llm_response
@@ -0,0 +1,125 @@
+from collections import Counter, OrderedDict
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ToolRouter:
+    def __init__(
+        self,
+        *,
+        top_k: int = 5,
+        min_score: float = 0.4,
+        k1: float = 1.5,
+        b: float = 0.75,
+        cache_size: int = 1000,
+        cache_similarity: float = 0.8
+    ):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.k1 = k1
+        self.b = b
+        self.cache_size = cache_size
+        # Cached result of the most similar key is reused when its similarity is above this (1.0 for exact match only)
+        self.cache_similarity = cache_similarity
+        self.documents: Dict[str, Counter] = {}
+        self.idf: Dict[str, float] = {}
+        self.avg_length = 0.0
+        self.cache: OrderedDict[str, List[str]] = OrderedDict()
+        self.cache_terms: Dict[str, Set[str]] = {}
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for word in re.findall(r"\w+", text.lower()):
+            if word.isascii():
+                tokens.append(word)
+            elif len(word) == 1:
+                tokens.append(word)
+            else:
+                # Use character bigrams for languages without spaces (e.g. Japanese)
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        return tokens
+
+    def add_tool(self, name: str, description: str):
+        self.documents[name] = Counter(self.tokenize(f"{name.replace('_', ' ')} {description or ''}"))
+
+        # Update statistics for BM25 once at registration
+        doc_count = len(self.documents)
+        doc_freq = Counter()
+        for terms in self.documents.values():
+            doc_freq.update(terms.keys())
+        self.idf = {t: math.log(1 + (doc_count - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()}
+        self.avg_length = sum(sum(terms.values()) for terms in self.documents.values()) / doc_count
+
+        # Results cached before adding tool may be stale
+        self.cache.clear()
+        self.cache_terms.clear()
+
+    def make_key(self, arguments: Dict[str, any]) -> str:
+        return " ".join(
+            " ".join(str(arguments.get(k) or "").lower().split()) for k in ("target", "action")
+        ).strip()
+
+    def get_term_weight(self, term: str) -> float:
+        # IDF of BM25. Terms that don't appear in any tools are weighted the most
+        return self.idf.get(term) or math.log(1 + (len(self.documents) + 0.5) / 0.5)
+
+    def get_similarity(self, terms: Set[str], other_terms: Set[str]) -> float:
+        # Jaccard similarity weighted by IDF not to regard the keys that differ only in common terms as different
+        union_weight = sum(self.get_term_weight(t) for t in terms | other_terms)
+        return sum(self.get_term_weight(t) for t in terms & other_terms) / union_weight if union_weight else 0.0
+
+    def get_cache(self, key: str) -> Optional[List[str]]:
+        if key not in self.cache:
+            if self.cache_similarity >= 1.0 or not (terms := set(self.tokenize(key))):
+                return None
+            # Near-duplicate key (e.g. "play music" and "play the music")
+            similar_key, similarity = max(
+                ((k, self.get_similarity(terms, t)) for k, t in self.cache_terms.items()),
+                key=lambda ks: ks[1], default=(None, 0.0)
+            )
+            if similarity < self.cache_similarity:
+                return None
+            logger.info(f"Similar key cached: {key} -> {similar_key} ({similarity:.2f})")
+            key = similar_key
+        self.cache.move_to_end(key)
+        return self.cache[key]
+
+    def set_cache(self, key: str, tool_names: List[str]):
+        self.cache[key] = tool_names
+        self.cache_terms[key] = set(self.tokenize(key))
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            evicted_key, _ = self.cache.popitem(last=False)
+            del self.cache_terms[evicted_key]
+
+    def route(self, target: str, action: str = "") -> List[str]:
+        target_terms = set(self.tokenize(target or ""))
+        action_terms = set(self.tokenize(action or "")) - target_terms
+        if not target_terms or not self.documents:
+            return []
+
+        # Terms in target that don't appear in any tools lower the score, while the ones in action
+        # (e.g. look up, retrieve) are too general and count only when they appear in tools
+        unknown_idf = math.log(1 + (len(self.documents) + 0.5) / 0.5)
+        query_terms = target_terms | {t for t in action_terms if t in self.idf}
+        query_idf = sum(self.idf.get(t, unknown_idf) for t in query_terms)
+
+        scores = []
+        for name, terms in self.documents.items():
+            length_norm = self.k1 * (1 - self.b + self.b * sum(terms.values()) / self.avg_length)
+            score = 0.0
+            for t in query_terms:
+                if tf := terms.get(t):
+                    score += self.idf[t] * tf * (self.k1 + 1) / (tf + length_norm)
+            # Normalize by the score of the tool that contains every query term once
+            if score / (query_idf * (self.k1 + 1) / (1 + length_norm)) >= self.min_score:
+                scores.append((score, name))
+
+        scores.sort(key=lambda s: s[0], reverse=True)
+        tool_names = [name for _, name in scores[:self.top_k]]
+        logger.info(f"Tools routed locally: {target} / {action} -> {tool_names}")
+        return tool_names
@@ -3,7 +3,12 @@ from typing import List, Dict, Any
 from .llm import ToolCall
 
 
-@dataclass
+def chunk_metadata(is_first_chunk: bool, is_filler: bool = False) -> Dict[str, Any]:
+    # Plain dict for each chunk so that handlers can modify and serialize it
+    return {"is_first_chunk": is_first_chunk, "is_filler": is_filler}
+
+
+@dataclass(slots=True)
 class STSRequest:
     type: str = "start"
     session_id: str = None
@@ -16,7 +21,7 @@ class STSRequest:
     system_prompt_params: Dict[str, Any] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class STSResponse:
     type: str
     session_id: str = None
@@ -26,4 +31,4 @@ class STSResponse:
     voice_text: str = None
     audio_data: bytes = None
     tool_call: ToolCall = None
-    metadata: dict = None
+    metadata: Dict[str, Any] = None
@@ -23,6 +23,24 @@ class PerformanceRecord:
     tts_first_chunk_time: float = 0
     tts_time: float = 0
     total_time: float = 0
+    llm_input_tokens: int = 0
+    llm_output_tokens: int = 0
+    llm_cached_tokens: int = 0
+    tool_calls: int = 0
+    tool_cache_hits: int = 0
+    tts_cache_hits: int = 0
+    tts_cache_misses: int = 0
+    tts_coalesced: int = 0
+    tts_endpoint_latencies: str = None
+    stage_stats: str = None
+    cancelled_llm_chunks: int = 0
+    cancelled_tts_segments: int = 0
+    cancelled_tts_time: float = 0
+    queue_wait_time: float = 0
+    tts_queue_wait_time: float = 0
+    filler_count: int = 0
+    filler_time: float = 0
+    voice_recordings_dropped: int = 0
 
 
 class PerformanceRecorder(ABC):
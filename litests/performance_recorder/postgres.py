@@ -38,7 +38,7 @@ class PostgreSQLPerformanceRecorder(PerformanceRecorder):
     def connect_db(self):
         return psycopg2.connect(**self.connection_params)
 
-    def add_column_if_not_exist(self, cur, column_name):
+    def add_column_if_not_exist(self, cur, column_name, column_type="TEXT"):
         cur.execute(
             f"""
             SELECT column_name FROM information_schema.columns
@@ -47,7 +47,7 @@ class PostgreSQLPerformanceRecorder(PerformanceRecorder):
         )
         if not cur.fetchone():
             cur.execute(
-                f"ALTER TABLE performance_records ADD COLUMN {column_name} TEXT"
+                f"ALTER TABLE performance_records ADD COLUMN {column_name} {column_type}"
             )
 
     def init_db(self):
@@ -77,7 +77,25 @@ class PostgreSQLPerformanceRecorder(PerformanceRecorder):
                         request_text TEXT,
                         request_files TEXT,
                         response_text TEXT,
-                        response_voice_text TEXT
+                        response_voice_text TEXT,
+                        llm_input_tokens INTEGER,
+                        llm_output_tokens INTEGER,
+                        llm_cached_tokens INTEGER,
+                        tool_calls INTEGER,
+                        tool_cache_hits INTEGER,
+                        tts_cache_hits INTEGER,
+                        tts_cache_misses INTEGER,
+                        tts_coalesced INTEGER,
+                        tts_endpoint_latencies TEXT,
+                        stage_stats TEXT,
+                        cancelled_llm_chunks INTEGER,
+                        cancelled_tts_segments INTEGER,
+                        cancelled_tts_time REAL,
+                        queue_wait_time REAL,
+                        tts_queue_wait_time REAL,
+                        filler_count INTEGER,
+                        filler_time REAL,
+                        voice_recordings_dropped INTEGER
                     )
                     """
                 )
@@ -91,6 +109,39 @@ class PostgreSQLPerformanceRecorder(PerformanceRecorder):
                 # Add transaction_id column if not exist (migration v0.3.3 -> 0.3.4)
                 self.add_column_if_not_exist(cur, "transaction_id")
 
+                # Add token usage columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["llm_input_tokens", "llm_output_tokens", "llm_cached_tokens"]:
+                    self.add_column_if_not_exist(cur, column_name, "INTEGER")
+
+                # Add tool columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["tool_calls", "tool_cache_hits"]:
+                    self.add_column_if_not_exist(cur, column_name, "INTEGER")
+
+                # Add TTS cache columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["tts_cache_hits", "tts_cache_misses", "tts_coalesced"]:
+                    self.add_column_if_not_exist(cur, column_name, "INTEGER")
+
+                # Add TTS endpoint column if not exist (migration v0.3.12 -> 0.3.13)
+                self.add_column_if_not_exist(cur, "tts_endpoint_latencies")
+
+                # Add stage stats column if not exist (migration v0.3.12 -> 0.3.13)
+                self.add_column_if_not_exist(cur, "stage_stats")
+
+                # Add cancellation columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name, column_type in [("cancelled_llm_chunks", "INTEGER"), ("cancelled_tts_segments", "INTEGER"), ("cancelled_tts_time", "REAL")]:
+                    self.add_column_if_not_exist(cur, column_name, column_type)
+
+                # Add queue wait columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["queue_wait_time", "tts_queue_wait_time"]:
+                    self.add_column_if_not_exist(cur, column_name, "REAL")
+
+                # Add filler columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name, column_type in [("filler_count", "INTEGER"), ("filler_time", "REAL")]:
+                    self.add_column_if_not_exist(cur, column_name, column_type)
+
+                # Add voice recorder column if not exist (migration v0.3.12 -> 0.3.13)
+                self.add_column_if_not_exist(cur, "voice_recordings_dropped", "INTEGER")
+
                 # Create index
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON performance_records (created_at)")
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_transaction_id ON performance_records (transaction_id)")
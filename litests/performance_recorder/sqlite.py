@@ -44,7 +44,25 @@ class SQLitePerformanceRecorder(PerformanceRecorder):
                         request_text TEXT,
                         request_files TEXT,
                         response_text TEXT,
-                        response_voice_text TEXT
+                        response_voice_text TEXT,
+                        llm_input_tokens INTEGER,
+                        llm_output_tokens INTEGER,
+                        llm_cached_tokens INTEGER,
+                        tool_calls INTEGER,
+                        tool_cache_hits INTEGER,
+                        tts_cache_hits INTEGER,
+                        tts_cache_misses INTEGER,
+                        tts_coalesced INTEGER,
+                        tts_endpoint_latencies TEXT,
+                        stage_stats TEXT,
+                        cancelled_llm_chunks INTEGER,
+                        cancelled_tts_segments INTEGER,
+                        cancelled_tts_time REAL,
+                        queue_wait_time REAL,
+                        tts_queue_wait_time REAL,
+                        filler_count INTEGER,
+                        filler_time REAL,
+                        voice_recordings_dropped INTEGER
                     )
                     """
                 )
@@ -65,6 +83,48 @@ class SQLitePerformanceRecorder(PerformanceRecorder):
                     print("add column: transaction_id")
                     conn.execute("ALTER TABLE performance_records ADD COLUMN transaction_id TEXT")
 
+                # Add token usage columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["llm_input_tokens", "llm_output_tokens", "llm_cached_tokens"]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} INTEGER")
+
+                # Add tool columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["tool_calls", "tool_cache_hits"]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} INTEGER")
+
+                # Add TTS cache columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["tts_cache_hits", "tts_cache_misses", "tts_coalesced"]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} INTEGER")
+
+                # Add TTS endpoint column if not exist (migration v0.3.12 -> 0.3.13)
+                if "tts_endpoint_latencies" not in columns:
+                    conn.execute("ALTER TABLE performance_records ADD COLUMN tts_endpoint_latencies TEXT")
+
+                # Add stage stats column if not exist (migration v0.3.12 -> 0.3.13)
+                if "stage_stats" not in columns:
+                    conn.execute("ALTER TABLE performance_records ADD COLUMN stage_stats TEXT")
+
+                # Add cancellation columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name, column_type in [("cancelled_llm_chunks", "INTEGER"), ("cancelled_tts_segments", "INTEGER"), ("cancelled_tts_time", "REAL")]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} {column_type}")
+
+                # Add queue wait columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name in ["queue_wait_time", "tts_queue_wait_time"]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} REAL")
+
+                # Add filler columns if not exist (migration v0.3.12 -> 0.3.13)
+                for column_name, column_type in [("filler_count", "INTEGER"), ("filler_time", "REAL")]:
+                    if column_name not in columns:
+                        conn.execute(f"ALTER TABLE performance_records ADD COLUMN {column_name} {column_type}")
+
+                # Add voice recorder column if not exist (migration v0.3.12 -> 0.3.13)
+                if "voice_recordings_dropped" not in columns:
+                    conn.execute("ALTER TABLE performance_records ADD COLUMN voice_recordings_dropped INTEGER")
+
                 # Create index
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON performance_records (created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_transaction_id ON performance_records (transaction_id)")
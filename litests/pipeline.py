@@ -1,21 +1,29 @@
+import asyncio
+from collections import Counter
+from contextlib import AsyncExitStack
 from datetime import datetime, timezone
 import json
 import logging
-from time import time
+import random
+from time import perf_counter_ns, time
 import traceback
 from typing import AsyncGenerator, Tuple, List, Dict
 from uuid import uuid4
-from .models import STSRequest, STSResponse
+from .admission import AdmissionController, AdmissionRejected
+from .models import STSRequest, STSResponse, chunk_metadata
+from .stage import StageQueue, StageGroup
 from .vad import SpeechDetector, StandardSpeechDetector
 from .stt import SpeechRecognizer
 from .stt.google import GoogleSpeechRecognizer
-from .llm import LLMService, LLMResponse
+from .llm import LLMService, LLMResponse, ToolCall
 from .llm.chatgpt import ChatGPTService
-from .tts import SpeechSynthesizer
+from .tts import SpeechSynthesizer, SynthesisMetrics, synthesis_metrics
+from .tts.audio import AudioChunk, AudioFormat, AudioTranscoder
 from .tts.voicevox import VoicevoxSpeechSynthesizer
 from .performance_recorder import PerformanceRecord, PerformanceRecorder
 from .performance_recorder.sqlite import SQLitePerformanceRecorder
-from .voice_recorder import VoiceRecorder, RequestVoice, ResponseVoices
+from .tracer import Tracer
+from .voice_recorder import VoiceRecorder, RequestVoice, ResponseVoice
 from .voice_recorder.file import FileVoiceRecorder
 
 logger = logging.getLogger(__name__)
@@ -40,15 +48,30 @@ class LiteSTS:
         tts: SpeechSynthesizer = None,
         tts_voicevox_url: str = "http://127.0.0.1:50021",
         tts_voicevox_speaker: int = 46,
+        llm_queue_size: int = 100,
+        tts_lookahead: int = 3,
+        tts_streaming: bool = False,
+        tts_carry_style: bool = False,
+        output_audio_format: AudioFormat = None,
+        filler_phrases: List[str] = None,
+        filler_delay: float = 1.5,
+        filler_on_tool_call: bool = True,
         wakewords: List[str] = None,
         wakeword_timeout: float = 60.0,
+        admission_controller: AdmissionController = None,
         performance_recorder: PerformanceRecorder = None,
         voice_recorder: VoiceRecorder = None,
         voice_recorder_enabled: bool = True,
+        tracer: Tracer = None,
         debug: bool = False
     ):
         # Cancellation
         self.active_transactions: Dict[str, str] = {}
+        # Tasks of the active transaction by session_id to cancel them on barge-in
+        self.stage_groups: Dict[str, StageGroup] = {}
+
+        # Keepalive
+        self.keepalive_task: asyncio.Task = None
 
         # Logger
         self.debug = debug
@@ -104,10 +127,31 @@ class LiteSTS:
             debug=debug
         )
 
+        # Number of LLM chunks buffered while TTS is busy
+        self.llm_queue_size = llm_queue_size
+
+        # Number of segments synthesized ahead concurrently (1 to synthesize sequentially)
+        self.tts_lookahead = max(tts_lookahead, 1)
+        # Send audio in sub-sentence chunks as they arrive from TTS (set True for the adapters that accept partial audio)
+        self.tts_streaming = tts_streaming
+        # Apply the style in the segment to the following segments that have no style
+        self.tts_carry_style = tts_carry_style
+        # Audio format that adapter accepts (None to send synthesized audio as it is)
+        self.output_audio_format = output_audio_format
+
+        # Filler played when no audio is sent within filler_delay sec after the end of user's turn, or when tools are called
+        self.filler_phrases = filler_phrases or []
+        self.filler_delay = filler_delay
+        self.filler_on_tool_call = filler_on_tool_call
+        self.filler_audios: List[bytes] = []    # Synthesized at startup
+
         # Wakeword
         self.wakewords = wakewords
         self.wakeword_timeout = wakeword_timeout
 
+        # Concurrency limits of transactions and each stage (no limits by default)
+        self.admission_controller = admission_controller or AdmissionController()
+
         # Response handler
         self.handle_response = self.handle_response_default
         self.stop_response = self.stop_response_default
@@ -123,6 +167,9 @@ class LiteSTS:
         self.voice_recorder_enabled = voice_recorder_enabled
         self.voice_recorder_response_audio_format = "wav"
 
+        # Tracer (spans of each transaction are exported to tracer.exporter)
+        self.tracer = tracer or Tracer()
+
         # User custom logic
         self._on_before_llm = self.on_before_llm_default
         self._on_before_tts = self.on_before_tts_default
@@ -183,13 +230,47 @@ class LiteSTS:
 
         return False
 
+    @property
+    def output_audio_format(self) -> AudioFormat:
+        return self._output_audio_format
+
+    @output_audio_format.setter
+    def output_audio_format(self, audio_format: AudioFormat):
+        # Validated when set (e.g. by adapter) not to fail in the middle of response
+        if audio_format:
+            if audio_format.encoding not in ("wav", "pcm", "mulaw"):
+                raise ValueError(f"Unsupported encoding of output audio format: {audio_format.encoding}")
+            # Fail fast when synthesized audio can't be decoded (e.g. compressed format)
+            self.tts.create_audio_decoder()
+        self._output_audio_format = audio_format
+
     def is_transaction_active(self, session_id: str, transaction_id: str) -> bool:
         return self.active_transactions.get(session_id) == transaction_id
 
+    def record_response_voice(self, transaction_id: str, index: int, audio_parts: List[bytes]) -> bool:
+        # Record audio of a segment as a file. Parts of the streamed segment are joined
+        if self.output_audio_format:
+            audio_format = self.output_audio_format.encoding
+            if audio_format == "wav" and len(audio_parts) > 1:
+                # Each part is a WAV: join the frames under one header
+                chunks = [AudioChunk.from_wav(p) for p in audio_parts]
+                audio_parts = [AudioChunk(
+                    b"".join(c.data for c in chunks), chunks[0].sample_rate, chunks[0].channels, chunks[0].sample_width
+                ).to_wav()]
+        else:
+            audio_format = self.voice_recorder_response_audio_format
+        return self.voice_recorder.record_nowait(ResponseVoice(transaction_id, index, b"".join(audio_parts), audio_format))
+
     async def invoke(self, request: STSRequest) -> AsyncGenerator[STSResponse, None]:
+        prefetched_context_id = None
+        stage_group = StageGroup()
+        synthesized_stream = None
+        invoke_span = self.tracer.start_span("invoke", session_id=request.session_id, user_id=request.user_id)
+        admission_stack = AsyncExitStack()
         try:
             start_time = time()
             transaction_id = str(uuid4())
+            invoke_span.set_attribute("transaction_id", transaction_id)
 
             performance = PerformanceRecord(
                 transaction_id=transaction_id,
@@ -199,6 +280,15 @@ class LiteSTS:
                 tts_name=self.tts.__class__.__name__
             )
 
+            # Sessions in conversation are prioritized
+            priority = 0 if request.context_id else 1
+            wait_times = Counter()
+
+            # Start I/O that doesn't depend on the transcript at the same time as STT
+            last_created_at_task = asyncio.create_task(self.llm.context_manager.get_last_created_at(request.context_id))
+            self.llm.prefetch_histories(request.context_id)
+            prefetched_context_id = request.context_id
+
             if request.text:
                 # Use text if exist
                 recognized_text = request.text
@@ -206,12 +296,18 @@ class LiteSTS:
                     logger.info(f"Use text in request: {recognized_text}")
             elif request.audio_data:
                 if self.voice_recorder_enabled:
-                    await self.voice_recorder.record(RequestVoice(transaction_id, request.audio_data))
+                    # Hand over the reference without waiting for recording
+                    if not self.voice_recorder.record_nowait(RequestVoice(transaction_id, request.audio_data)):
+                        performance.voice_recordings_dropped += 1
                 # Speech-to-Text
-                recognized_text = await self.stt.transcribe(request.audio_data)
+                with self.tracer.span("stt", invoke_span, stt_name=performance.stt_name):
+                    async with self.admission_controller.slot("stt", priority, wait_times):
+                        recognized_text = await self.stt.transcribe(request.audio_data)
                 if not recognized_text:
                     if self.debug:
                         logger.info("No speech recognized.")
+                    # Noise doesn't stop the on-going response
+                    await last_created_at_task
                     return
                 if self.debug:
                     logger.info(f"Recognized text from request: {recognized_text}")
@@ -224,8 +320,40 @@ class LiteSTS:
             performance.voice_length = request.audio_duration
             performance.stt_time = time() - start_time
 
-            last_created_at = await self.llm.context_manager.get_last_created_at(request.context_id)
-            if self.is_awake(request, last_created_at):
+            last_created_at = await last_created_at_task
+            is_awake = self.is_awake(request, last_created_at)
+
+            # Admission after the transcript is validated so that noise doesn't stop the on-going response
+            # New transaction in the session supersedes the on-going one
+            supersedes = is_awake and request.session_id in self.stage_groups
+            if supersedes and self.admission_controller.is_busy():
+                # Cancel the previous transaction to hand over its slot instead of waiting behind it
+                self.stage_groups[request.session_id].cancel()
+            try:
+                self.admission_controller.check_user(request.user_id, supersedes)
+                if not supersedes and self.admission_controller.will_queue():
+                    # Let user know that the response will be delayed
+                    yield STSResponse(
+                        type="wait",
+                        session_id=request.session_id,
+                        user_id=request.user_id,
+                        context_id=request.context_id
+                    )
+                await admission_stack.enter_async_context(self.admission_controller.admit(
+                    request.user_id, priority, wait_times, supersedes
+                ))
+            except AdmissionRejected as arex:
+                logger.warning(f"Transaction rejected: {arex}")
+                yield STSResponse(
+                    type="final",
+                    session_id=request.session_id,
+                    user_id=request.user_id,
+                    context_id=request.context_id,
+                    metadata={"error": "Too many requests.", "rejected": True}
+                )
+                return
+
+            if is_awake:
                 # Get context
                 if request.context_id:
                     if last_created_at == datetime.min.replace(tzinfo=timezone.utc):
@@ -240,6 +368,10 @@ class LiteSTS:
                 if self.debug:
                     logger.info(f"Start transaction: {transaction_id} {request.text} (previous: {self.active_transactions.get(request.session_id)})")
                 self.active_transactions[request.session_id] = transaction_id
+                # Cancel LLM stream, syntheses and tool executions of the previous transaction
+                if previous_stage_group := self.stage_groups.get(request.session_id):
+                    previous_stage_group.cancel()
+                self.stage_groups[request.session_id] = stage_group
             else:
                 # Clear request content to avoid LLM and TTS processing
                 request.text = None
@@ -263,57 +395,270 @@ class LiteSTS:
             await self._on_before_llm(request)
             llm_stream = self.llm.chat_stream(request.context_id, request.user_id, request.text, request.files, request.system_prompt_params)
 
-            # TTS
-            async def synthesize_stream() -> AsyncGenerator[Tuple[bytes, LLMResponse], None]:
+            # Stages: LLM reader -> segmenter -> TTS workers -> emitter (this generator)
+            tool_calls: List[ToolCall] = []
+            tts_metrics = SynthesisMetrics()
+            llm_queue = StageQueue(self.llm_queue_size)
+            tts_queue = StageQueue(self.tts_lookahead)
+            emit_queue = StageQueue()
+            # Number of segments synthesized ahead of emission
+            lookahead_slots = asyncio.Semaphore(self.tts_lookahead)
+            # Counts to estimate the work saved by cancellation
+            segment_counts = Counter()
+
+            async def read_llm_stream():
+                llm_span = self.tracer.start_span("llm", invoke_span, llm_name=performance.llm_name)
+                try:
+                    async with self.admission_controller.slot("llm", priority, wait_times):
+                        async for llm_stream_chunk in llm_stream:
+                            # LLM performance
+                            if performance.llm_first_chunk_time == 0:
+                                performance.llm_first_chunk_time = time() - start_time
+                                llm_span.set_attribute("first_chunk_time", (perf_counter_ns() - llm_span.start_ns) / 1e9)
+                            if llm_stream_chunk.voice_text and performance.llm_first_voice_chunk_time == 0:
+                                performance.llm_first_voice_chunk_time = time() - start_time
+                            performance.llm_time = time() - start_time
+                            if not llm_stream_chunk.usage and not llm_stream_chunk.tool_call:
+                                segment_counts["llm_chunks"] += 1
+                            # Wait here when the queue is full (backpressure to LLM)
+                            await llm_queue.put(llm_stream_chunk)
+                    await llm_queue.put(None)
+                except Exception as ex:
+                    llm_span.set_attribute("error", repr(ex))
+                    await llm_queue.put(ex)
+                finally:
+                    self.tracer.end_span(llm_span, chunks=segment_counts["llm_chunks"])
+
+            async def segment_llm_stream():
+                # Measure synthesis in this task (prefetch) and TTS workers for this request
+                synthesis_metrics.set(tts_metrics)
                 voice_text = ""
                 language = None
-                async for llm_stream_chunk in llm_stream:
-                    if not self.is_transaction_active(request.session_id, transaction_id):
-                        # Break when new transaction started in this session
-                        if self.debug:
-                            logger.info(f"Break llm_stream for new transaction: {self.active_transactions.get(request.session_id)} {request.text} (current: {transaction_id})")
-                        break
-
-                    # LLM performance
-                    if performance.llm_first_chunk_time == 0:
-                        performance.llm_first_chunk_time = time() - start_time
-
-                    # ToolCall
-                    if llm_stream_chunk.tool_call:
-                        yield None, llm_stream_chunk
-                        continue
-
-                    # Voice
-                    if llm_stream_chunk.voice_text:
-                        voice_text += llm_stream_chunk.voice_text
-                        if performance.llm_first_voice_chunk_time == 0:
-                            performance.llm_first_voice_chunk_time = time() - start_time
-                            await self._on_before_tts(request)
-                    performance.llm_time = time() - start_time
-
-                    # Parse info from LLM chunk (especially, language)
-                    parsed_info = await self._process_llm_chunk(llm_stream_chunk)
-                    language = parsed_info.get("language") or language
-
-                    audio_chunk = await self.tts.synthesize(
-                        text=llm_stream_chunk.voice_text,
-                        style_info={"styled_text": llm_stream_chunk.text},
-                        language=language
-                    )
-
-                    # TTS performance
-                    if audio_chunk:
-                        if performance.tts_first_chunk_time == 0:
-                            performance.tts_first_chunk_time = time() - start_time
-                        performance.tts_time = time() - start_time
+                carried_style = None
+                try:
+                    while True:
+                        llm_stream_chunk = await llm_queue.get()
+                        if isinstance(llm_stream_chunk, Exception):
+                            raise llm_stream_chunk
+                        if llm_stream_chunk is None:
+                            break
+
+                        # Token usage
+                        if llm_stream_chunk.usage:
+                            performance.llm_input_tokens += llm_stream_chunk.usage.input_tokens
+                            performance.llm_output_tokens += llm_stream_chunk.usage.output_tokens
+                            performance.llm_cached_tokens += llm_stream_chunk.usage.cached_tokens
+                            continue
+
+                        # ToolCall
+                        if llm_stream_chunk.tool_call:
+                            tool_calls.append(llm_stream_chunk.tool_call)
+                            await emit_queue.put((None, llm_stream_chunk, None))
+                            continue
+
+                        # Voice
+                        if llm_stream_chunk.voice_text:
+                            if not voice_text:
+                                await self._on_before_tts(request)
+                            voice_text += llm_stream_chunk.voice_text
+
+                        # Parse info from LLM chunk (especially, language)
+                        parsed_info = await self._process_llm_chunk(llm_stream_chunk)
+                        language = parsed_info.get("language") or language
+
+                        # Style
+                        style_info = {"styled_text": llm_stream_chunk.text}
+                        if self.tts_carry_style:
+                            # Resolve in the order of segments since they are synthesized concurrently
+                            style_info["carried_style"] = carried_style
+                            carried_style = self.tts.parse_style(style_info)
+
+                        if llm_stream_chunk.voice_text:
+                            # Prepare for synthesis (e.g. audio query) while the previous segments are synthesized
+                            try:
+                                await self.tts.prefetch(llm_stream_chunk.voice_text, style_info, language)
+                            except Exception as pex:
+                                logger.warning(f"Error at prefetch: {pex}")
+
+                        # Wait until the number of segments ahead of emission is under the limit
+                        await lookahead_slots.acquire()
+                        audio_queue = asyncio.Queue()
+                        # Span from enqueue to the end of synthesis
+                        tts_span = self.tracer.start_span("tts", invoke_span, index=segment_counts["queued"], text=llm_stream_chunk.voice_text or "")
+                        segment_counts["queued"] += 1
+                        await emit_queue.put((audio_queue, llm_stream_chunk, tts_span))
+                        await tts_queue.put((audio_queue, llm_stream_chunk.voice_text, style_info, language, tts_span))
+
+                    performance.response_voice_text = voice_text
+                    await emit_queue.put(None)
+                except Exception as ex:
+                    await emit_queue.put(ex)
+
+            async def synthesize_worker():
+                synthesis_metrics.set(tts_metrics)
+                while True:
+                    audio_queue, text, style_info, language, tts_span = await tts_queue.get()
+                    try:
+                        async with self.admission_controller.slot("tts", priority, wait_times):
+                            synthesis_start_time = time()
+                            tts_span.set_attribute("queue_wait", (perf_counter_ns() - tts_span.start_ns) / 1e9)
+                            if self.output_audio_format:
+                                # Parse and transcode once per chunk
+                                transcoder = AudioTranscoder(self.output_audio_format)
+                                async for audio_chunk in self.tts.synthesize_audio(text, style_info, language, stream=self.tts_streaming):
+                                    audio_queue.put_nowait(transcoder.transcode(audio_chunk))
+                            elif self.tts_streaming:
+                                async for audio_chunk in self.tts.synthesize_stream(text, style_info, language):
+                                    audio_queue.put_nowait(audio_chunk)
+                            elif audio_chunk := await self.tts.synthesize(text, style_info, language):
+                                audio_queue.put_nowait(audio_chunk)
+                            segment_counts["synthesized"] += 1
+                            segment_counts["synthesis_time"] += time() - synthesis_start_time
+                    except Exception as ex:
+                        tts_span.set_attribute("error", repr(ex))
+                        audio_queue.put_nowait(ex)
+                    finally:
+                        # End of segment
+                        self.tracer.end_span(tts_span)
+                        audio_queue.put_nowait(None)
+
+            # Chunk to mark filler audio
+            filler_chunk = LLMResponse(context_id=request.context_id, text="", voice_text="")
 
-                    yield audio_chunk, llm_stream_chunk
-                performance.response_voice_text = voice_text
+            async def synthesize_stream() -> AsyncGenerator[Tuple[bytes, LLMResponse], None]:
+                stage_tasks = [stage_group.create_task(read_llm_stream()), stage_group.create_task(segment_llm_stream())] \
+                    + [stage_group.create_task(synthesize_worker()) for _ in range(self.tts_lookahead)]
+                waiting_audio_queue: asyncio.Queue = None
+
+                def wake_on_cancel():
+                    # Wake up emitter waiting for the stages that are cancelled
+                    emit_queue.put_nowait(None)
+                    if waiting_audio_queue:
+                        waiting_audio_queue.put_nowait(None)
+
+                stage_group.add_cancel_callback(wake_on_cancel)
+
+                def is_cancelled() -> bool:
+                    return stage_group.cancelled or not self.is_transaction_active(request.session_id, transaction_id)
+
+                filler_deadline = start_time + self.filler_delay if self.filler_audios else None
+                response_audio_index = 0
+                filler_after_audio = False
+
+                async def get_or_filler(queue):
+                    # Returns filler_chunk when nothing arrives until the deadline
+                    nonlocal filler_deadline
+                    if filler_deadline is not None and queue.qsize() == 0:
+                        timeout = filler_deadline - time()
+                        try:
+                            if timeout > 0:
+                                return await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            pass
+                        filler_deadline = None
+                        return filler_chunk
+                    return await queue.get()
+
+                def next_filler() -> bytes:
+                    nonlocal filler_deadline, filler_after_audio
+                    filler_deadline = None
+                    filler_after_audio = True
+                    if performance.filler_count == 0:
+                        performance.filler_time = time() - start_time
+                    performance.filler_count += 1
+                    return random.choice(self.filler_audios)
+
+                try:
+                    while True:
+                        if is_cancelled():
+                            # Break when new transaction started in this session
+                            if self.debug:
+                                logger.info(f"Break llm_stream for new transaction: {self.active_transactions.get(request.session_id)} {request.text} (current: {transaction_id})")
+                            break
+
+                        # Deliver in order
+                        segment = await get_or_filler(emit_queue)
+                        if segment is filler_chunk:
+                            yield next_filler(), filler_chunk
+                            continue
+                        if isinstance(segment, Exception):
+                            raise segment
+                        if segment is None:
+                            break
+
+                        audio_queue, llm_stream_chunk, tts_span = segment
+                        if audio_queue is None:
+                            yield None, llm_stream_chunk
+                            if llm_stream_chunk.tool_call and self.filler_on_tool_call and self.filler_audios and not filler_after_audio:
+                                # Fill the silence while executing tools
+                                yield next_filler(), filler_chunk
+                            continue
+
+                        delivered = False
+                        audio_parts = []
+                        waiting_audio_queue = audio_queue
+                        while (audio_chunk := await get_or_filler(audio_queue)) is not None:
+                            if audio_chunk is filler_chunk:
+                                yield next_filler(), filler_chunk
+                                continue
+                            if isinstance(audio_chunk, Exception):
+                                raise audio_chunk
+                            filler_deadline = None
+                            filler_after_audio = False
+
+                            # TTS performance
+                            if performance.tts_first_chunk_time == 0:
+                                performance.tts_first_chunk_time = time() - start_time
+                            performance.tts_time = time() - start_time
+                            if not delivered and tts_span.end_ns:
+                                # Gap between the end of synthesis and its delivery (e.g. waiting for the previous segments)
+                                tts_span.set_attribute("emit_wait", (perf_counter_ns() - tts_span.end_ns) / 1e9)
+
+                            # Text is sent with the first audio chunk of the segment
+                            yield audio_chunk, llm_stream_chunk if not delivered else LLMResponse(
+                                context_id=llm_stream_chunk.context_id, text="", voice_text=""
+                            )
+                            delivered = True
+                            audio_parts.append(audio_chunk)
+                        waiting_audio_queue = None
+
+                        if audio_parts and self.voice_recorder_enabled:
+                            # Record each segment as soon as it is delivered instead of keeping them until the end
+                            if not self.record_response_voice(transaction_id, response_audio_index, audio_parts):
+                                performance.voice_recordings_dropped += 1
+                            response_audio_index += 1
+
+                        if is_cancelled():
+                            continue
+                        if not delivered:
+                            yield None, llm_stream_chunk
+                        segment_counts["delivered"] += 1
+                        lookahead_slots.release()
+
+                finally:
+                    # Cancel all stages including syntheses that are no longer needed
+                    for t in stage_tasks:
+                        t.cancel()
+                    await asyncio.gather(*stage_tasks, return_exceptions=True)
+                    for tc in tool_calls:
+                        if tc.start_ns:
+                            tool_span = self.tracer.start_span("tool_call", invoke_span, start_ns=tc.start_ns, name=tc.name, is_cached=tc.is_cached)
+                            self.tracer.end_span(tool_span, end_ns=tc.end_ns)
+                    if is_cancelled():
+                        # Work discarded or not started due to the cancellation
+                        performance.cancelled_llm_chunks = segment_counts["llm_chunks"] - segment_counts["delivered"]
+                        performance.cancelled_tts_segments = segment_counts["queued"] - segment_counts["delivered"]
+                        if segment_counts["synthesized"]:
+                            performance.cancelled_tts_time = performance.cancelled_tts_segments \
+                                * segment_counts["synthesis_time"] / segment_counts["synthesized"]
+                    performance.stage_stats = json.dumps({
+                        "llm": llm_queue.get_stats(), "tts": tts_queue.get_stats(), "emit": emit_queue.get_stats()
+                    })
 
             response_text = ""
-            response_audios = []
             is_first_chunk = True
-            async for audio_chunk, llm_stream_chunk in synthesize_stream():
+            synthesized_stream = synthesize_stream()
+            async for audio_chunk, llm_stream_chunk in synthesized_stream:
                 if not self.is_transaction_active(request.session_id, transaction_id):
                     # Break when new transaction started in this session
                     if self.debug:
@@ -330,9 +675,8 @@ class LiteSTS:
                     )
                     continue
 
+                is_filler = llm_stream_chunk is filler_chunk
                 response_text += llm_stream_chunk.text
-                if audio_chunk:
-                    response_audios.append(audio_chunk)
 
                 yield STSResponse(
                     type="chunk",
@@ -342,11 +686,24 @@ class LiteSTS:
                     text=llm_stream_chunk.text,
                     voice_text=llm_stream_chunk.voice_text,
                     audio_data=audio_chunk,
-                    metadata={"is_first_chunk": is_first_chunk}
+                    metadata=chunk_metadata(is_first_chunk and not is_filler, is_filler)
                 )
-                is_first_chunk = False
+                if not is_filler:
+                    # Filler is not the first chunk of the response
+                    is_first_chunk = False
+
+            await synthesized_stream.aclose()
 
             performance.response_text = response_text
+            performance.tool_calls = len(tool_calls)
+            performance.tool_cache_hits = sum(1 for tc in tool_calls if tc.is_cached)
+            performance.tts_cache_hits = tts_metrics.cache_hits
+            performance.tts_cache_misses = tts_metrics.cache_misses
+            performance.tts_coalesced = tts_metrics.coalesced
+            if endpoint_latencies := tts_metrics.get_endpoint_latencies():
+                performance.tts_endpoint_latencies = json.dumps(endpoint_latencies)
+            performance.queue_wait_time = wait_times["transaction"] + wait_times["stt"] + wait_times["llm"]
+            performance.tts_queue_wait_time = wait_times["tts"]
             performance.total_time = time() - start_time
             self.performance_recorder.record(performance)
 
@@ -359,10 +716,6 @@ class LiteSTS:
                 voice_text=performance.response_voice_text
             )
 
-            if self.voice_recorder_enabled:
-                await self.voice_recorder.record(ResponseVoices(
-                    transaction_id, response_audios, self.voice_recorder_response_audio_format
-                ))
             await self._on_finish(request, final_response)
             yield final_response
         
@@ -378,9 +731,62 @@ class LiteSTS:
                 metadata={"error": f"Error at invoke: {iex}\n\n{tb}" if self.debug else "Error at invoke."}
             )
 
+        finally:
+            # Stop stages when the consumer stops iterating early (e.g. client disconnected)
+            await stage_group.close()
+            if synthesized_stream:
+                await synthesized_stream.aclose()
+            self.tracer.end_span(invoke_span, context_id=request.context_id)
+            # Release admission slots
+            await admission_stack.aclose()
+            # Histories prefetched but not used (e.g. no speech recognized)
+            self.llm.discard_prefetched_histories(prefetched_context_id)
+            if self.stage_groups.get(request.session_id) is stage_group:
+                del self.stage_groups[request.session_id]
+
     async def finalize(self, context_id: str):
         await self.vad.finalize_session(context_id)
 
+    async def keepalive_worker(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            results = await asyncio.gather(self.stt.ping(), self.tts.ping(), return_exceptions=True)
+            for r in results:
+                if isinstance(r, Exception):
+                    logger.warning(f"Error at keepalive: {r}")
+
+    async def prepare_fillers(self):
+        async def synthesize_filler(text: str) -> bytes:
+            if self.output_audio_format:
+                transcoder = AudioTranscoder(self.output_audio_format)
+                return b"".join([transcoder.transcode(c) async for c in self.tts.synthesize_audio(text)])
+            return await self.tts.synthesize(text)
+
+        results = await asyncio.gather(*[synthesize_filler(p) for p in self.filler_phrases], return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning(f"Error at preparing filler: {r}")
+        self.filler_audios = [r for r in results if r and not isinstance(r, Exception)]
+
+    async def startup(self, keepalive_interval: float = None):
+        # Warm up components so that the first response is as fast as the successive ones
+        start_time = time()
+        results = await asyncio.gather(
+            self.stt.warmup(), self.llm.warmup(), self.tts.warmup(), self.prepare_fillers(), return_exceptions=True
+        )
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning(f"Error at startup: {r}")
+        logger.info(f"Components warmed up in {time() - start_time:.3f}s")
+
+        # Keep idle connections alive with periodic probes
+        if keepalive_interval and not self.keepalive_task:
+            self.keepalive_task = asyncio.create_task(self.keepalive_worker(keepalive_interval))
+
     async def shutdown(self):
+        if self.keepalive_task:
+            self.keepalive_task.cancel()
+            self.keepalive_task = None
         self.performance_recorder.close()
+        self.tracer.close()
         await self.voice_recorder.stop()
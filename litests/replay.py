@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import random
+from time import perf_counter
+from typing import Dict, List, Optional
+from uuid import uuid4
+import numpy
+from .models import STSRequest
+from .performance_recorder import PerformanceRecorder, PerformanceRecord
+from .pipeline import LiteSTS
+from .tts.audio import AudioChunk
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayRequest:
+    name: str
+    text: str = None
+    audio_data: bytes = None    # Linear PCM
+    audio_duration: float = 0
+
+
+@dataclass
+class ReplayResult:
+    name: str
+    ttfa: Optional[float] = None    # Time to first audio (filler is not counted)
+    total_time: float = 0
+    error: str = None
+    record: PerformanceRecord = None
+
+
+@dataclass
+class ReplayReport:
+    results: List[ReplayResult]
+    elapsed: float
+    stages: List[str] = field(default_factory=lambda: [
+        "stt_time", "stop_response_time", "queue_wait_time", "llm_first_chunk_time",
+        "llm_first_voice_chunk_time", "tts_first_chunk_time", "total_time"
+    ])
+
+    @staticmethod
+    def summarize(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {}
+        p50, p90, p95, p99 = numpy.percentile(values, [50, 90, 95, 99]).tolist()
+        return {"mean": float(numpy.mean(values)), "p50": p50, "p90": p90, "p95": p95, "p99": p99, "max": max(values)}
+
+    def to_dict(self) -> dict:
+        succeeded = [r for r in self.results if not r.error]
+        records = [r.record for r in succeeded if r.record]
+        return {
+            "requests": len(self.results),
+            "errors": len(self.results) - len(succeeded),
+            "elapsed": self.elapsed,
+            "throughput": len(succeeded) / self.elapsed if self.elapsed else 0,
+            "ttfa": self.summarize([r.ttfa for r in succeeded if r.ttfa is not None]),
+            "stages": {s: self.summarize([getattr(r, s) for r in records]) for s in self.stages}
+        }
+
+    def format(self) -> str:
+        d = self.to_dict()
+        lines = [
+            f"Requests: {d['requests']} (errors: {d['errors']})",
+            f"Elapsed: {d['elapsed']:.3f}s / Throughput: {d['throughput']:.2f} req/s",
+            "",
+            f"{'':<28}{'mean':>8}{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}",
+        ]
+        for name, summary in [("ttfa", d["ttfa"])] + list(d["stages"].items()):
+            if summary:
+                lines.append(f"{name:<28}" + "".join(f"{summary[k]:>8.3f}" for k in ["mean", "p50", "p90", "p95", "p99", "max"]))
+        return "\n".join(lines)
+
+
+class CapturingPerformanceRecorder(PerformanceRecorder):
+    # Keep records by user_id to match them to the replayed requests, and pass them to the original recorder
+    def __init__(self, recorder: PerformanceRecorder = None):
+        self.recorder = recorder
+        self.records: Dict[str, PerformanceRecord] = {}
+
+    def record(self, record: PerformanceRecord):
+        self.records[record.user_id] = record
+        if self.recorder:
+            self.recorder.record(record)
+
+    def close(self):
+        if self.recorder:
+            self.recorder.close()
+
+
+def load_requests(path: str) -> List[ReplayRequest]:
+    # Directory of request voices recorded by FileVoiceRecorder, or transcript file (a request in each line)
+    p = Path(path)
+    if p.is_dir():
+        requests = []
+        for wav_path in sorted(p.glob("*_request.wav")):
+            chunk = AudioChunk.from_wav(wav_path.read_bytes())
+            requests.append(ReplayRequest(
+                name=wav_path.stem,
+                audio_data=chunk.data,
+                audio_duration=len(chunk.data) / (chunk.sample_rate * chunk.channels * chunk.sample_width)
+            ))
+        return requests
+
+    with open(p, encoding="utf-8") as f:
+        return [ReplayRequest(name=f"line_{i + 1}", text=line.strip()) for i, line in enumerate(f) if line.strip()]
+
+
+class Replayer:
+    def __init__(
+        self,
+        sts: LiteSTS,
+        *,
+        concurrency: int = 1,
+        rate: float = None,             # Requests per second (None to send as fast as possible)
+        pattern: str = "constant",      # Arrival pattern at the rate: constant or poisson
+        seed: int = None
+    ):
+        self.sts = sts
+        self.concurrency = concurrency
+        self.rate = rate
+        self.pattern = pattern
+        self.random = random.Random(seed)
+
+    def next_interval(self) -> float:
+        if not self.rate:
+            return 0
+        if self.pattern == "poisson":
+            return self.random.expovariate(self.rate)
+        return 1 / self.rate
+
+    async def replay(self, request: ReplayRequest, recorder: CapturingPerformanceRecorder) -> ReplayResult:
+        # Each request has its own session and user not to cancel or limit others
+        user_id = f"replay_{uuid4()}"
+        result = ReplayResult(name=request.name)
+        start_time = perf_counter()
+        try:
+            async for response in self.sts.invoke(STSRequest(
+                session_id=user_id,
+                user_id=user_id,
+                text=request.text,
+                audio_data=request.audio_data,
+                audio_duration=request.audio_duration
+            )):
+                if response.type == "chunk" and response.audio_data and result.ttfa is None \
+                        and not (response.metadata or {}).get("is_filler"):
+                    result.ttfa = perf_counter() - start_time
+                elif response.type == "final" and (response.metadata or {}).get("error"):
+                    result.error = response.metadata["error"]
+        except Exception as ex:
+            result.error = str(ex)
+        result.total_time = perf_counter() - start_time
+        result.record = recorder.records.pop(user_id, None)
+        return result
+
+    async def run(self, requests: List[ReplayRequest]) -> ReplayReport:
+        recorder = CapturingPerformanceRecorder(self.sts.performance_recorder)
+        self.sts.performance_recorder = recorder
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def replay_with_limit(request: ReplayRequest) -> ReplayResult:
+            async with semaphore:
+                return await self.replay(request, recorder)
+
+        start_time = perf_counter()
+        try:
+            tasks = []
+            for i, request in enumerate(requests):
+                if i > 0:
+                    await asyncio.sleep(self.next_interval())
+                tasks.append(asyncio.create_task(replay_with_limit(request)))
+            results = await asyncio.gather(*tasks)
+        finally:
+            self.sts.performance_recorder = recorder.recorder
+
+        return ReplayReport(results=results, elapsed=perf_counter() - start_time)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded requests through LiteSTS and report latencies.")
+    parser.add_argument("path", help="Directory of request voices recorded by FileVoiceRecorder, or transcript file")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second (as fast as possible by default)")
+    parser.add_argument("--pattern", choices=["constant", "poisson"], default="constant")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--llm-base-url", default=None, help="OpenAI compatible API (e.g. local fake server)")
+    parser.add_argument("--llm-model", default="gpt-4o-mini")
+    parser.add_argument("--voicevox-url", default="http://127.0.0.1:50021")
+    parser.add_argument("--json", action="store_true", help="Output report in JSON")
+    args = parser.parse_args()
+
+    sts = LiteSTS(
+        stt_google_api_key=os.getenv("GOOGLE_API_KEY"),
+        stt_sample_rate=args.sample_rate,
+        llm_openai_api_key=os.getenv("OPENAI_API_KEY"),
+        llm_base_url=args.llm_base_url,
+        llm_model=args.llm_model,
+        tts_voicevox_url=args.voicevox_url,
+        voice_recorder_enabled=False
+    )
+    await sts.startup()
+
+    requests = load_requests(args.path) * args.repeat
+    report = await Replayer(sts, concurrency=args.concurrency, rate=args.rate, pattern=args.pattern, seed=args.seed).run(requests)
+    await sts.shutdown()
+
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+import asyncio
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Dict, List, Set
+
+
+class StageQueue:
+    # Bounded queue between pipeline stages that measures depth and wait time
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.max_depth = 0
+        self.wait_time = 0.0
+        self.count = 0
+
+    async def put(self, item: Any):
+        await self.queue.put((perf_counter(), item))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def put_nowait(self, item: Any):
+        self.queue.put_nowait((perf_counter(), item))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def get(self) -> Any:
+        put_at, item = await self.queue.get()
+        self.wait_time += perf_counter() - put_at
+        self.count += 1
+        return item
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    def get_stats(self) -> Dict[str, float]:
+        return {"max_depth": self.max_depth, "wait_time": round(self.wait_time, 6), "count": self.count}
+
+
+class StageGroup:
+    # Tasks of a transaction that are cancelled at once (e.g. barge-in by the next request)
+    def __init__(self):
+        self.tasks: Set[asyncio.Task] = set()
+        self.cancel_callbacks: List[Callable[[], None]] = []
+        self.cancelled = False
+
+    def create_task(self, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        if self.cancelled:
+            task.cancel()
+        return task
+
+    def add_cancel_callback(self, callback: Callable[[], None]):
+        if self.cancelled:
+            callback()
+        else:
+            self.cancel_callbacks.append(callback)
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        for task in self.tasks:
+            task.cancel()
+        for callback in self.cancel_callbacks:
+            callback()
+
+    async def close(self):
+        # Cancel and wait for the tasks to stop (e.g. to run their finally blocks before the transaction ends)
+        self.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -38,6 +38,13 @@ class AzureSpeechRecognizer(SpeechRecognizer):
         if self.use_classic and self.alternative_languages:
             logger.warning("Auto language detection is not available in Azure STT v1. Set `use_classic=False` to enable this feature.")
 
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        if self.use_classic:
+            await self.http_client.head(f"https://{self.azure_region}.stt.speech.microsoft.com/")
+        else:
+            await self.http_client.head(f"https://{self.azure_region}.api.cognitive.microsoft.com/")
+
     async def transcribe(self, data: bytes) -> str:
         if self.use_classic:
             return await self.transcribe_classic(data)
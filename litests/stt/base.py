@@ -34,6 +34,17 @@ class SpeechRecognizer(ABC):
     async def transcribe(self, data: bytes) -> str:
         pass
 
+    async def ping(self):
+        # Override to send light request that keeps pooled connection alive
+        pass
+
+    async def warmup(self):
+        # Open connection in advance (DNS, TCP and TLS)
+        try:
+            await self.ping()
+        except Exception as ex:
+            logger.warning(f"Error at warmup: {ex}")
+
     async def close(self):
         await self.http_client.aclose()
 
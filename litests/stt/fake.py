@@ -0,0 +1,25 @@
+import asyncio
+from typing import Callable, Union
+from . import SpeechRecognizer
+from ..latency import LatencyDistribution, to_latency_distribution
+
+
+class FakeSpeechRecognizer(SpeechRecognizer):
+    # Speech recognizer for tests and benchmarks without network access
+    def __init__(
+        self,
+        *,
+        text: Union[str, Callable[[bytes], str]] = "Hello",
+        latency: Union[float, LatencyDistribution] = 0.0,
+        debug: bool = False
+    ):
+        super().__init__(debug=debug)
+        self.text = text
+        self.latency = to_latency_distribution(latency)
+        self.transcribe_count = 0
+
+    async def transcribe(self, data: bytes) -> str:
+        self.transcribe_count += 1
+        if latency := self.latency.sample():
+            await asyncio.sleep(latency)
+        return self.text(data) if callable(self.text) else self.text
@@ -30,6 +30,10 @@ class GoogleSpeechRecognizer(SpeechRecognizer):
         self.google_api_key = google_api_key
         self.sample_rate = sample_rate
 
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        await self.http_client.head("https://speech.googleapis.com/")
+
     async def transcribe(self, data: bytes) -> str:
         request_body = {
             "config": {
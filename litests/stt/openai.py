@@ -41,6 +41,10 @@ class OpenAISpeechRecognizer(SpeechRecognizer):
         buffer.seek(0)
         return buffer
 
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        await self.http_client.head("https://api.openai.com/v1/models")
+
     async def transcribe(self, data: bytes) -> str:
         headers = {
             "Authorization": f"Bearer {self.openai_api_key}"
@@ -0,0 +1 @@
+from .base import Span, SpanExporter, Tracer, InMemorySpanExporter
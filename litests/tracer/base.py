@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+import os
+from time import perf_counter_ns, time_ns
+from typing import Any, Dict, Iterator, List
+
+# Anchor to convert monotonic time to wall clock time for exporters
+EPOCH_NS = time_ns() - perf_counter_ns()
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str = None
+    start_ns: int = 0   # perf_counter_ns (monotonic)
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def start_unix_ns(self) -> int:
+        return EPOCH_NS + self.start_ns
+
+    @property
+    def end_unix_ns(self) -> int:
+        return EPOCH_NS + self.end_ns
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]):
+        self.spans.extend(spans)
+
+    def get_spans(self, name: str = None) -> List[Span]:
+        return [s for s in self.spans if name is None or s.name == name]
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter = None):
+        self.exporter = exporter
+        # Spans are exported by trace when its root span ends
+        self.traces: Dict[str, List[Span]] = {}
+
+    def start_span(self, name: str, parent: Span = None, start_ns: int = None, **attributes) -> Span:
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent.span_id if parent else None,
+            start_ns=start_ns or perf_counter_ns(),
+            attributes=attributes
+        )
+        self.traces.setdefault(span.trace_id, []).append(span)
+        return span
+
+    def end_span(self, span: Span, end_ns: int = None, **attributes):
+        span.end_ns = end_ns or perf_counter_ns()
+        span.attributes.update(attributes)
+        if span.parent_span_id is None:
+            spans = self.traces.pop(span.trace_id, [])
+            for s in spans:
+                if not s.end_ns:
+                    # Child not ended by itself (e.g. sentence cancelled before synthesis) ends with the root
+                    s.end_ns = span.end_ns
+                    s.attributes["unfinished"] = True
+            if self.exporter:
+                # Export copies so that exporters serializing them later (e.g. in a thread) are not affected by updates
+                self.exporter.export([replace(s, attributes=dict(s.attributes)) for s in spans])
+
+    @contextmanager
+    def span(self, name: str, parent: Span = None, **attributes) -> Iterator[Span]:
+        span = self.start_span(name, parent, **attributes)
+        try:
+            yield span
+        except BaseException as ex:
+            span.set_attribute("error", repr(ex))
+            raise
+        finally:
+            self.end_span(span)
+
+    def close(self):
+        if self.exporter:
+            self.exporter.close()
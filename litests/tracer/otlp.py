@@ -0,0 +1,88 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, List
+import httpx
+from . import Span, SpanExporter
+
+logger = logging.getLogger(__name__)
+
+
+class OTLPSpanExporter(SpanExporter):
+    def __init__(
+        self,
+        *,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "litests",
+        headers: Dict[str, str] = None,
+        timeout: float = 10.0
+    ):
+        # Spans are sent in OTLP/HTTP JSON encoding in the background
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.span_queue = queue.Queue()
+        self.stop_event = threading.Event()
+
+        self.worker_thread = threading.Thread(target=self.start_worker, daemon=True)
+        self.worker_thread.start()
+
+    def to_attributes(self, attributes: Dict[str, Any]) -> List[dict]:
+        otlp_attributes = []
+        for k, v in attributes.items():
+            if isinstance(v, bool):
+                value = {"boolValue": v}
+            elif isinstance(v, int):
+                value = {"intValue": str(v)}
+            elif isinstance(v, float):
+                value = {"doubleValue": v}
+            else:
+                value = {"stringValue": str(v)}
+            otlp_attributes.append({"key": k, "value": value})
+        return otlp_attributes
+
+    def to_otlp(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": self.to_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "litests"},
+                    "spans": [{
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_span_id or "",
+                        "name": s.name,
+                        "kind": 1,  # INTERNAL
+                        "startTimeUnixNano": str(s.start_unix_ns),
+                        "endTimeUnixNano": str(s.end_unix_ns),
+                        "attributes": self.to_attributes(s.attributes),
+                        "status": {"code": 2 if "error" in s.attributes else 0}
+                    } for s in spans]
+                }]
+            }]
+        }
+
+    def start_worker(self):
+        with httpx.Client(timeout=self.timeout) as client:
+            while not self.stop_event.is_set() or not self.span_queue.empty():
+                try:
+                    spans = self.span_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                try:
+                    resp = client.post(self.endpoint, json=self.to_otlp(spans), headers=self.headers)
+                    resp.raise_for_status()
+                except Exception as ex:
+                    logger.error(f"Error at exporting spans: {ex}")
+                finally:
+                    self.span_queue.task_done()
+
+    def export(self, spans: List[Span]):
+        self.span_queue.put(spans)
+
+    def close(self):
+        self.stop_event.set()
+        self.span_queue.join()
+        self.worker_thread.join()
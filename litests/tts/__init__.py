@@ -1 +1 @@
-from .base import SpeechSynthesizer, SpeechSynthesizerDummy
+from .base import SpeechSynthesizer, SpeechSynthesizerDummy, SynthesisMetrics, synthesis_metrics
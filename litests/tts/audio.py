@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+import io
+import struct
+from typing import Optional
+import wave
+import numpy
+
+
+@dataclass
+class AudioFormat:
+    encoding: str = "wav"       # wav, pcm or mulaw
+    sample_rate: int = None     # None to keep the sample rate of source
+    channels: int = None        # None to keep the channels of source
+
+
+@dataclass
+class AudioChunk:
+    data: bytes                 # Linear PCM
+    sample_rate: int = 24000
+    channels: int = 1
+    sample_width: int = 2
+
+    @classmethod
+    def from_wav(cls, wav_bytes: bytes) -> "AudioChunk":
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wf:
+            return cls(
+                data=wf.readframes(wf.getnframes()),
+                sample_rate=wf.getframerate(),
+                channels=wf.getnchannels(),
+                sample_width=wf.getsampwidth()
+            )
+
+    def to_wav(self) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(self.sample_width)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(self.data)
+        return buffer.getvalue()
+
+
+class AudioChunkDecoder:
+    # Parse WAV header once and make PCM chunks from the rest of (streamed) audio
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, sample_width: int = 2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.header_parsed = False
+        self.buffer = b""
+
+    def parse_header(self) -> bool:
+        if not self.buffer.startswith(b"RIFF"):
+            if len(self.buffer) < 4 and b"RIFF".startswith(self.buffer):
+                return False    # Wait for more data
+            return True         # Headerless PCM
+
+        # Walk through RIFF chunks until data chunk
+        position = 12
+        while len(self.buffer) >= position + 8:
+            chunk_id, chunk_size = struct.unpack("<4sI", self.buffer[position:position + 8])
+            if chunk_id == b"data":
+                self.buffer = self.buffer[position + 8:]
+                return True
+            if chunk_id == b"fmt ":
+                if len(self.buffer) < position + 24:
+                    return False
+                _, self.channels, self.sample_rate, _, _, bits_per_sample = struct.unpack(
+                    "<HHIIHH", self.buffer[position + 8:position + 24]
+                )
+                self.sample_width = bits_per_sample // 8
+            position += 8 + chunk_size + (chunk_size % 2)
+        return False
+
+    def feed(self, audio: bytes) -> Optional[AudioChunk]:
+        self.buffer += audio
+        if not self.header_parsed:
+            if not self.parse_header():
+                return None
+            self.header_parsed = True
+
+        # Carry over incomplete frame to the next chunk
+        frame_size = self.channels * self.sample_width
+        size = len(self.buffer) - len(self.buffer) % frame_size
+        if size == 0:
+            return None
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return AudioChunk(data, self.sample_rate, self.channels, self.sample_width)
+
+
+def encode_mulaw(samples: numpy.ndarray) -> numpy.ndarray:
+    # G.711 mu-law
+    bias = 0x84
+    sign = (samples < 0)
+    magnitude = numpy.minimum(numpy.abs(samples.astype(numpy.int32)), 32635) + bias
+    exponent = numpy.floor(numpy.log2(magnitude)).astype(numpy.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    encoded = ~((sign.astype(numpy.int32) << 7) | (exponent << 4) | mantissa)
+    return (encoded & 0xFF).astype(numpy.uint8)
+
+
+def to_samples(data: bytes, sample_width: int) -> numpy.ndarray:
+    # Float samples in the range of 16bit PCM
+    if sample_width == 1:
+        return (numpy.frombuffer(data, dtype=numpy.uint8).astype(numpy.float32) - 128) * 256
+    elif sample_width == 3:
+        # No numpy dtype for 24bit: assemble little endian bytes and extend sign
+        b = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int32)
+        samples = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        return ((samples ^ 0x800000) - 0x800000).astype(numpy.float32) / 256
+    return numpy.frombuffer(data, dtype=f"<i{sample_width}").astype(numpy.float32) / (1 << (8 * (sample_width - 2)))
+
+
+class AudioTranscoder:
+    # Convert PCM chunks of a stream into the output format. Resampling position and the last frame
+    # are carried over to the next chunk not to make discontinuities at the boundaries of chunks
+    def __init__(self, audio_format: AudioFormat):
+        self.audio_format = audio_format
+        self.position = 0.0         # Position of the next output frame from the carried frame (or the first frame)
+        self.last_frame = None
+
+    def resample(self, samples: numpy.ndarray, source_rate: int, sample_rate: int) -> numpy.ndarray:
+        if self.last_frame is not None:
+            samples = numpy.concatenate([self.last_frame, samples])
+        if len(samples) == 0:
+            return samples
+
+        step = source_rate / sample_rate
+        last_index = len(samples) - 1
+        frames = int((last_index - self.position) // step) + 1 if self.position <= last_index else 0
+        positions = self.position + step * numpy.arange(frames)
+        resampled = numpy.stack(
+            [numpy.interp(positions, numpy.arange(len(samples)), samples[:, c]) for c in range(samples.shape[1])], axis=1
+        )
+
+        self.position = self.position + step * frames - last_index
+        self.last_frame = samples[-1:]
+        return resampled
+
+    def transcode(self, chunk: AudioChunk) -> bytes:
+        sample_rate = self.audio_format.sample_rate or chunk.sample_rate
+        channels = self.audio_format.channels or chunk.channels
+
+        if chunk.sample_width == 2 and sample_rate == chunk.sample_rate and channels == chunk.channels:
+            pcm = chunk
+        else:
+            # Convert to float samples with shape (frames, channels) in one pass
+            samples = to_samples(chunk.data, chunk.sample_width).reshape(-1, chunk.channels)
+
+            if channels != chunk.channels:
+                samples = numpy.repeat(samples.mean(axis=1, keepdims=True), channels, axis=1)
+
+            if sample_rate != chunk.sample_rate:
+                samples = self.resample(samples, chunk.sample_rate, sample_rate)
+
+            pcm = AudioChunk(
+                data=numpy.clip(samples, -32768, 32767).astype("<i2").tobytes(),
+                sample_rate=sample_rate,
+                channels=channels,
+                sample_width=2
+            )
+
+        if self.audio_format.encoding == "mulaw":
+            return encode_mulaw(numpy.frombuffer(pcm.data, dtype="<i2")).tobytes()
+        elif self.audio_format.encoding == "wav":
+            return pcm.to_wav()
+        else:
+            return pcm.data
+
+
+def transcode(chunk: AudioChunk, audio_format: AudioFormat) -> bytes:
+    # Transcode a whole audio. Use AudioTranscoder for the chunks of a stream
+    return AudioTranscoder(audio_format).transcode(chunk)
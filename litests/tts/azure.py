@@ -1,6 +1,8 @@
 import logging
-from typing import Dict
+import re
+from typing import AsyncGenerator, Dict
 from . import SpeechSynthesizer
+from .audio import AudioChunkDecoder
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +36,17 @@ class AzureSpeechSynthesizer(SpeechSynthesizer):
         self.audio_format = audio_format
         self.voice_map = {self.default_language: self.speaker}
 
-    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
-        if not text or not text.strip():
-            return bytes()
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        # e.g. raw-16khz-16bit-mono-pcm (riff-* formats have header)
+        if match := re.match(r"\w+-(\d+)khz-(\d+)bit-mono-pcm", self.audio_format):
+            return AudioChunkDecoder(sample_rate=int(match.group(1)) * 1000, channels=1, sample_width=int(match.group(2)) // 8)
+        return AudioChunkDecoder()
 
-        logger.info(f"Speech synthesize: {text}")
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        await self.http_client.head(f"https://{self.azure_region}.tts.speech.microsoft.com/")
 
+    def make_request_params(self, text: str, style_info: dict = None, language: str = None) -> dict:
         headers = {
             "X-Microsoft-OutputFormat": self.audio_format,
             "Content-Type": "application/ssml+xml",
@@ -50,12 +57,31 @@ class AzureSpeechSynthesizer(SpeechSynthesizer):
         ssml_text = f"<speak version='1.0' xml:lang='{language or self.default_language}'><voice xml:lang='{language or self.default_language}' name='{speaker}'>{text}</voice></speak>"
         data = ssml_text.encode("utf-8")
 
-        # Synthesize
         # https://learn.microsoft.com/ja-jp/azure/ai-services/speech-service/language-support?tabs=tts
-        resp = await self.http_client.post(
-            url=f"https://{self.azure_region}.tts.speech.microsoft.com/cognitiveservices/v1",
-            headers=headers,
-            data=data
-        )
+        return {
+            "url": f"https://{self.azure_region}.tts.speech.microsoft.com/cognitiveservices/v1",
+            "headers": headers,
+            "data": data
+        }
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        logger.info(f"Speech synthesize: {text}")
+
+        # Synthesize
+        resp = await self.http_client.post(**self.make_request_params(text, style_info, language))
 
         return resp.content
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        if not text or not text.strip():
+            return
+
+        logger.info(f"Speech synthesize (stream): {text}")
+
+        # Synthesize and yield audio as it arrives
+        async with self.http_client.stream("POST", **self.make_request_params(text, style_info, language)) as resp:
+            async for chunk in resp.aiter_bytes():
+                yield chunk
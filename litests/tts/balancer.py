@@ -0,0 +1,126 @@
+from contextlib import asynccontextmanager
+import logging
+from time import perf_counter, time
+from typing import AsyncIterator, List
+import httpx
+from .base import synthesis_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.latency = 0.0          # EWMA of latency per unit of cost (e.g. character). 0 until the first response
+        self.ejected_until = 0.0
+        self.request_count = 0
+        self.error_count = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class EndpointBalancer:
+    def __init__(
+        self,
+        urls: List[str],
+        *,
+        strategy: str = "latency",  # latency or least_outstanding
+        latency_decay: float = 0.3,
+        eject_ratio: float = 3.0,
+        eject_duration: float = 30.0,
+        health_check_path: str = None
+    ):
+        self.endpoints = [Endpoint(u.rstrip("/")) for u in urls]
+        self.strategy = strategy
+        self.latency_decay = latency_decay
+        self.eject_ratio = eject_ratio
+        self.eject_duration = eject_duration
+        self.health_check_path = health_check_path
+
+    def select(self) -> Endpoint:
+        now = time()
+        candidates = [e for e in self.endpoints if e.is_available(now)] or self.endpoints
+
+        if self.strategy == "least_outstanding":
+            return min(candidates, key=lambda e: e.outstanding)
+
+        # Expected wait = (outstanding requests + this one) * latency. Endpoints not measured yet (or readmitted)
+        # are estimated with the latency of the fastest one and preferred on a tie so that they are tried but not flooded
+        measured = [e.latency for e in candidates if e.latency > 0]
+        if not measured:
+            return min(candidates, key=lambda e: e.outstanding)
+        fastest = min(measured)
+        return min(candidates, key=lambda e: ((e.outstanding + 1) * (e.latency or fastest), e.latency > 0))
+
+    def eject(self, endpoint: Endpoint, reason: str):
+        if len(self.endpoints) > 1:
+            endpoint.ejected_until = time() + self.eject_duration
+            logger.warning(f"Endpoint ejected ({reason}): {endpoint.url}")
+
+    def record_latency(self, endpoint: Endpoint, latency: float, cost: float = 1):
+        # Normalize by cost not to regard the endpoint that processed long text as slow
+        latency = latency / max(cost, 1)
+        if endpoint.latency == 0:
+            endpoint.latency = latency
+        else:
+            endpoint.latency = (1 - self.latency_decay) * endpoint.latency + self.latency_decay * latency
+
+        # Eject slow endpoint compared to the fastest available one
+        now = time()
+        others = [e.latency for e in self.endpoints if e is not endpoint and e.latency > 0 and e.is_available(now)]
+        if others and endpoint.latency > min(others) * self.eject_ratio:
+            self.eject(endpoint, f"slow: {endpoint.latency:.3f}s")
+            endpoint.latency = 0.0  # Measure again after ejection
+
+    @asynccontextmanager
+    async def use(self, cost: float = 1) -> AsyncIterator[str]:
+        endpoint = self.select()
+        endpoint.outstanding += 1
+        endpoint.request_count += 1
+        start_time = perf_counter()
+        try:
+            yield endpoint.url
+        except httpx.TransportError:
+            endpoint.error_count += 1
+            self.eject(endpoint, "error")
+            raise
+        except httpx.HTTPStatusError as hsex:
+            # Server error is not regarded as a response (client error is caused by the request)
+            if hsex.response.status_code >= 500:
+                endpoint.error_count += 1
+                self.eject(endpoint, f"status {hsex.response.status_code}")
+            raise
+        else:
+            latency = perf_counter() - start_time
+            self.record_latency(endpoint, latency, cost)
+            if metrics := synthesis_metrics.get():
+                metrics.record_endpoint(endpoint.url, latency)
+        finally:
+            endpoint.outstanding -= 1
+
+    async def request(self, http_client: httpx.AsyncClient, method: str, path: str = "", *, cost: float = 1, **kwargs) -> httpx.Response:
+        # Retry on other endpoints when connection failed or server error returned
+        for i in range(len(self.endpoints)):
+            try:
+                async with self.use(cost) as url:
+                    response = await http_client.request(method, url + path, **kwargs)
+                    if response.status_code >= 500:
+                        response.raise_for_status()
+                    return response
+            except (httpx.TransportError, httpx.HTTPStatusError):
+                if i == len(self.endpoints) - 1:
+                    raise
+
+    async def health_check(self, http_client: httpx.AsyncClient):
+        if not self.health_check_path:
+            return
+
+        # Ejected endpoints are readmitted after eject_duration
+        for endpoint in self.endpoints:
+            try:
+                resp = await http_client.get(endpoint.url + self.health_check_path)
+                resp.raise_for_status()
+            except httpx.HTTPError:
+                self.eject(endpoint, "health check")
@@ -1,11 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Dict
+import hashlib
 import httpx
+import json
 import logging
+import re
+from .audio import AudioChunk, AudioChunkDecoder
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class SynthesisMetrics:
+    cache_hits: int = 0
+    cache_misses: int = 0
+    coalesced: int = 0
+    endpoint_times: Dict[str, float] = field(default_factory=dict)
+    endpoint_counts: Dict[str, int] = field(default_factory=dict)
+
+    def record_endpoint(self, url: str, latency: float):
+        self.endpoint_times[url] = self.endpoint_times.get(url, 0.0) + latency
+        self.endpoint_counts[url] = self.endpoint_counts.get(url, 0) + 1
+
+    def get_endpoint_latencies(self) -> Dict[str, float]:
+        # Average latency of each endpoint
+        return {url: t / self.endpoint_counts[url] for url, t in self.endpoint_times.items()}
+
+
+# Metrics of the synthesis in the current task (e.g. a TTS worker of the pipeline). None when not measured
+synthesis_metrics: ContextVar[SynthesisMetrics] = ContextVar("synthesis_metrics", default=None)
+
+
 class SpeechSynthesizer(ABC):
     def __init__(
         self,
@@ -27,20 +54,82 @@ class SpeechSynthesizer(ABC):
         self.style_mapper = style_mapper or {}
         self.debug = debug
 
+    @property
+    def style_mapper(self) -> Dict[str, str]:
+        return self._style_mapper
+
+    @style_mapper.setter
+    def style_mapper(self, style_mapper: Dict[str, str]):
+        # Compile keywords into one pattern not to scan text for each keyword
+        self._style_mapper = style_mapper or {}
+        self.style_priorities = {k: i for i, k in enumerate(self._style_mapper)}
+        self.style_pattern = re.compile(
+            "|".join(re.escape(k) for k in sorted(self._style_mapper, key=len, reverse=True))
+        ) if self._style_mapper else None
+
     def parse_style(self, style_info: dict = None) -> str:
         if not style_info:
             return None
 
-        styled_text = style_info.get("styled_text", "")
-        for k, v in self.style_mapper.items():
-            if k in styled_text:
-                return v
-        return None
+        if self.style_pattern:
+            # The first keyword in style_mapper wins when multiple keywords are found
+            if matched_keys := set(self.style_pattern.findall(style_info.get("styled_text") or "")):
+                return self._style_mapper[min(matched_keys, key=self.style_priorities.get)]
+
+        # Style carried over from the previous segments in the same response
+        return style_info.get("carried_style")
+
+    def make_synthesis_key(self, text: str, style_info: dict = None, language: str = None) -> str:
+        # Synthesis that results in the same audio has the same key
+        key_items = [
+            self.__class__.__name__,
+            text,
+            str(getattr(self, "speaker", None)),
+            self.parse_style(style_info),
+            language or getattr(self, "default_language", None),
+            getattr(self, "audio_format", None)
+        ]
+        return hashlib.sha256(json.dumps(key_items, ensure_ascii=False).encode("utf-8")).hexdigest()
 
     @abstractmethod
     async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
         pass
 
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        # Override to yield audio bytes as they arrive (e.g. chunked HTTP response)
+        if audio := await self.synthesize(text, style_info, language):
+            yield audio
+
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        # Override to set the format of headerless audio (e.g. raw PCM)
+        return AudioChunkDecoder()
+
+    async def synthesize_audio(self, text: str, style_info: dict = None, language: str = None, stream: bool = False) -> AsyncGenerator[AudioChunk, None]:
+        # Parse the format of synthesized audio once and yield them as PCM chunks
+        decoder = self.create_audio_decoder()
+        if stream:
+            async for audio in self.synthesize_stream(text, style_info, language):
+                if audio_chunk := decoder.feed(audio):
+                    yield audio_chunk
+        elif audio := await self.synthesize(text, style_info, language):
+            if audio_chunk := decoder.feed(audio):
+                yield audio_chunk
+
+    async def prefetch(self, text: str, style_info: dict = None, language: str = None):
+        # Override to prepare for synthesizing upcoming segment (e.g. make query in advance)
+        pass
+
+    async def ping(self):
+        # Override to send light request that keeps pooled connection alive
+        pass
+
+    async def warmup(self):
+        # Open connection in advance (DNS, TCP and TLS). Override to load models without billed synthesis (e.g. VOICEVOX)
+        try:
+            await self.ping()
+        except Exception as ex:
+            logger.warning(f"Error at warmup: {ex}")
+
     async def close(self):
         await self.http_client.aclose()
 
@@ -0,0 +1,152 @@
+import asyncio
+from collections import OrderedDict
+import logging
+import os
+from pathlib import Path
+from typing import AsyncGenerator, List
+import aiofiles
+from . import SpeechSynthesizer, synthesis_metrics
+from .audio import AudioChunkDecoder
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSpeechSynthesizer(SpeechSynthesizer):
+    def __init__(
+        self,
+        synthesizer: SpeechSynthesizer,
+        *,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        cache_dir: str = None,
+        debug: bool = False
+    ):
+        super().__init__(debug=debug)
+        self.synthesizer = synthesizer
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_cache: OrderedDict[str, bytes] = OrderedDict()
+        self.memory_bytes = 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir and not self.cache_dir.exists():
+            self.cache_dir.mkdir(parents=True)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def parse_style(self, style_info: dict = None) -> str:
+        return self.synthesizer.parse_style(style_info)
+
+    def make_synthesis_key(self, text: str, style_info: dict = None, language: str = None) -> str:
+        return self.synthesizer.make_synthesis_key(text, style_info, language)
+
+    def get_from_memory(self, key: str) -> bytes:
+        if key in self.memory_cache:
+            self.memory_cache.move_to_end(key)
+            return self.memory_cache[key]
+        return None
+
+    def set_to_memory(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        if key in self.memory_cache:
+            self.memory_bytes -= len(self.memory_cache.pop(key))
+        self.memory_cache[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory_cache.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def read_from_disk(self, key: str) -> bytes:
+        path = self.cache_dir / f"{key}.bin"
+        if not path.exists() or path.stat().st_size == 0:
+            return None
+        # Read once into bytes (mapping the file and slicing it copies the whole file anyway)
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def write_to_disk(self, key: str, audio: bytes):
+        # Write to temp file and rename not to read partially written file
+        path = self.cache_dir / f"{key}.bin"
+        temp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        async with aiofiles.open(temp_path, "wb") as f:
+            await f.write(audio)
+        os.replace(temp_path, path)
+
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        return self.synthesizer.create_audio_decoder()
+
+    async def get_cache(self, key: str) -> bytes:
+        audio = self.get_from_memory(key)
+        if audio is None and self.cache_dir:
+            audio = await asyncio.to_thread(self.read_from_disk, key)
+            if audio:
+                self.set_to_memory(key, audio)
+
+        metrics = synthesis_metrics.get()
+        if audio:
+            self.cache_hits += 1
+            if metrics:
+                metrics.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            if metrics:
+                metrics.cache_misses += 1
+
+        return audio
+
+    async def set_cache(self, key: str, audio: bytes):
+        if not audio:
+            return
+        self.set_to_memory(key, audio)
+        if self.cache_dir:
+            try:
+                await self.write_to_disk(key, audio)
+            except Exception as ex:
+                logger.warning(f"Error at writing synthesized audio cache: {ex}")
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        key = self.make_synthesis_key(text, style_info, language)
+        if audio := await self.get_cache(key):
+            if self.debug:
+                logger.info(f"Synthesized audio cache hit: {text}")
+            return audio
+
+        audio = await self.synthesizer.synthesize(text, style_info, language)
+        await self.set_cache(key, audio)
+        return audio
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        if not text or not text.strip():
+            return
+
+        key = self.make_synthesis_key(text, style_info, language)
+        if audio := await self.get_cache(key):
+            if self.debug:
+                logger.info(f"Synthesized audio cache hit: {text}")
+            yield audio
+            return
+
+        # Cache the whole audio after the stream is completed
+        audio_chunks = []
+        async for chunk in self.synthesizer.synthesize_stream(text, style_info, language):
+            audio_chunks.append(chunk)
+            yield chunk
+        await self.set_cache(key, b"".join(audio_chunks))
+
+    async def prefetch(self, text: str, style_info: dict = None, language: str = None):
+        await self.synthesizer.prefetch(text, style_info, language)
+
+    async def ping(self):
+        await self.synthesizer.ping()
+
+    async def warmup(self, phrases: List[str] = None, style_info: dict = None, language: str = None):
+        await self.synthesizer.warmup()
+
+        # Synthesize fixed phrases (e.g. greetings, fillers) in advance
+        for phrase in phrases or []:
+            await self.synthesize(phrase, style_info, language)
+
+    async def close(self):
+        await self.synthesizer.close()
+        await super().close()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, Dict
+from . import SpeechSynthesizer, synthesis_metrics
+from .audio import AudioChunkDecoder
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingSpeechSynthesizer(SpeechSynthesizer):
+    def __init__(
+        self,
+        synthesizer: SpeechSynthesizer,
+        *,
+        debug: bool = False
+    ):
+        super().__init__(debug=debug)
+        self.synthesizer = synthesizer
+        # In-flight syntheses and the number of callers waiting for them by key
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.waiters: Dict[str, int] = {}
+        self.coalesced_count = 0
+
+    def parse_style(self, style_info: dict = None) -> str:
+        return self.synthesizer.parse_style(style_info)
+
+    def make_synthesis_key(self, text: str, style_info: dict = None, language: str = None) -> str:
+        return self.synthesizer.make_synthesis_key(text, style_info, language)
+
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        return self.synthesizer.create_audio_decoder()
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        key = self.make_synthesis_key(text, style_info, language)
+        if task := self.inflight.get(key):
+            # Share the in-flight request with the same key
+            self.coalesced_count += 1
+            if metrics := synthesis_metrics.get():
+                metrics.coalesced += 1
+            if self.debug:
+                logger.info(f"Synthesis coalesced: {text}")
+        else:
+            task = asyncio.create_task(self.synthesizer.synthesize(text, style_info, language))
+            task.add_done_callback(lambda t: self.inflight.pop(key, None) if self.inflight.get(key) is t else None)
+            self.inflight[key] = task
+
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            # Shield not to cancel the synthesis that other callers are waiting for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.waiters[key] == 1:
+                # Cancel synthesis nobody waits for
+                if self.inflight.get(key) is task:
+                    del self.inflight[key]
+                task.cancel()
+            raise
+        finally:
+            self.waiters[key] -= 1
+            if self.waiters[key] == 0:
+                del self.waiters[key]
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        # Streams are not shared
+        async for chunk in self.synthesizer.synthesize_stream(text, style_info, language):
+            yield chunk
+
+    async def prefetch(self, text: str, style_info: dict = None, language: str = None):
+        await self.synthesizer.prefetch(text, style_info, language)
+
+    async def ping(self):
+        await self.synthesizer.ping()
+
+    async def warmup(self, *args, **kwargs):
+        await self.synthesizer.warmup(*args, **kwargs)
+
+    async def close(self):
+        await self.synthesizer.close()
+        await super().close()
@@ -0,0 +1,84 @@
+import asyncio
+from typing import AsyncGenerator, Dict, Union
+from . import SpeechSynthesizer
+from .audio import AudioChunk, AudioChunkDecoder
+from ..latency import LatencyDistribution, to_latency_distribution
+
+
+class FakeSpeechSynthesizer(SpeechSynthesizer):
+    # Speech synthesizer that returns silent WAV for tests and benchmarks without network access
+    def __init__(
+        self,
+        *,
+        latency: Union[float, LatencyDistribution] = 0.0,
+        latencies: Dict[str, float] = None,  # Latency for each text (e.g. to make the order of completion)
+        seconds_per_char: float = 0.1,     # Duration of audio
+        sample_rate: int = 24000,
+        stream_chunk_count: int = 4,
+        style_mapper: Dict[str, str] = None,
+        debug: bool = False
+    ):
+        super().__init__(style_mapper=style_mapper, debug=debug)
+        self.latency = to_latency_distribution(latency)
+        self.latencies = latencies or {}
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.stream_chunk_count = stream_chunk_count
+        self.speaker = "fake"
+        self.audio_format = "wav"
+        self.synthesize_count = 0
+        # Syntheses running concurrently and cancelled (e.g. by barge-in)
+        self.running = 0
+        self.max_running = 0
+        self.cancelled = 0
+
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        return AudioChunkDecoder(sample_rate=self.sample_rate)
+
+    def get_latency(self, text: str) -> float:
+        if text in self.latencies:
+            return self.latencies[text]
+        return self.latency.sample()
+
+    def make_audio(self, text: str) -> bytes:
+        frames = int(len(text) * self.seconds_per_char * self.sample_rate)
+        return AudioChunk(data=b"\x00\x00" * frames, sample_rate=self.sample_rate).to_wav()
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        self.synthesize_count += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if latency := self.get_latency(text):
+                await asyncio.sleep(latency)
+            return self.make_audio(text)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        if not text or not text.strip():
+            return
+
+        # Latency is spread over the chunks
+        self.synthesize_count += 1
+        audio = self.make_audio(text)
+        chunk_size = -(-len(audio) // self.stream_chunk_count)
+        latency = self.get_latency(text) / self.stream_chunk_count
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            for i in range(0, len(audio), chunk_size):
+                if latency:
+                    await asyncio.sleep(latency)
+                yield audio[i:i + chunk_size]
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
@@ -34,6 +34,10 @@ class GoogleSpeechSynthesizer(SpeechSynthesizer):
         self.audio_format = audio_format
         self.voice_map = {self.default_language: self.speaker}
 
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        await self.http_client.head("https://texttospeech.googleapis.com/")
+
     async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
         if not text or not text.strip():
             return bytes()
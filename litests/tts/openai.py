@@ -1,6 +1,7 @@
 import logging
-from typing import Dict
+from typing import AsyncGenerator, Dict
 from . import SpeechSynthesizer
+from .audio import AudioChunkDecoder
 
 logger = logging.getLogger(__name__)
 
@@ -31,25 +32,50 @@ class OpenAISpeechSynthesizer(SpeechSynthesizer):
         self.model = model
         self.audio_format = audio_format
 
-    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
-        if not text or not text.strip():
-            return bytes()
+    def create_audio_decoder(self) -> AudioChunkDecoder:
+        # Compressed formats (mp3, opus, aac and flac) can't be decoded into PCM chunks
+        if self.audio_format not in ("wav", "pcm"):
+            raise ValueError(f"Audio format '{self.audio_format}' can't be transcoded. Set audio_format to 'wav' or 'pcm'.")
+        # pcm: 24kHz 16bit mono without header
+        return AudioChunkDecoder(sample_rate=24000, channels=1, sample_width=2)
 
-        logger.info(f"Speech synthesize: {text}")
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        await self.http_client.head("https://api.openai.com/v1/models")
 
-        # Synthesize
-        resp = await self.http_client.post(
-            url="https://api.openai.com/v1/audio/speech",
-            headers={
+    def make_request_params(self, text: str, style_info: dict = None, language: str = None) -> dict:
+        return {
+            "url": "https://api.openai.com/v1/audio/speech",
+            "headers": {
                 "Authorization": f"Bearer {self.openai_api_key}"
             },
-            json= {
+            "json": {
                 "model": self.model,
                 "voice": self.speaker,
                 "input": text,
                 # "speed": self.speed,
-                "response_format": "wav"
+                "response_format": self.audio_format
             }
-        )
+        }
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        logger.info(f"Speech synthesize: {text}")
+
+        # Synthesize
+        resp = await self.http_client.post(**self.make_request_params(text, style_info, language))
 
         return resp.content
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        if not text or not text.strip():
+            return
+
+        logger.info(f"Speech synthesize (stream): {text}")
+
+        # Synthesize and yield audio as it arrives
+        async with self.http_client.stream("POST", **self.make_request_params(text, style_info, language)) as resp:
+            async for chunk in resp.aiter_bytes():
+                yield chunk
@@ -0,0 +1,139 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import io
+import logging
+import multiprocessing
+from typing import Dict, List, Set, Tuple
+import wave
+from piper import PiperVoice
+from . import SpeechSynthesizer
+
+logger = logging.getLogger(__name__)
+
+# Voices loaded once in each worker process
+worker_voices: Dict[str, PiperVoice] = {}
+
+
+def init_worker(voice_models: Dict[str, str]):
+    for name, model_path in voice_models.items():
+        worker_voices[name] = PiperVoice.load(model_path)
+
+
+def load_in_worker() -> List[str]:
+    # Voices are loaded by the initializer when the worker process starts
+    return list(worker_voices)
+
+
+def synthesize_in_worker(segments: List[Tuple[str, str]]) -> List[bytes]:
+    audios = []
+    for voice_name, text in segments:
+        voice = worker_voices[voice_name]
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            if hasattr(voice, "synthesize_wav"):
+                voice.synthesize_wav(text, wav_file)
+            else:
+                voice.synthesize(text, wav_file)
+        audios.append(buffer.getvalue())
+    return audios
+
+
+class PiperSpeechSynthesizer(SpeechSynthesizer):
+    def __init__(
+        self,
+        *,
+        voice_models: Dict[str, str],
+        speaker: str = None,
+        style_mapper: Dict[str, str] = None,
+        max_workers: int = 2,
+        batch_size: int = 4,
+        batch_wait: float = 0.01,
+        debug: bool = False
+    ):
+        super().__init__(
+            style_mapper=style_mapper,
+            debug=debug
+        )
+        # Voice name : path to onnx model (config is expected at model path + .json)
+        self.voice_models = voice_models
+        self.speaker = speaker or next(iter(voice_models))
+        self.audio_format = "wav"
+        self.max_workers = max_workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(voice_models,)
+        )
+        # Segments requested within batch_wait (e.g. from different sessions) are split across workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batch_queue: List[Tuple[Tuple[str, str], asyncio.Future]] = []
+        # Keep references to the flush tasks not to be garbage-collected while waiting
+        self.batch_tasks: Set[asyncio.Task] = set()
+
+    async def synthesize_group(self, group: List[Tuple[Tuple[str, str], asyncio.Future]]):
+        try:
+            audios = await asyncio.get_running_loop().run_in_executor(
+                self.executor, synthesize_in_worker, [segment for segment, _ in group]
+            )
+            for (_, future), audio in zip(group, audios):
+                if not future.done():
+                    future.set_result(audio)
+        except Exception as ex:
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(ex)
+
+    async def flush_batch(self, batch: List[Tuple[Tuple[str, str], asyncio.Future]]):
+        if self.batch_queue is batch:
+            self.batch_queue = []
+
+        # Synthesize in parallel: one job for each worker instead of the whole batch in a worker
+        worker_count = min(self.max_workers, len(batch))
+        await asyncio.gather(*(self.synthesize_group(batch[i::worker_count]) for i in range(worker_count)))
+
+    async def wait_and_flush_batch(self, batch: List[Tuple[Tuple[str, str], asyncio.Future]]):
+        await asyncio.sleep(self.batch_wait)
+        if self.batch_queue is batch:
+            await self.flush_batch(batch)
+
+    def create_batch_task(self, coro):
+        task = asyncio.create_task(coro)
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        logger.info(f"Speech synthesize: {text}")
+
+        voice_name = self.speaker
+
+        # Apply style
+        if style := self.parse_style(style_info):
+            voice_name = style
+            logger.info(f"Apply style: {voice_name}")
+
+        future = asyncio.get_running_loop().create_future()
+        batch = self.batch_queue
+        batch.append(((voice_name, text), future))
+        if len(batch) >= self.batch_size:
+            self.create_batch_task(self.flush_batch(batch))
+        elif len(batch) == 1:
+            self.create_batch_task(self.wait_and_flush_batch(batch))
+
+        return await future
+
+    async def warmup(self):
+        # Start all workers and load voices in advance not to load them at the first synthesis
+        try:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, load_in_worker) for _ in range(self.max_workers)))
+        except Exception as ex:
+            logger.warning(f"Error at warmup: {ex}")
+
+    async def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        await super().close()
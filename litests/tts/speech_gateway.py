@@ -1,6 +1,7 @@
 import logging
-from typing import Dict
+from typing import AsyncGenerator, Dict, List
 from . import SpeechSynthesizer
+from .balancer import EndpointBalancer
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,8 @@ class SpeechGatewaySpeechSynthesizer(SpeechSynthesizer):
         speaker: str,
         style_mapper: Dict[str, str] = None,
         tts_url: str = "http://127.0.0.1:8000/tts",
+        tts_urls: List[str] = None,
+        balancing_strategy: str = "latency",
         audio_format: str = None,
         max_connections: int = 100,
         max_keepalive_connections: int = 20,
@@ -28,15 +31,21 @@ class SpeechGatewaySpeechSynthesizer(SpeechSynthesizer):
         )
         self.service_name = service_name
         self.speaker = speaker
-        self.tts_url = tts_url
+        # Balance requests across replicas of SpeechGateway
+        self.balancer = EndpointBalancer(tts_urls or [tts_url], strategy=balancing_strategy)
         self.audio_format = audio_format
 
-    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
-        if not text or not text.strip():
-            return bytes()
+    @property
+    def tts_url(self) -> str:
+        # Primary endpoint (kept for compatibility with tts_url before balancing)
+        return self.balancer.endpoints[0].url
 
-        logger.info(f"Speech synthesize: {text}")
+    async def ping(self):
+        # Response status doesn't matter to keep connection alive
+        for endpoint in self.balancer.endpoints:
+            await self.http_client.head(endpoint.url)
 
+    def make_request_params(self, text: str, style_info: dict = None, language: str = None) -> dict:
         # Audio format
         query_params = {"x_audio_format": self.audio_format} if self.audio_format else {}
 
@@ -53,11 +62,49 @@ class SpeechGatewaySpeechSynthesizer(SpeechSynthesizer):
             del request_json["service_name"]
             del request_json["speaker"]
 
+        return {
+            "params": query_params,
+            "json": request_json
+        }
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        logger.info(f"Speech synthesize: {text}")
+
         # Synthesize
-        resp = await self.http_client.post(
-            url=self.tts_url,
-            params=query_params,
-            json=request_json
+        resp = await self.balancer.request(
+            self.http_client, "POST",
+            cost=len(text),
+            **self.make_request_params(text, style_info, language)
         )
 
         return resp.content
+
+    async def synthesize_stream(self, text: str, style_info: dict = None, language: str = None) -> AsyncGenerator[bytes, None]:
+        if not text or not text.strip():
+            return
+
+        logger.info(f"Speech synthesize (stream): {text}")
+
+        # Measure the latency of endpoint until the first chunk, not including the time of consumer
+        async with self.balancer.use(len(text)) as url:
+            request = self.http_client.build_request("POST", url, **self.make_request_params(text, style_info, language))
+            resp = await self.http_client.send(request, stream=True)
+            try:
+                resp.raise_for_status()
+                chunks = resp.aiter_bytes()
+                first_chunk = await anext(chunks, b"")
+            except BaseException:
+                await resp.aclose()
+                raise
+
+        # Yield audio as it arrives
+        try:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await resp.aclose()
@@ -1,6 +1,12 @@
+import asyncio
+from collections import OrderedDict
+import copy
+import io
 import logging
-from typing import Dict
+from typing import Dict, List, Set, Tuple
+import zipfile
 from . import SpeechSynthesizer
+from .balancer import EndpointBalancer
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +16,13 @@ class VoicevoxSpeechSynthesizer(SpeechSynthesizer):
         self,
         *,
         base_url: str = "http://127.0.0.1:50021",
+        base_urls: List[str] = None,
+        balancing_strategy: str = "latency",
         speaker: int = 46,
         style_mapper: Dict[str, str] = None,
+        audio_query_cache_size: int = 1000,
+        batch_size: int = 1,
+        batch_wait: float = 0.05,
         max_connections: int = 100,
         max_keepalive_connections: int = 20,
         timeout: float = 10.0,
@@ -24,21 +35,39 @@ class VoicevoxSpeechSynthesizer(SpeechSynthesizer):
             timeout=timeout,
             debug=debug
         )
-        self.base_url = base_url
+        # Balance requests across replicas of VOICEVOX engine
+        self.balancer = EndpointBalancer(base_urls or [base_url], strategy=balancing_strategy, health_check_path="/version")
         self.speaker = speaker
+        # Audio queries are cached as tasks to share the ones in progress (e.g. prefetched)
+        self.audio_query_cache_size = audio_query_cache_size
+        self.audio_query_cache: OrderedDict[Tuple[str, int], asyncio.Task] = OrderedDict()
+        # Segments requested within batch_wait are synthesized in one request (batch_size=1 to disable)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batch_queues: Dict[int, List[Tuple[dict, asyncio.Future]]] = {}
+        # Keep references to the flush tasks not to be garbage-collected while waiting
+        self.batch_tasks: Set[asyncio.Task] = set()
 
-    async def get_audio_query(self, text: str, speaker: int):
-        url = f"{self.base_url}/audio_query"
-        response = await self.http_client.post(url, params={"speaker": speaker, "text": text})
-        response.raise_for_status()
-        return response.json()
+    @property
+    def base_url(self) -> str:
+        # Primary endpoint (kept for compatibility with base_url before balancing)
+        return self.balancer.endpoints[0].url
 
-    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
-        if not text or not text.strip():
-            return bytes()
+    async def ping(self):
+        await self.balancer.health_check(self.http_client)
 
-        logger.info(f"Speech synthesize: {text}")
+    async def warmup(self):
+        # Load models of speakers for each style that are loaded lazily by default
+        speakers = {self.speaker} | {int(v) for v in self.style_mapper.values()}
+        results = await asyncio.gather(*[
+            self.http_client.post(f"{e.url}/initialize_speaker", params={"speaker": s, "skip_reinit": True})
+            for s in speakers for e in self.balancer.endpoints
+        ], return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning(f"Error at warmup: {r}")
 
+    def get_speaker(self, style_info: dict = None) -> int:
         speaker = self.speaker
 
         # Apply style
@@ -46,12 +75,124 @@ class VoicevoxSpeechSynthesizer(SpeechSynthesizer):
             speaker = int(style)
             logger.info(f"Apply style: {speaker}")
 
+        return speaker
+
+    def get_query_cost(self, audio_query: dict) -> int:
+        # Synthesis time is proportional to the number of moras
+        return sum(len(p.get("moras") or []) for p in audio_query.get("accent_phrases") or []) or 1
+
+    async def fetch_audio_query(self, text: str, speaker: int):
+        response = await self.balancer.request(
+            self.http_client, "POST", "/audio_query", cost=len(text), params={"speaker": speaker, "text": text}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_audio_query_task(self, text: str, speaker: int) -> asyncio.Task:
+        key = (text, speaker)
+        if key in self.audio_query_cache:
+            self.audio_query_cache.move_to_end(key)
+            return self.audio_query_cache[key]
+
+        task = asyncio.create_task(self.fetch_audio_query(text, speaker))
+        # Errors are handled by the callers of get_audio_query
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.audio_query_cache[key] = task
+        while len(self.audio_query_cache) > self.audio_query_cache_size:
+            self.audio_query_cache.popitem(last=False)
+        return task
+
+    async def get_audio_query(self, text: str, speaker: int):
+        task = self.get_audio_query_task(text, speaker)
+        try:
+            # Shield not to cancel the query shared with other callers, and copy not to share the mutable query
+            return copy.deepcopy(await asyncio.shield(task))
+        except Exception:
+            # Don't cache errors
+            if self.audio_query_cache.get((text, speaker)) is task:
+                del self.audio_query_cache[(text, speaker)]
+            raise
+
+    async def prefetch(self, text: str, style_info: dict = None, language: str = None):
+        # Start making audio query for the upcoming segment without waiting for it
+        if text and text.strip():
+            self.get_audio_query_task(text, self.get_speaker(style_info))
+
+    async def multi_synthesize(self, audio_queries: List[dict], speaker: int) -> List[bytes]:
+        response = await self.balancer.request(
+            self.http_client, "POST", "/multi_synthesis",
+            cost=sum(self.get_query_cost(q) for q in audio_queries),
+            params={"speaker": speaker},
+            json=audio_queries
+        )
+        response.raise_for_status()
+
+        # Response is a zip file that contains wav files in order of queries
+        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+            return [zf.read(name) for name in sorted(zf.namelist())]
+
+    async def flush_batch(self, speaker: int, batch: List[Tuple[dict, asyncio.Future]]):
+        if self.batch_queues.get(speaker) is batch:
+            del self.batch_queues[speaker]
+
+        try:
+            if len(batch) == 1:
+                response = await self.balancer.request(
+                    self.http_client, "POST", "/synthesis",
+                    cost=self.get_query_cost(batch[0][0]),
+                    params={"speaker": speaker},
+                    json=batch[0][0]
+                )
+                audios = [response.content]
+            else:
+                logger.info(f"Multi synthesize: {len(batch)} segments")
+                audios = await self.multi_synthesize([q for q, _ in batch], speaker)
+            for (_, future), audio in zip(batch, audios):
+                if not future.done():
+                    future.set_result(audio)
+        except Exception as ex:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+
+    async def wait_and_flush_batch(self, speaker: int, batch: List[Tuple[dict, asyncio.Future]]):
+        await asyncio.sleep(self.batch_wait)
+        if self.batch_queues.get(speaker) is batch:
+            await self.flush_batch(speaker, batch)
+
+    def create_batch_task(self, coro):
+        task = asyncio.create_task(coro)
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def synthesize_in_batch(self, audio_query: dict, speaker: int) -> bytes:
+        future = asyncio.get_running_loop().create_future()
+        batch = self.batch_queues.setdefault(speaker, [])
+        batch.append((audio_query, future))
+        if len(batch) >= self.batch_size:
+            self.create_batch_task(self.flush_batch(speaker, batch))
+        elif len(batch) == 1:
+            self.create_batch_task(self.wait_and_flush_batch(speaker, batch))
+        return await future
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        if not text or not text.strip():
+            return bytes()
+
+        logger.info(f"Speech synthesize: {text}")
+
+        speaker = self.get_speaker(style_info)
+
         # Make query
         audio_query = await self.get_audio_query(text, speaker)
 
         # Synthesize
-        response = await self.http_client.post(
-            url=self.base_url + "/synthesis",
+        if self.batch_size > 1:
+            return await self.synthesize_in_batch(audio_query, speaker)
+
+        response = await self.balancer.request(
+            self.http_client, "POST", "/synthesis",
+            cost=self.get_query_cost(audio_query),
             params={"speaker": speaker},
             json=audio_query
         )
@@ -1 +1 @@
-from .base import VoiceRecorder, RequestVoice, ResponseVoices
+from .base import VoiceRecorder, RequestVoice, ResponseVoice, ResponseVoices
@@ -10,9 +10,11 @@ class AzureBlobVoiceRecorder(VoiceRecorder):
         directory: str = "recorded_voices",
         sample_rate: int = 16000,
         channels: int = 1,
-        sample_width: int = 2
+        sample_width: int = 2,
+        max_queue_size: int = 1000,
+        overflow_policy: str = "drop_newest"
     ):
-        super().__init__(sample_rate=sample_rate, channels=channels, sample_width=sample_width)
+        super().__init__(sample_rate=sample_rate, channels=channels, sample_width=sample_width, max_queue_size=max_queue_size, overflow_policy=overflow_policy)
 
         self.connection_string = connection_string
         self.container_name = container_name
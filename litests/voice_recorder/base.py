@@ -24,8 +24,24 @@ class ResponseVoices(Voice):
     audio_format: str
 
 
+@dataclass
+class ResponseVoice(Voice):
+    # A chunk of response voice handed over as soon as it is synthesized
+    index: int
+    voice_bytes: bytes
+    audio_format: str
+
+
 class VoiceRecorder(ABC):
-    def __init__(self, *, sample_rate: int = 16000, channels: int = 1, sample_width: int = 2):
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        sample_width: int = 2,
+        max_queue_size: int = 1000,
+        overflow_policy: str = "drop_newest"    # or drop_oldest
+    ):
         self.sample_rate = sample_rate
         self.channels = channels
         self.sample_width = sample_width
@@ -35,7 +51,10 @@ class VoiceRecorder(ABC):
             "riff-16khz-16bit-mono-pcm": "wav"  # Azure TTS
         }
 
-        self.queue: asyncio.Queue[Voice] = asyncio.Queue()
+        # Voices are recorded in background not to block transactions, and dropped when the queue is full
+        self.queue: asyncio.Queue[Voice] = asyncio.Queue(max_queue_size)
+        self.overflow_policy = overflow_policy
+        self.dropped_count = 0
         self.worker_task = None
 
     def to_extension(self, format: str) -> str:
@@ -66,6 +85,10 @@ class VoiceRecorder(ABC):
     async def save_voice(self, id: str, voice_bytes: bytes, audio_format: str):
         pass
 
+    async def save_voice_parts(self, id: str, voice_parts: List[bytes], audio_format: str):
+        # Override to write parts (e.g. header and data) without concatenating them
+        await self.save_voice(id, b"".join(voice_parts), audio_format)
+
     async def _worker(self):
         while True:
             voice = await self.queue.get()
@@ -74,7 +97,13 @@ class VoiceRecorder(ABC):
 
             try:
                 if isinstance(voice, RequestVoice):
-                    if not voice.voice_bytes.startswith(b"RIFF"):
+                    if voice.voice_bytes.startswith(b"RIFF"):
+                        await self.save_voice(
+                            id=f"{voice.transaction_id}_request",
+                            voice_bytes=voice.voice_bytes,
+                            audio_format="wav"
+                        )
+                    else:
                         # Add header if missing
                         header = self.create_wav_header(
                             data_size=len(voice.voice_bytes),
@@ -82,11 +111,17 @@ class VoiceRecorder(ABC):
                             channels=self.channels,
                             sample_width=self.sample_width
                         )
-                        voice.voice_bytes = header + voice.voice_bytes
+                        await self.save_voice_parts(
+                            id=f"{voice.transaction_id}_request",
+                            voice_parts=[header, voice.voice_bytes],
+                            audio_format="wav"
+                        )
+
+                elif isinstance(voice, ResponseVoice):
                     await self.save_voice(
-                        id=f"{voice.transaction_id}_request",
+                        id=f"{voice.transaction_id}_response_{voice.index}",
                         voice_bytes=voice.voice_bytes,
-                        audio_format="wav"
+                        audio_format=voice.audio_format
                     )
 
                 elif isinstance(voice, ResponseVoices):
@@ -104,12 +139,41 @@ class VoiceRecorder(ABC):
                 if not self.queue.empty():
                     self.queue.task_done()
 
-    async def record(self, voice: Voice):
+    def record_nowait(self, voice: Voice) -> bool:
+        # Enqueue without waiting. Returns False when the voice (or the oldest one) is dropped
         if self.worker_task is None:
             self.worker_task = asyncio.create_task(self._worker())
-        await self.queue.put(voice)
 
-    async def stop(self):
-        await self.queue.put(None)
-        if self.worker_task:
+        try:
+            self.queue.put_nowait(voice)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped_count += 1
+        if self.overflow_policy == "drop_oldest":
+            dropped = self.queue.get_nowait()
+            self.queue.put_nowait(voice)
+        else:
+            dropped = voice
+        logger.warning(f"Voice recorder queue is full. Dropped: {dropped.transaction_id}")
+        return False
+
+    async def record(self, voice: Voice) -> bool:
+        return self.record_nowait(voice)
+
+    async def stop(self, timeout: float = 10.0):
+        if self.worker_task is None:
+            return
+
+        # Save the queued voices before stopping, and cancel when it takes longer than timeout
+        async def drain():
+            await self.queue.put(None)
+            await self.worker_task
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Voice recorder stopped before saving {self.queue.qsize()} voices")
             self.worker_task.cancel()
+        self.worker_task = None
@@ -1,11 +1,12 @@
 from pathlib import Path
+from typing import List
 import aiofiles
 from . import VoiceRecorder
 
 
 class FileVoiceRecorder(VoiceRecorder):
-    def __init__(self, *, record_dir: str = "recorded_voices", sample_rate = 16000, channels = 1, sample_width = 2):
-        super().__init__(sample_rate=sample_rate, channels=channels, sample_width=sample_width)
+    def __init__(self, *, record_dir: str = "recorded_voices", sample_rate = 16000, channels = 1, sample_width = 2, max_queue_size = 1000, overflow_policy = "drop_newest"):
+        super().__init__(sample_rate=sample_rate, channels=channels, sample_width=sample_width, max_queue_size=max_queue_size, overflow_policy=overflow_policy)
         self.record_dir = Path(record_dir)
         if not self.record_dir.exists():
             self.record_dir.mkdir(parents=True)
@@ -14,3 +15,9 @@ class FileVoiceRecorder(VoiceRecorder):
         file_extension = self.to_extension(audio_format)
         async with aiofiles.open(self.record_dir / f"{id}.{file_extension}", "wb") as f:
             await f.write(voice_bytes)
+
+    async def save_voice_parts(self, id: str, voice_parts: List[bytes], audio_format: str):
+        # Write parts at once without concatenating them
+        file_extension = self.to_extension(audio_format)
+        async with aiofiles.open(self.record_dir / f"{id}.{file_extension}", "wb") as f:
+            await f.writelines(voice_parts)
@@ -12,7 +12,7 @@ setup(
     long_description=open("README.md").read(),
     long_description_content_type="text/markdown",
     packages=find_packages(exclude=["tests*"]),
-    install_requires=["httpx>=0.27.0", "openai>=1.55.3", "aiofiles>=24.1.0"],
+    install_requires=["httpx>=0.27.0", "openai>=1.55.3", "aiofiles>=24.1.0", "numpy"],
     license="Apache v2",
     classifiers=[
         "Programming Language :: Python :: 3"
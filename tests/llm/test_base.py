@@ -0,0 +1,228 @@
+import asyncio
+from time import perf_counter
+import pytest
+from litests.llm import ToolArgumentsParser, ToolExecutor
+from litests.llm.chatgpt import ChatGPTService, ToolCall
+
+
+def make_tool_spec(name: str):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": f"Tool {name}",
+            "parameters": {"type": "object", "properties": {}}
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_execute_tools_concurrently():
+    service = ChatGPTService(openai_api_key="dummy", max_concurrent_tools=5, tool_timeout=0.5)
+
+    @service.tool(make_tool_spec("get_weather"))
+    async def get_weather(location: str = None):
+        await asyncio.sleep(0.2)
+        return {"weather": "clear", "location": location}
+
+    @service.tool(make_tool_spec("get_schedule"))
+    async def get_schedule(metadata: dict = None):
+        await asyncio.sleep(0.1)
+        return {"schedule": "meeting", "user_id": metadata["user_id"]}
+
+    @service.tool(make_tool_spec("search_memory"))
+    async def search_memory(query: str = None):
+        await asyncio.sleep(1.0)
+        return {"memory": query}
+
+    start = perf_counter()
+    results = await service.execute_tools([
+        (ToolCall("1", "get_weather"), {"location": "Tokyo"}),
+        (ToolCall("2", "execute_external_tool"), {"target": "weather", "action": "look up"}),
+        (ToolCall("3", "get_schedule"), {}),
+        (ToolCall("4", "search_memory"), {"query": "birthday"}),
+    ], {"user_id": "user1"})
+    elapsed = perf_counter() - start
+
+    # Results are in the original order
+    assert results[0] == {"weather": "clear", "location": "Tokyo"}
+    assert results[1] is None   # Not registered (dynamic tool)
+    assert results[2] == {"schedule": "meeting", "user_id": "user1"}
+    assert "timed out" in results[3]["error"]
+
+    # Executed concurrently and the slow tool is cancelled by timeout
+    assert elapsed < 0.7
+
+
+@pytest.mark.asyncio
+async def test_execute_tools_concurrency_limit():
+    service = ChatGPTService(openai_api_key="dummy", max_concurrent_tools=2)
+
+    running = 0
+    max_running = 0
+
+    @service.tool(make_tool_spec("slow_tool"))
+    async def slow_tool():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return {"result": "ok"}
+
+    results = await service.execute_tools([(ToolCall(str(i), "slow_tool"), {}) for i in range(6)], {})
+    assert results == [{"result": "ok"}] * 6
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_tool_cache():
+    service = ChatGPTService(openai_api_key="dummy")
+
+    call_count = 0
+
+    @service.tool(make_tool_spec("get_weather"), cache_ttl=0.2, cache_size=2)
+    async def get_weather(location: str = None):
+        nonlocal call_count
+        call_count += 1
+        return {"weather": "clear", "location": location}
+
+    # Cached by normalized arguments
+    tc1 = ToolCall("1", "get_weather")
+    assert await service.execute_tool("get_weather", {"location": "Tokyo"}, {}, tc1) == {"weather": "clear", "location": "Tokyo"}
+    assert tc1.is_cached is False
+    tc2 = ToolCall("2", "get_weather")
+    assert await service.execute_tool("get_weather", {"location": " Tokyo "}, {}, tc2) == {"weather": "clear", "location": "Tokyo"}
+    assert tc2.is_cached is True
+    assert call_count == 1
+
+    # Size bound
+    await service.execute_tool("get_weather", {"location": "Osaka"}, {})
+    await service.execute_tool("get_weather", {"location": "Kyoto"}, {})
+    await service.execute_tool("get_weather", {"location": "Tokyo"}, {})
+    assert call_count == 4
+
+    # TTL
+    await asyncio.sleep(0.3)
+    await service.execute_tool("get_weather", {"location": "Tokyo"}, {})
+    assert call_count == 5
+
+    tool = service.tools["get_weather"]
+    assert tool.cache_hits == 1
+    assert tool.cache_misses == 5
+
+
+@pytest.mark.asyncio
+async def test_execute_tool_cache_by_user():
+    service = ChatGPTService(openai_api_key="dummy")
+
+    call_count = 0
+
+    @service.tool(make_tool_spec("get_schedule"), cache_ttl=60, cache_by_user=True)
+    async def get_schedule(date: str, metadata: dict = None):
+        nonlocal call_count
+        call_count += 1
+        return {"schedule": f"meeting of {metadata['user_id']}"}
+
+    assert service.tools["get_schedule"].use_metadata is True
+
+    arguments = {"date": "today"}
+    assert await service.execute_tool("get_schedule", arguments, {"user_id": "user1"}) == {"schedule": "meeting of user1"}
+    assert await service.execute_tool("get_schedule", arguments, {"user_id": "user2"}) == {"schedule": "meeting of user2"}
+    assert await service.execute_tool("get_schedule", arguments, {"user_id": "user1"}) == {"schedule": "meeting of user1"}
+    assert call_count == 2
+    assert arguments == {"date": "today"}
+
+    # Cached for each user by default when the tool takes metadata
+    @service.tool(make_tool_spec("get_todo"), cache_ttl=60)
+    async def get_todo(metadata: dict = None):
+        return {"todo": [f"task of {metadata['user_id']}"]}
+
+    assert service.tools["get_todo"].cache_by_user is True
+    result = await service.execute_tool("get_todo", {}, {"user_id": "user1"})
+    assert await service.execute_tool("get_todo", {}, {"user_id": "user2"}) == {"todo": ["task of user2"]}
+
+    # Cached result is not shared with callers
+    result["todo"].append("modified")
+    assert await service.execute_tool("get_todo", {}, {"user_id": "user1"}) == {"todo": ["task of user1"]}
+    cached = await service.execute_tool("get_todo", {}, {"user_id": "user1"})
+    cached["todo"].clear()
+    assert await service.execute_tool("get_todo", {}, {"user_id": "user1"}) == {"todo": ["task of user1"]}
+    assert service.tools["get_todo"].cache_hits == 3
+
+
+def test_tool_arguments_parser():
+    parser = ToolArgumentsParser()
+    assert parser.feed('{"query": "{\\"quoted') is False
+    assert parser.feed('\\" [bracket]}", "items": [{"a": 1}') is False
+    assert parser.feed(']') is False
+    assert parser.feed('}') is True
+    assert parser.feed('{') is True
+
+    parser = ToolArgumentsParser()
+    assert parser.feed("") is False
+    assert parser.feed("{}") is True
+
+
+@pytest.mark.asyncio
+async def test_tool_executor_dispatch():
+    service = ChatGPTService(openai_api_key="dummy")
+
+    call_count = 0
+
+    @service.tool(make_tool_spec("get_weather"))
+    async def get_weather(location: str = None):
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.2)
+        return {"weather": "clear", "location": location}
+
+    tool_executor = ToolExecutor(service, {"user_id": "user1"})
+    tc1 = ToolCall("1", "get_weather", '{"location": "Tokyo"}')
+    tc2 = ToolCall("2", "get_weather", '{"location": "Osaka"}')
+
+    # Dispatched while LLM is still streaming
+    tool_executor.dispatch(tc1, {"location": "Tokyo"})
+    await asyncio.sleep(0.15)
+
+    start = perf_counter()
+    results = await service.execute_tools([(tc1, {"location": "Tokyo"}), (tc2, {"location": "Osaka"})], {"user_id": "user1"}, tool_executor)
+    elapsed = perf_counter() - start
+
+    assert results == [{"weather": "clear", "location": "Tokyo"}, {"weather": "clear", "location": "Osaka"}]
+    assert call_count == 2  # Not executed twice
+    assert elapsed < 0.3
+
+
+@pytest.mark.asyncio
+async def test_tool_executor_context():
+    service = ChatGPTService(openai_api_key="dummy")
+    cancelled = 0
+
+    @service.tool(make_tool_spec("get_weather"))
+    async def get_weather(location: str = None):
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return {"weather": "clear", "location": location}
+
+    tool_executor = ToolExecutor(service, {"user_id": "user1"})
+
+    # Invalid arguments (e.g. truncated JSON) are not parsed and the tool is not executed
+    assert tool_executor.parse_arguments(ToolCall("1", "get_weather", '{"location": "Tokyo"}')) == {"location": "Tokyo"}
+    assert tool_executor.parse_arguments(ToolCall("2", "get_weather", '{"location": ')) is None
+    assert tool_executor.parse_arguments(ToolCall("3", "get_weather", '["Tokyo"]')) is None
+    assert tool_executor.parse_arguments(ToolCall("4", "get_weather", {"location": "Tokyo"})) == {"location": "Tokyo"}
+    assert "error" in await tool_executor.execute(ToolCall("2", "get_weather", '{"location": '), None)
+
+    # Dispatched tools are cancelled when the stream is aborted
+    with pytest.raises(RuntimeError):
+        async with tool_executor:
+            tool_executor.dispatch(ToolCall("1", "get_weather", ""), {"location": "Tokyo"})
+            await asyncio.sleep(0.1)
+            raise RuntimeError("Stream aborted")
+    await asyncio.sleep(0.1)
+    assert cancelled == 1
@@ -1,8 +1,12 @@
+import asyncio
 import json
 import os
 import pytest
 from typing import Any, Dict
 from uuid import uuid4
+import httpx
+import openai
+from openai.types.chat import ChatCompletionChunk
 from litests.llm.chatgpt import ChatGPTService, ToolCall
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -260,3 +264,147 @@ async def test_chatgpt_service_tool_calls():
     assert "2" in messages[3]["content"]
 
     await service.openai_client.close()
+
+
+class FakeChatCompletionStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for c in self.chunks:
+            yield c
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_chatgpt_service_prompt_cache_request_and_usage():
+    """
+    Test the request that keeps messages as a stable prefix for prompt caching
+    and the token usage parsed from the last chunk, without network access.
+    """
+    service = ChatGPTService(
+        openai_api_key=OPENAI_API_KEY or "dummy",
+        system_prompt=SYSTEM_PROMPT,
+        model=MODEL,
+        use_prompt_cache=True
+    )
+
+    requests = []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return FakeChatCompletionStream([
+            ChatCompletionChunk.model_validate({
+                "id": "1", "object": "chat.completion.chunk", "created": 0, "model": MODEL,
+                "choices": [{"index": 0, "delta": {"content": "こんにちは"}}]
+            }),
+            ChatCompletionChunk.model_validate({
+                "id": "1", "object": "chat.completion.chunk", "created": 0, "model": MODEL, "choices": [],
+                "usage": {"prompt_tokens": 1200, "completion_tokens": 5, "total_tokens": 1205, "prompt_tokens_details": {"cached_tokens": 1024}}
+            })
+        ])
+
+    service.openai_client.chat.completions.create = create
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": "こんにちは"}
+    ]
+    responses = [r async for r in service.get_llm_stream_response("context", "user", messages)]
+
+    # Messages are sent as they are with usage in stream
+    assert requests[0]["messages"] == messages
+    assert requests[0]["stream_options"] == {"include_usage": True}
+
+    assert responses[0].text == "こんにちは"
+    usage = responses[1].usage
+    assert (usage.input_tokens, usage.output_tokens, usage.cached_tokens) == (1200, 5, 1024)
+
+    # Tool instruction is added to the system prompt, not after the user message
+    @service.tool({"type": "function", "function": {"name": "get_weather", "parameters": {"type": "object", "properties": {}}}})
+    async def get_weather() -> Dict[str, Any]:
+        return {"weather": "clear"}
+
+    service.tools["get_weather"].instruction = "Use get_weather for weather."
+    tools = [service.tools["get_weather"].spec]
+    responses = [r async for r in service.get_llm_stream_response("context", "user", messages, tools=tools)]
+    assert requests[1]["messages"] == [
+        {"role": "system", "content": SYSTEM_PROMPT + "Use get_weather for weather.\n\n"},
+        {"role": "user", "content": "こんにちは"}
+    ]
+
+    # Usage is not requested after the server rejects stream_options
+    async def create_without_stream_options(**kwargs):
+        if "stream_options" in kwargs:
+            raise openai.BadRequestError(
+                "Unrecognized request argument supplied: stream_options",
+                response=httpx.Response(400, request=httpx.Request("POST", "http://localhost")),
+                body=None
+            )
+        requests.append(kwargs)
+        return await create(**kwargs)
+
+    service.openai_client.chat.completions.create = create_without_stream_options
+    responses = [r async for r in service.get_llm_stream_response("context", "user", messages)]
+    assert responses[0].text == "こんにちは"
+    assert "stream_options" not in requests[-1]
+    assert service.include_usage is False
+
+
+@pytest.mark.asyncio
+async def test_chatgpt_service_tool_cancelled_after_stream():
+    """
+    Test that the tool dispatched while streaming is cancelled when the response is
+    cancelled after the stream ends (e.g. barge-in during on_before_tool_calls), without network access.
+    """
+    service = ChatGPTService(openai_api_key=OPENAI_API_KEY or "dummy", model=MODEL)
+    started = 0
+    cancelled = 0
+
+    @service.tool({"type": "function", "function": {"name": "get_weather", "parameters": {"type": "object", "properties": {}}}})
+    async def get_weather() -> Dict[str, Any]:
+        nonlocal started, cancelled
+        started += 1
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return {"weather": "clear"}
+
+    @service.on_before_tool_calls
+    async def on_before_tool_calls(tool_calls):
+        await asyncio.sleep(1.0)
+
+    async def create(**kwargs):
+        return FakeChatCompletionStream([
+            ChatCompletionChunk.model_validate({
+                "id": "1", "object": "chat.completion.chunk", "created": 0, "model": MODEL,
+                "choices": [{"index": 0, "delta": {"tool_calls": [{
+                    "index": 0, "id": "call_1", "type": "function", "function": {"name": "get_weather", "arguments": "{}"}
+                }]}}]
+            })
+        ])
+
+    service.openai_client.chat.completions.create = create
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "天気は？"}]
+    task = asyncio.create_task(service.get_llm_stream_response("context", "user", messages).__anext__())
+    await asyncio.sleep(0.1)
+
+    # Tool is dispatched while streaming and cancelled with the response
+    assert started == 1
+    task.cancel()
+    await asyncio.sleep(0.1)
+    assert cancelled == 1
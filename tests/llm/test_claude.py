@@ -252,3 +252,30 @@ async def test_claude_service_tool_calls():
 
     assert messages[3]["role"] == "assistant"
     assert "2" in messages[3]["content"][0]["text"]
+
+
+def test_claude_service_prompt_cache_request():
+    """
+    Test that cache breakpoints are set to the system prompt and the latest message
+    without modifying the messages that will be saved to the context.
+    """
+    service = ClaudeService(
+        anthropic_api_key=CLAUDE_API_KEY,
+        system_prompt=SYSTEM_PROMPT,
+        model=MODEL,
+        use_prompt_cache=True
+    )
+
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": "こんにちは"}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "こんにちは！"}]},
+        {"role": "user", "content": [{"type": "text", "text": "元気？"}]}
+    ]
+
+    request_messages, system = service.make_cache_controlled_request(messages, SYSTEM_PROMPT, "Use tools.")
+
+    assert system[0] == {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    assert system[1] == {"type": "text", "text": "Use tools."}
+    assert request_messages[:2] == messages[:2]
+    assert request_messages[2]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in messages[2]["content"][-1]
@@ -0,0 +1,38 @@
+from time import perf_counter
+import pytest
+from litests.llm.fake import FakeLLMService
+from litests.llm.context_manager import SQLiteContextManager
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_service(tmp_path):
+    llm = FakeLLMService(
+        response="Hello there. How are you?",
+        first_token_latency=0.1,
+        tokens_per_second=50,
+        context_manager=SQLiteContextManager(str(tmp_path / "context.db"))
+    )
+
+    start = perf_counter()
+    first_chunk_time = None
+    chunks = []
+    async for chunk in llm.chat_stream("context", "user", "Hi"):
+        if first_chunk_time is None:
+            first_chunk_time = perf_counter() - start
+        chunks.append(chunk)
+    elapsed = perf_counter() - start
+
+    # Split into sentences like the real services, at the token rate
+    assert [c.text for c in chunks if c.text] == ["Hello there. ", "How are you?"]
+    assert 0.1 <= first_chunk_time < 0.2
+    assert 0.18 <= elapsed < 0.3    # 0.1 + 4 tokens / 50 tps
+    usage = next(c.usage for c in chunks if c.usage)
+    assert (usage.input_tokens, usage.output_tokens) == (1, 5)
+
+    # Context is kept
+    llm.response = lambda messages: f"{len(messages)} messages"
+    llm.first_token_latency.mean = 0
+    llm.tokens_per_second = None
+    chunks = [c async for c in llm.chat_stream("context", "user", "Again")]
+    assert "".join(c.text for c in chunks) == "3 messages"
+    assert llm.request_count == 2
@@ -1,6 +1,8 @@
 import os
+from types import SimpleNamespace
 from typing import Any, Dict
 from uuid import uuid4
+from google.genai import types
 import pytest
 from litests.llm.gemini import GeminiService, ToolCall
 
@@ -253,3 +255,119 @@ async def test_gemini_service_tool_calls():
 
     assert messages[3]["role"] == "model"
     assert "2" in messages[3]["parts"][0]["text"]
+
+
+class FakeGeminiStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for c in self.chunks:
+            yield c
+
+    async def aclose(self):
+        pass
+
+
+def create_fake_gemini_client(prompt_tokens: int):
+    client = SimpleNamespace(requests=[], created=[], deleted=[])
+
+    async def generate_content_stream(**kwargs):
+        client.requests.append(kwargs)
+        return FakeGeminiStream([
+            types.GenerateContentResponse.model_validate({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "こんにちは"}]}}]
+            }),
+            types.GenerateContentResponse.model_validate({
+                "usage_metadata": {"prompt_token_count": 2000, "candidates_token_count": 5, "cached_content_token_count": 1500}
+            })
+        ])
+
+    async def count_tokens(**kwargs):
+        return SimpleNamespace(total_tokens=prompt_tokens)
+
+    async def create(**kwargs):
+        client.created.append(kwargs)
+        return SimpleNamespace(name=f"cachedContents/{len(client.created)}")
+
+    async def delete(name: str):
+        client.deleted.append(name)
+
+    client.aio = SimpleNamespace(
+        models=SimpleNamespace(generate_content_stream=generate_content_stream, count_tokens=count_tokens),
+        caches=SimpleNamespace(create=create, delete=delete)
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_gemini_service_prompt_cache_request_and_usage():
+    """
+    Test the request with cached content and the token usage, without network access.
+    """
+    service = GeminiService(
+        gemini_api_key=GEMINI_API_KEY or "dummy",
+        system_prompt=SYSTEM_PROMPT,
+        model=MODEL,
+        use_prompt_cache=True
+    )
+    service.gemini_client = create_fake_gemini_client(prompt_tokens=2000)
+
+    messages = [types.Content(role="user", parts=[types.Part.from_text(text="こんにちは")])]
+    responses = [r async for r in service.get_llm_stream_response("context", "user", messages)]
+
+    # System instruction is provided by the cached content
+    config = service.gemini_client.requests[0]["config"]
+    assert config.cached_content == "cachedContents/1"
+    assert config.system_instruction is None
+    assert service.gemini_client.created[0]["config"].system_instruction == SYSTEM_PROMPT
+
+    assert responses[0].text == "こんにちは"
+    usage = responses[1].usage
+    assert (usage.input_tokens, usage.output_tokens, usage.cached_tokens) == (2000, 5, 1500)
+
+
+@pytest.mark.asyncio
+async def test_gemini_service_cached_contents():
+    """
+    Test that short prompts are not cached and cached contents are bounded and deleted when expired or evicted.
+    """
+    service = GeminiService(
+        gemini_api_key=GEMINI_API_KEY or "dummy",
+        model=MODEL,
+        use_prompt_cache=True,
+        prompt_cache_min_tokens=1024,
+        prompt_cache_size=2
+    )
+
+    # Too short
+    service.gemini_client = create_fake_gemini_client(prompt_tokens=100)
+    assert await service.get_cached_content("short", None) is None
+    assert service.gemini_client.created == []
+
+    service = GeminiService(
+        gemini_api_key=GEMINI_API_KEY or "dummy",
+        model=MODEL,
+        use_prompt_cache=True,
+        prompt_cache_size=2
+    )
+    service.gemini_client = create_fake_gemini_client(prompt_tokens=2000)
+    client = service.gemini_client
+
+    assert await service.get_cached_content("prompt1", None) == "cachedContents/1"
+    assert await service.get_cached_content("prompt2", None) == "cachedContents/2"
+    assert await service.get_cached_content("prompt1", None) == "cachedContents/1"
+
+    # Least recently used one is evicted and deleted
+    assert await service.get_cached_content("prompt3", None) == "cachedContents/3"
+    assert client.deleted == ["cachedContents/2"]
+    assert len(service.cached_contents) == 2
+
+    # Expired one is deleted and created again
+    for key, (name, _) in service.cached_contents.items():
+        service.cached_contents[key] = (name, 0)
+    assert await service.get_cached_content("prompt1", None) == "cachedContents/4"
+    assert client.deleted == ["cachedContents/2", "cachedContents/1"]
@@ -0,0 +1,109 @@
+import pytest
+from litests.llm import ToolRouter
+from litests.llm.chatgpt import ChatGPTService
+
+
+def make_tool_spec(name: str, description: str):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": {}}
+        }
+    }
+
+
+def test_tool_router_route():
+    router = ToolRouter()
+    router.add_tool("get_weather", "Get the weather forecast of the location")
+    router.add_tool("play_music", "Play music on the speaker")
+    router.add_tool("search_memory", "Retrieve long-term memory about the user")
+    router.add_tool("get_schedule", "天気に関係なく、ユーザーの予定を取得します")
+
+    assert router.route("weather", "look up") == ["get_weather"]
+    assert router.route("music", "play") == ["play_music"]
+    assert router.route("long-term memory", "retrieve") == ["search_memory"]
+    assert router.route("ユーザーの予定", "取得") == ["get_schedule"]
+    assert router.route("stock price", "buy") == []
+    assert router.route("", "play") == []
+
+
+def test_tool_router_cache():
+    router = ToolRouter(cache_size=2)
+    key = router.make_key({"target": "  Weather ", "action": "look   up"})
+    assert key == "weather look up"
+
+    assert router.get_cache(key) is None
+    router.set_cache(key, ["get_weather"])
+    assert router.get_cache(key) == ["get_weather"]
+
+    # Least recently used key will be removed
+    router.set_cache("music play", ["play_music"])
+    router.set_cache("memory retrieve", ["search_memory"])
+    assert router.get_cache(key) is None
+    assert router.get_cache("memory retrieve") == ["search_memory"]
+
+    # Cache will be cleared when new tool is added
+    router.add_tool("get_weather", "Get the weather forecast")
+    assert router.get_cache("memory retrieve") is None
+
+
+def test_tool_router_similar_cache():
+    router = ToolRouter()
+    router.add_tool("get_weather", "Get the weather forecast of the location")
+    router.add_tool("play_music", "Play music on the speaker")
+    router.set_cache(router.make_key({"target": "music", "action": "play"}), ["play_music"])
+
+    # Near-duplicate key that differs only in common terms
+    assert router.get_cache(router.make_key({"target": "the music", "action": "play"})) == ["play_music"]
+    # Different target or action
+    assert router.get_cache(router.make_key({"target": "music", "action": "stop"})) is None
+    assert router.get_cache(router.make_key({"target": "weather", "action": "play"})) is None
+
+    # Exact match only
+    router.cache_similarity = 1.0
+    assert router.get_cache(router.make_key({"target": "the music", "action": "play"})) is None
+
+
+@pytest.mark.asyncio
+async def test_select_dynamic_tools():
+    service = ChatGPTService(openai_api_key="dummy", use_dynamic_tools=True)
+
+    weather_spec = make_tool_spec("get_weather", "Get the weather forecast of the location")
+    music_spec = make_tool_spec("play_music", "Play music on the speaker")
+
+    @service.tool(weather_spec)
+    async def get_weather(location: str = None):
+        return {"weather": "clear"}
+
+    @service.tool(music_spec)
+    async def play_music(title: str = None):
+        return {"result": "success"}
+
+    fallback_count = 0
+
+    async def get_dynamic_tools(messages, metadata = None):
+        nonlocal fallback_count
+        fallback_count += 1
+        return [music_spec]
+
+    service._get_dynamic_tools = get_dynamic_tools
+
+    # Selected locally
+    tools = await service.select_dynamic_tools([], {"target": "weather", "action": "look up"})
+    assert tools == [weather_spec]
+    assert fallback_count == 0
+
+    # Fallback to LLM and cache its result
+    tools = await service.select_dynamic_tools([], {"target": "song", "action": "start"})
+    assert tools == [music_spec]
+    assert fallback_count == 1
+    tools = await service.select_dynamic_tools([], {"target": "Song", "action": "start"})
+    assert tools == [music_spec]
+    assert fallback_count == 1
+
+    # Invalid arguments fallback to LLM
+    tools = await service.select_dynamic_tools([], None)
+    assert tools == [music_spec]
+    assert fallback_count == 2
@@ -0,0 +1,17 @@
+from time import perf_counter
+import pytest
+from litests.latency import LatencyDistribution
+from litests.stt.fake import FakeSpeechRecognizer
+
+
+@pytest.mark.asyncio
+async def test_fake_speech_recognizer():
+    stt = FakeSpeechRecognizer(text="こんにちは", latency=0.1)
+    start = perf_counter()
+    assert await stt.transcribe(b"\x00" * 100) == "こんにちは"
+    assert 0.1 <= perf_counter() - start < 0.15
+
+    stt = FakeSpeechRecognizer(text=lambda data: f"{len(data)} bytes", latency=LatencyDistribution(0.01, 0.005, seed=1))
+    assert await stt.transcribe(b"\x00" * 100) == "100 bytes"
+    assert stt.transcribe_count == 1
+    await stt.close()
@@ -0,0 +1,128 @@
+import asyncio
+from collections import Counter
+import pytest
+from litests.admission import PrioritySemaphore, AdmissionController, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_priority_semaphore():
+    semaphore = PrioritySemaphore(1)
+    await semaphore.acquire()
+    order = []
+
+    async def acquire(name, priority):
+        await semaphore.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        semaphore.release()
+
+    tasks = [
+        asyncio.create_task(acquire("new1", 1)),
+        asyncio.create_task(acquire("new2", 1)),
+        asyncio.create_task(acquire("cancelled", 0)),
+        asyncio.create_task(acquire("in_conversation", 0)),
+    ]
+    await asyncio.sleep(0.01)
+    tasks[2].cancel()
+    semaphore.release()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Smaller priority first, then arrival order. Cancelled waiter doesn't hold the slot
+    assert order == ["in_conversation", "new1", "new2"]
+    assert semaphore.value == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_controller_user_limit():
+    admission = AdmissionController(max_transactions_per_user=1)
+
+    async with admission.admit("user1"):
+        with pytest.raises(AdmissionRejected):
+            async with admission.admit("user1"):
+                pass
+        # Other users and superseding transactions are admitted
+        async with admission.admit("user2"):
+            pass
+        async with admission.admit("user1", supersedes=True):
+            pass
+
+    assert admission.user_transactions == {}
+    assert admission.rejected_count == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_controller_queue_wait():
+    admission = AdmissionController(max_transactions=1, max_queue_wait=0.1)
+    wait_times = Counter()
+
+    async def hold(duration):
+        async with admission.admit("user1"):
+            await asyncio.sleep(duration)
+
+    task = asyncio.create_task(hold(0.05))
+    await asyncio.sleep(0.01)
+    assert admission.is_busy()
+
+    # Wait in queue until the slot is released
+    async with admission.admit("user2", wait_times=wait_times):
+        pass
+    assert 0.03 < wait_times["transaction"] < 0.1
+    await task
+
+    # Rejected when waiting too long
+    task = asyncio.create_task(hold(0.3))
+    await asyncio.sleep(0.01)
+    with pytest.raises(AdmissionRejected):
+        async with admission.admit("user2"):
+            pass
+    await task
+    assert admission.rejected_count == 1
+    assert admission.transactions.value == 1
+
+    # Rejected immediately when max_queue_wait is 0
+    admission.max_queue_wait = 0
+    task = asyncio.create_task(hold(0.1))
+    await asyncio.sleep(0.01)
+    assert admission.will_queue() is False
+    with pytest.raises(AdmissionRejected):
+        async with admission.admit("user2"):
+            pass
+
+    # Superseding transaction waits for the slot released by the cancelled one, ahead of the others
+    order = []
+
+    async def admit(user_id, supersedes):
+        async with admission.admit(user_id, supersedes=supersedes):
+            order.append(user_id)
+
+    admission.max_queue_wait = 1.0
+    waiting_task = asyncio.create_task(admit("user2", False))
+    await asyncio.sleep(0.01)
+    admission.max_queue_wait = 0
+    await asyncio.gather(admit("user1", True), task, waiting_task)
+    assert order == ["user1", "user2"]
+
+
+@pytest.mark.asyncio
+async def test_admission_controller_stage_slot():
+    admission = AdmissionController(max_tts=2)
+    wait_times = Counter()
+    running = 0
+    max_running = 0
+
+    async def synthesize():
+        nonlocal running, max_running
+        async with admission.slot("tts", wait_times=wait_times):
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+
+    await asyncio.gather(*[synthesize() for _ in range(4)])
+    assert max_running == 2
+    assert wait_times["tts"] > 0.09
+
+    # No limit
+    async with admission.slot("stt", wait_times=wait_times):
+        pass
+    assert wait_times["stt"] == 0
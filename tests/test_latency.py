@@ -0,0 +1,20 @@
+import statistics
+from litests.latency import LatencyDistribution, to_latency_distribution
+
+
+def test_latency_distribution():
+    for distribution in ["normal", "lognormal", "uniform"]:
+        latency = LatencyDistribution(0.2, 0.05, distribution=distribution, seed=1)
+        samples = [latency.sample() for _ in range(5000)]
+        assert abs(statistics.mean(samples) - 0.2) < 0.005
+        assert abs(statistics.stdev(samples) - 0.05) < 0.005
+        assert min(samples) >= 0
+
+        # Deterministic with seed
+        same_seed = LatencyDistribution(0.2, 0.05, distribution=distribution, seed=1)
+        assert samples[:10] == [same_seed.sample() for _ in range(10)]
+
+    assert LatencyDistribution(0.1).sample() == 0.1
+    assert LatencyDistribution(0.1, 1.0, minimum=0.05).sample() >= 0.05
+    assert to_latency_distribution(0.3).sample() == 0.3
+    assert to_latency_distribution(None).sample() == 0.0
@@ -0,0 +1,42 @@
+import json
+import pytest
+from litests.llm import ToolCall, LLMResponse
+from litests.models import STSRequest, STSResponse, chunk_metadata
+
+
+def test_slots():
+    for obj in [STSRequest(), STSResponse(type="chunk"), LLMResponse(context_id="ctx"), ToolCall()]:
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.unknown = 1
+
+
+def test_metadata():
+    # None by default and modifiable once set
+    response = STSResponse(type="final")
+    assert response.metadata is None
+    response.metadata = {"key": "value"}
+    response.metadata["key2"] = "value2"
+    assert json.dumps(response.metadata) == '{"key": "value", "key2": "value2"}'
+
+    # Metadata of chunks is a plain dict for each chunk
+    assert chunk_metadata(True) == {"is_first_chunk": True, "is_filler": False}
+    assert chunk_metadata(False, True) == {"is_first_chunk": False, "is_filler": True}
+    assert chunk_metadata(True) is not chunk_metadata(True)
+    chunk = STSResponse(type="chunk", session_id="session", text="Hello.", metadata=chunk_metadata(True))
+    chunk.metadata["key"] = "value"
+    assert json.loads(json.dumps({"type": chunk.type, "text": chunk.text, "metadata": chunk.metadata})) == {
+        "type": "chunk", "text": "Hello.", "metadata": {"is_first_chunk": True, "is_filler": False, "key": "value"}
+    }
+    assert chunk_metadata(True) == {"is_first_chunk": True, "is_filler": False}
+
+    # Metadata given explicitly
+    assert STSResponse(type="final", metadata={"error": "Error"}).metadata["error"] == "Error"
+
+
+def test_tool_call_to_dict():
+    tool_call = ToolCall(id="call_1", name="get_weather", arguments={"location": "Tokyo"})
+    assert tool_call.to_dict() == {
+        "id": "call_1", "name": "get_weather", "arguments": {"location": "Tokyo"},
+        "is_cached": False, "start_ns": 0, "end_ns": 0
+    }
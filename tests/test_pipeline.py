@@ -1,16 +1,28 @@
 import asyncio
+import json
 import os
+from time import perf_counter
 import pytest
 import numpy
 from litests import LiteSTS
+from litests.admission import AdmissionController
 from litests.vad import SpeechDetectorDummy
 from litests.vad.standard import StandardSpeechDetector
 from litests.stt import SpeechRecognizerDummy
 from litests.stt.google import GoogleSpeechRecognizer
+from litests.stt.fake import FakeSpeechRecognizer
+from litests.llm import LLMResponse, ToolCall
 from litests.llm.chatgpt import ChatGPTService
+from litests.llm.context_manager import SQLiteContextManager
+from litests.llm.fake import FakeLLMService
 from litests.tts import SpeechSynthesizerDummy
+from litests.tts.cache import CachedSpeechSynthesizer
+from litests.tts.fake import FakeSpeechSynthesizer
 from litests.tts.voicevox import VoicevoxSpeechSynthesizer
+from litests.tts.audio import AudioChunk, AudioFormat
 from litests.performance_recorder.sqlite import SQLitePerformanceRecorder
+from litests.tracer import Tracer, InMemorySpanExporter
+from litests.voice_recorder.file import FileVoiceRecorder
 from litests.models import STSRequest, STSResponse
 from litests.adapter import Adapter
 
@@ -355,3 +367,644 @@ async def test_lite_sts_pipeline_with_user():
     await lite_sts.shutdown()
     await voicevox_for_input.close()
     await stt_for_final.close()
+
+
+def create_fake_sts(tmp_path, llm, tts, tts_lookahead = 3, tts_streaming = False):
+    return LiteSTS(
+        vad=SpeechDetectorDummy(),
+        stt=SpeechRecognizerDummy(),
+        llm=llm,
+        tts=tts,
+        tts_lookahead=tts_lookahead,
+        tts_streaming=tts_streaming,
+        performance_recorder=SQLitePerformanceRecorder(str(tmp_path / "performance.db")),
+        voice_recorder=FileVoiceRecorder(record_dir=str(tmp_path / "recorded_voices")),
+        voice_recorder_enabled=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_lookahead(tmp_path):
+    tts = FakeSpeechSynthesizer(latency=0.1, latencies={"One.": 0.3})
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two. Three. Four.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts,
+        tts_lookahead=3
+    )
+
+    start = perf_counter()
+    chunks = []
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        if response.type == "chunk":
+            chunks.append((response.text, response.audio_data))
+    elapsed = perf_counter() - start
+
+    # Delivered in order while synthesized concurrently
+    assert chunks == [(t, tts.make_audio(t.strip())) for t in ["One. ", "Two. ", "Three. ", "Four."]]
+    assert tts.max_running == 3
+    assert elapsed < 0.5
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_prefetch(tmp_path):
+    tts = FakeSpeechSynthesizer(latency=0.2)
+    prefetched = []
+
+    async def prefetch(text, style_info = None, language = None):
+        prefetched.append((text, tts.running))
+
+    tts.prefetch = prefetch
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two. Three.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts,
+        tts_lookahead=1
+    )
+
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        pass
+
+    # Upcoming segments are prefetched while the current one is synthesized
+    assert [text for text, _ in prefetched] == ["One.", "Two.", "Three."]
+    assert prefetched[1] == ("Two.", 1)
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_lookahead_cancel(tmp_path):
+    tts = FakeSpeechSynthesizer(latency=0.5, latencies={"One.": 0.1})
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two. Three. Four.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts,
+        tts_lookahead=3
+    )
+
+    texts = []
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        if response.type == "chunk":
+            texts.append(response.text)
+            # New transaction started in this session
+            lite_sts.active_transactions["session"] = "new_transaction"
+
+    assert texts == ["One. "]
+    assert tts.cancelled == 2
+    assert tts.running == 0
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_streaming(tmp_path):
+    tts = FakeSpeechSynthesizer(latencies={"One two three.": 0.4, "Four five.": 0.2}, stream_chunk_count=4)
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One two three. Four five.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts,
+        tts_streaming=True
+    )
+
+    start = perf_counter()
+    first_chunk_time = None
+    chunks = []
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        if response.type == "chunk":
+            if first_chunk_time is None:
+                first_chunk_time = perf_counter() - start
+            chunks.append((response.text, response.audio_data))
+        elif response.type == "final":
+            final_response = response
+
+    # Sub-sentence audio chunks are sent as they arrive and text is sent with the first one of each sentence
+    assert [text for text, _ in chunks] == ["One two three. ", "", "", "", "Four five.", "", "", ""]
+    assert b"".join(audio for _, audio in chunks[:4]) == tts.make_audio("One two three.")
+    assert first_chunk_time < 0.2
+    assert final_response.text == "One two three. Four five."
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_output_audio_format(tmp_path):
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="Hello. World.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        FakeSpeechSynthesizer(),
+    )
+    lite_sts.output_audio_format = AudioFormat("wav", 16000)
+
+    audios = []
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi")):
+        if response.type == "chunk":
+            audios.append(response.audio_data)
+
+    # Audio (24kHz by default) is transcoded to WAV in the declared format
+    chunks = [AudioChunk.from_wav(a) for a in audios]
+    assert [c.sample_rate for c in chunks] == [16000, 16000]
+
+    # Validated when set after the pipeline is built (e.g. by adapter)
+    with pytest.raises(ValueError):
+        lite_sts.output_audio_format = AudioFormat("mp3")
+
+    class CompressedSpeechSynthesizer(FakeSpeechSynthesizer):
+        def create_audio_decoder(self):
+            raise ValueError("Compressed audio can't be decoded")
+
+    lite_sts.tts = CompressedSpeechSynthesizer()
+    with pytest.raises(ValueError):
+        lite_sts.output_audio_format = AudioFormat("pcm")
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_startup(tmp_path):
+    tts = FakeSpeechSynthesizer(style_mapper={"[face:joy]": "happy", "[face:fun]": "happy", "[face:angry]": "angry"})
+    synthesized_styles = []
+    original_synthesize = tts.synthesize
+
+    async def synthesize(text, style_info = None, language = None):
+        synthesized_styles.append(tts.parse_style(style_info))
+        return await original_synthesize(text, style_info, language)
+
+    tts.synthesize = synthesize
+
+    ping_count = 0
+
+    async def ping():
+        nonlocal ping_count
+        ping_count += 1
+
+    tts.ping = ping
+
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts
+    )
+
+    await lite_sts.startup(keepalive_interval=0.1)
+
+    # Warmup opens connection without synthesizing (billed by most providers)
+    assert synthesized_styles == []
+    assert ping_count == 1
+
+    # Idle connections are kept alive
+    await asyncio.sleep(0.35)
+    assert ping_count >= 3
+
+    await lite_sts.shutdown()
+    assert lite_sts.keepalive_task is None
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_carry_style(tmp_path):
+    tts = FakeSpeechSynthesizer(latencies={"Hey.": 0.3}, style_mapper={"[face:Angry]": "angry", "[face:Joy]": "joy"})
+    styles = {}
+    original_synthesize = tts.synthesize
+
+    async def synthesize(text, style_info = None, language = None):
+        styles[text] = tts.parse_style(style_info)
+        return await original_synthesize(text, style_info, language)
+
+    tts.synthesize = synthesize
+
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="[face:Angry]Hey. Stop it. [face:Joy]Thanks. Bye.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts
+    )
+    lite_sts.tts_carry_style = True
+
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi")):
+        pass
+
+    assert styles == {"Hey.": "angry", "Stop it.": "angry", "Thanks.": "joy", "Bye.": "joy"}
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_stages(tmp_path):
+    tts = FakeSpeechSynthesizer(latency=0.3)
+    llm = FakeLLMService(response="One. Two. Three. Four. Five.", context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    lite_sts = create_fake_sts(tmp_path, llm, tts, tts_lookahead=2)
+
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    llm_done_time = None
+    original_stream = llm.get_llm_stream_response
+
+    async def get_llm_stream_response(*args, **kwargs):
+        nonlocal llm_done_time
+        async for chunk in original_stream(*args, **kwargs):
+            yield chunk
+        llm_done_time = perf_counter() - start
+
+    llm.get_llm_stream_response = get_llm_stream_response
+
+    start = perf_counter()
+    texts = []
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        if response.type == "chunk":
+            texts.append(response.text)
+
+    # LLM stream is consumed without waiting for slow TTS
+    assert texts == ["One. ", "Two. ", "Three. ", "Four. ", "Five."]
+    assert llm_done_time < 0.1
+    assert tts.max_running == 2
+
+    # Queue depth and wait time of each stage
+    stage_stats = json.loads(records[0].stage_stats)
+    assert stage_stats["llm"]["count"] == 7    # 5 chunks + usage + end of stream
+    assert stage_stats["tts"]["count"] == 5
+    assert stage_stats["tts"]["max_depth"] <= 2
+    assert stage_stats["emit"]["wait_time"] > 0
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tts_metrics(tmp_path):
+    tts = CachedSpeechSynthesizer(FakeSpeechSynthesizer(latency=0.1))
+    llm = FakeLLMService(response="Hello. Hello. Bye.", context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    lite_sts = create_fake_sts(tmp_path, llm, tts, tts_lookahead=1)
+
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Greet")):
+        pass
+
+    # Measured by TTS workers of this request
+    assert (records[0].tts_cache_hits, records[0].tts_cache_misses) == (1, 2)
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_concurrent_stt(tmp_path):
+    class SlowContextManager(SQLiteContextManager):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.get_histories_count = 0
+
+        async def get_histories(self, context_id, limit = 100):
+            self.get_histories_count += 1
+            await asyncio.sleep(0.2)
+            return await super().get_histories(context_id, limit)
+
+    class SlowSpeechRecognizer(SpeechRecognizerDummy):
+        async def transcribe(self, data):
+            await asyncio.sleep(0.2)
+            return "Hello"
+
+    context_manager = SlowContextManager(str(tmp_path / "context.db"))
+    await context_manager.add_histories("context", [{"role": "user", "content": "Hi"}])
+    llm = FakeLLMService(response="Hi.", context_manager=context_manager)
+    histories = []
+
+    async def compose_messages(context_id, text, files = None, system_prompt_params = None):
+        histories.extend(await llm.get_histories(context_id))
+        return [{"role": "user", "content": text}]
+
+    llm.compose_messages = compose_messages
+
+    lite_sts = create_fake_sts(tmp_path, llm, FakeSpeechSynthesizer())
+    lite_sts.stt = SlowSpeechRecognizer()
+
+    stopped_context_ids = []
+
+    async def stop_response(session_id, context_id):
+        stopped_context_ids.append(context_id)
+
+    lite_sts.stop_response = stop_response
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", context_id="context", audio_data=b"\x00" * 100)):
+        pass
+
+    # Fetching histories runs at the same time as STT
+    assert records[0].llm_first_chunk_time < 0.3
+    assert histories == [{"role": "user", "content": "Hi"}]
+    assert stopped_context_ids == ["context"]
+    assert context_manager.get_histories_count == 1
+    assert llm.prefetched_histories == {}
+
+    # Response is stopped with the context_id created for new session
+    async for response in lite_sts.invoke(STSRequest(session_id="session2", user_id="user", text="Hello")):
+        if response.type == "start":
+            new_context_id = response.context_id
+    assert stopped_context_ids[-1] == new_context_id is not None
+
+    # Response is not stopped by noise
+    lite_sts.stt = SpeechRecognizerDummy()
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", context_id="context", audio_data=b"\x00" * 100)):
+        pass
+    assert len(stopped_context_ids) == 2
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_barge_in(tmp_path):
+    class TrackingLLMService(FakeLLMService):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.yielded = 0
+            self.closed = 0
+
+        async def get_llm_stream_response(self, context_id, user_id, messages, system_prompt_params = None):
+            try:
+                async for chunk in super().get_llm_stream_response(context_id, user_id, messages, system_prompt_params):
+                    self.yielded += 1
+                    yield chunk
+            finally:
+                self.closed += 1
+
+    # 10 sentences of 2 tokens streamed in 0.5 sec
+    response_text = "".join(f"Sentence {i}. " for i in range(10))
+    llm = TrackingLLMService(response=response_text, tokens_per_second=40, context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    tts = FakeSpeechSynthesizer(latency=0.2)
+    lite_sts = create_fake_sts(tmp_path, llm, tts, tts_lookahead=2)
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    async def invoke(text):
+        return [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text=text))]
+
+    first_task = asyncio.create_task(invoke("First"))
+    await asyncio.sleep(0.3)
+    assert tts.running == 2
+
+    # New request in the same session cancels LLM stream and syntheses of the previous one immediately
+    llm.response = "OK."
+    second_task = asyncio.create_task(invoke("Second"))
+    start = perf_counter()
+    first_responses = await first_task
+    assert perf_counter() - start < 0.1
+    assert first_responses[-1].type == "final"
+    assert tts.cancelled == 2
+    assert llm.closed == 1
+    assert llm.yielded < len(llm.tokenize(response_text))
+
+    second_responses = await second_task
+    assert [r.text for r in second_responses if r.type == "chunk"] == ["OK."]
+    assert lite_sts.stage_groups == {}
+
+    # Discarded work is recorded
+    first_record = next(r for r in records if r.request_text == "First")
+    assert first_record.cancelled_tts_segments == 2
+    assert first_record.cancelled_llm_chunks >= 2
+    assert first_record.cancelled_tts_time > 0
+
+    # Stages are cancelled when the consumer stops iterating (e.g. client disconnected)
+    llm.response = response_text
+    llm.closed = 0
+    lite_sts.tracer = Tracer(InMemorySpanExporter())
+    tts.cancelled = 0
+    responses = lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Third"))
+    async for response in responses:
+        if response.type == "chunk":
+            break
+    await responses.aclose()
+    assert llm.closed == 1
+    assert tts.running == 0
+    assert tts.cancelled >= 1
+    assert lite_sts.stage_groups == {}
+    assert lite_sts.tracer.traces == {}
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_tracing(tmp_path):
+    tts = FakeSpeechSynthesizer(latencies={"One.": 0.2, "Two.": 0.05})
+    exporter = InMemorySpanExporter()
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts
+    )
+    lite_sts.tracer = Tracer(exporter)
+
+    async for response in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Count")):
+        pass
+
+    invoke_span = exporter.get_spans("invoke")[0]
+    assert invoke_span.parent_span_id is None
+    assert invoke_span.attributes["context_id"] == response.context_id
+
+    # Child spans in the same trace
+    llm_span = exporter.get_spans("llm")[0]
+    tts_spans = exporter.get_spans("tts")
+    assert {s.trace_id for s in exporter.spans} == {invoke_span.trace_id}
+    assert llm_span.parent_span_id == invoke_span.span_id
+    assert [s.attributes["text"] for s in tts_spans] == ["One.", "Two."]
+    assert all(s.parent_span_id == invoke_span.span_id for s in tts_spans)
+
+    # Per-sentence latency and gap waiting for the previous sentence
+    assert 0.2 <= tts_spans[0].duration < 0.3
+    assert tts_spans[1].duration < 0.1
+    assert tts_spans[1].attributes["emit_wait"] > 0.1
+    assert invoke_span.start_ns <= llm_span.start_ns <= llm_span.end_ns <= invoke_span.end_ns
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_admission(tmp_path):
+    tts = FakeSpeechSynthesizer(latencies={"One.": 0.2})
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts
+    )
+    lite_sts.admission_controller = AdmissionController(max_transactions=1, max_transactions_per_user=1, max_queue_wait=1.0)
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    async def invoke(session_id, user_id):
+        return [r async for r in lite_sts.invoke(STSRequest(session_id=session_id, user_id=user_id, text="Hi"))]
+
+    first_task = asyncio.create_task(invoke("session1", "user1"))
+    await asyncio.sleep(0.05)
+
+    # Same user in another session is rejected immediately
+    rejected = await invoke("session2", "user1")
+    assert [r.type for r in rejected] == ["final"]
+    assert rejected[0].metadata["rejected"] is True
+
+    # Other user waits with "wait" response until the slot is released
+    second_responses = await invoke("session3", "user2")
+    assert [r.type for r in second_responses] == ["wait", "start", "chunk", "final"]
+    await first_task
+
+    second_record = next(r for r in records if r.user_id == "user2")
+    assert second_record.queue_wait_time > 0.1
+
+    # Rejected without "wait" when requests are not queued
+    lite_sts.admission_controller.max_queue_wait = 0
+    tts.latencies = {"One.": 1.0}
+    first_task = asyncio.create_task(invoke("session1", "user1"))
+    await asyncio.sleep(0.05)
+    rejected = await invoke("session3", "user2")
+    assert [r.type for r in rejected] == ["final"]
+
+    # Barge-in takes over the slot of the transaction that it cancels
+    lite_sts.llm.response = "Two."
+    tts.latencies["Two."] = 0.0
+    start = perf_counter()
+    barge_in_responses = await invoke("session1", "user1")
+    assert [r.type for r in barge_in_responses] == ["start", "chunk", "final"]
+    first_responses = await first_task
+    assert perf_counter() - start < 0.5
+    assert [r.text for r in barge_in_responses if r.type == "chunk"] == ["Two."]
+    assert [r.text for r in first_responses if r.type == "chunk"] == []
+
+    # Noise doesn't take over the slot of the on-going response
+    lite_sts.stt = FakeSpeechRecognizer(text="")
+    tts.latencies["Two."] = 0.2
+    first_task = asyncio.create_task(invoke("session1", "user1"))
+    await asyncio.sleep(0.05)
+    noise_responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session1", user_id="user1", audio_data=b"\x00" * 3200))]
+    assert noise_responses == []
+    first_responses = await first_task
+    assert [r.text for r in first_responses if r.type == "chunk"] == ["Two."]
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_filler(tmp_path):
+    class ToolCallingLLMService(FakeLLMService):
+        async def get_llm_stream_response(self, context_id, user_id, messages, system_prompt_params = None):
+            yield LLMResponse(context_id=context_id, tool_call=ToolCall("call_1", "get_weather", "{}"))
+            await asyncio.sleep(0.3)
+            yield LLMResponse(context_id=context_id, text="Sunny.")
+
+    tts = FakeSpeechSynthesizer(latencies={"Hello.": 0.02, "Sunny.": 0.05, "Well...": 0.05})
+    llm = FakeLLMService(response="Hello.", first_token_latency=0.3, context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    lite_sts = create_fake_sts(tmp_path, llm, tts)
+    lite_sts.filler_phrases = ["Well..."]
+    lite_sts.filler_delay = 0.1
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    # Fillers are synthesized at startup
+    await lite_sts.startup()
+    assert lite_sts.filler_audios == [tts.make_audio("Well...")]
+
+    # Filler is sent when no audio is sent within filler_delay
+    chunks = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi")) if r.type == "chunk"]
+    assert [(c.audio_data, c.metadata["is_filler"]) for c in chunks] == [(tts.make_audio("Well..."), True), (tts.make_audio("Hello."), False)]
+    # The first chunk of the response is the one after filler
+    assert [c.metadata["is_first_chunk"] for c in chunks] == [False, True]
+    assert chunks[0].text == ""
+    assert records[-1].filler_count == 1
+    assert 0.1 <= records[-1].filler_time < 0.2
+
+    # No filler when audio is sent in time
+    lite_sts.llm = FakeLLMService(response="Hello.", context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    chunks = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi")) if r.type == "chunk"]
+    assert [c.audio_data for c in chunks] == [tts.make_audio("Hello.")]
+    assert records[-1].filler_count == 0
+
+    # Filler is sent when tools are called
+    lite_sts.llm = ToolCallingLLMService(context_manager=SQLiteContextManager(str(tmp_path / "context.db")))
+    lite_sts.filler_delay = 10.0
+    responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Weather?"))]
+    assert [(r.type, r.audio_data) for r in responses if r.type in ("tool_call", "chunk")] == [
+        ("tool_call", None), ("chunk", tts.make_audio("Well...")), ("chunk", tts.make_audio("Sunny."))
+    ]
+    assert responses[-1].text == "Sunny."
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_voice_recorder(tmp_path):
+    class EchoSpeechRecognizer(SpeechRecognizerDummy):
+        async def transcribe(self, data):
+            return "Hello"
+
+    class SlowVoiceRecorder(FileVoiceRecorder):
+        async def save_voice(self, id, voice_bytes, audio_format):
+            await asyncio.sleep(0.2)
+            await super().save_voice(id, voice_bytes, audio_format)
+
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        FakeSpeechSynthesizer()
+    )
+    lite_sts.stt = EchoSpeechRecognizer()
+    lite_sts.voice_recorder = SlowVoiceRecorder(record_dir=str(tmp_path / "recorded_voices"), max_queue_size=2)
+    lite_sts.voice_recorder_enabled = True
+    records = []
+    lite_sts.performance_recorder.record = records.append
+
+    # Recording doesn't block the transaction
+    start = perf_counter()
+    responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", audio_data=b"\x00\x01" * 1600))]
+    assert perf_counter() - start < 0.2
+    assert [r.audio_data for r in responses if r.type == "chunk"] == [lite_sts.tts.make_audio("One."), lite_sts.tts.make_audio("Two.")]
+    assert records[-1].voice_recordings_dropped == 0
+    transaction_id = records[-1].transaction_id
+
+    # Dropped when the queue is full (voices of the previous transaction are still being saved)
+    responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", audio_data=b"\x00\x01" * 1600))]
+    assert [r.audio_data for r in responses if r.type == "chunk"] == [lite_sts.tts.make_audio("One."), lite_sts.tts.make_audio("Two.")]
+    assert records[-1].voice_recordings_dropped > 0
+    assert lite_sts.voice_recorder.dropped_count == records[-1].voice_recordings_dropped
+
+    await asyncio.sleep(0.8)
+    record_dir = tmp_path / "recorded_voices"
+    assert (record_dir / f"{transaction_id}_request.wav").read_bytes()[44:] == b"\x00\x01" * 1600
+    assert (record_dir / f"{transaction_id}_response_0.wav").read_bytes() == lite_sts.tts.make_audio("One.")
+    assert (record_dir / f"{transaction_id}_response_1.wav").read_bytes() == lite_sts.tts.make_audio("Two.")
+
+    await lite_sts.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lite_sts_pipeline_voice_recorder_stream(tmp_path):
+    tts = FakeSpeechSynthesizer()
+    lite_sts = create_fake_sts(
+        tmp_path,
+        FakeLLMService(response="One. Two.", context_manager=SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts,
+        tts_streaming=True
+    )
+    lite_sts.voice_recorder_enabled = True
+    records = []
+    lite_sts.performance_recorder.record = records.append
+    record_dir = tmp_path / "recorded_voices"
+
+    # Streamed parts are recorded as a file for each segment in the encoding of output
+    lite_sts.output_audio_format = AudioFormat("pcm")
+    responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi"))]
+    assert len([r for r in responses if r.type == "chunk"]) == 2 * tts.stream_chunk_count
+    pcm_transaction_id = records[-1].transaction_id
+
+    lite_sts.output_audio_format = AudioFormat("wav")
+    responses = [r async for r in lite_sts.invoke(STSRequest(session_id="session", user_id="user", text="Hi"))]
+    wav_transaction_id = records[-1].transaction_id
+
+    # Queued voices are saved at shutdown
+    await lite_sts.shutdown()
+    assert sorted(p.name for p in record_dir.iterdir()) == sorted([
+        f"{pcm_transaction_id}_response_0.pcm", f"{pcm_transaction_id}_response_1.pcm",
+        f"{wav_transaction_id}_response_0.wav", f"{wav_transaction_id}_response_1.wav"
+    ])
+    expected = AudioChunk.from_wav(tts.make_audio("One."))
+    assert (record_dir / f"{pcm_transaction_id}_response_0.pcm").read_bytes() == expected.data
+    recorded = AudioChunk.from_wav((record_dir / f"{wav_transaction_id}_response_0.wav").read_bytes())
+    assert (recorded.data, recorded.sample_rate) == (expected.data, expected.sample_rate)
+
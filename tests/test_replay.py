@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from litests import LiteSTS
+from litests.vad import SpeechDetectorDummy
+from litests.stt import SpeechRecognizerDummy
+from litests.llm import LLMService, LLMResponse
+from litests.llm.context_manager import SQLiteContextManager
+from litests.tts import SpeechSynthesizerDummy
+from litests.performance_recorder.sqlite import SQLitePerformanceRecorder
+from litests.voice_recorder import RequestVoice
+from litests.voice_recorder.file import FileVoiceRecorder
+from litests.replay import Replayer, load_requests
+
+
+class FakeSpeechRecognizer(SpeechRecognizerDummy):
+    async def transcribe(self, data):
+        await asyncio.sleep(0.05)
+        return f"{len(data)} bytes"
+
+
+class FakeLLMService(LLMService):
+    def __init__(self, context_manager):
+        super().__init__(system_prompt=None, model=None, context_manager=context_manager)
+
+    async def compose_messages(self, context_id, text, files = None, system_prompt_params = None):
+        return [{"role": "user", "content": text}]
+
+    async def update_context(self, context_id, messages, response_text):
+        pass
+
+    async def get_llm_stream_response(self, context_id, user_id, messages, system_prompt_params = None):
+        await asyncio.sleep(0.05)
+        yield LLMResponse(context_id=context_id, text="Hello. ")
+        yield LLMResponse(context_id=context_id, text="Bye.")
+
+
+class FakeSpeechSynthesizer(SpeechSynthesizerDummy):
+    async def synthesize(self, text, style_info = None, language = None):
+        await asyncio.sleep(0.05)
+        return text.encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_load_requests(tmp_path):
+    # Request voices recorded by FileVoiceRecorder
+    voice_recorder = FileVoiceRecorder(record_dir=str(tmp_path / "voices"), sample_rate=16000)
+    await voice_recorder.record(RequestVoice("transaction1", b"\x00\x01" * 16000))
+    await voice_recorder.record(RequestVoice("transaction2", b"\x00\x01" * 8000))
+    await asyncio.sleep(0.1)
+    await voice_recorder.stop()
+
+    requests = load_requests(str(tmp_path / "voices"))
+    assert [r.name for r in requests] == ["transaction1_request", "transaction2_request"]
+    assert requests[0].audio_data == b"\x00\x01" * 16000     # Without header
+    assert requests[0].audio_duration == 1.0
+
+    # Transcript file
+    (tmp_path / "transcript.txt").write_text("Hello\n\nHow are you?\n", encoding="utf-8")
+    requests = load_requests(str(tmp_path / "transcript.txt"))
+    assert [(r.name, r.text) for r in requests] == [("line_1", "Hello"), ("line_3", "How are you?")]
+
+
+@pytest.mark.asyncio
+async def test_replayer(tmp_path):
+    sts = LiteSTS(
+        vad=SpeechDetectorDummy(),
+        stt=FakeSpeechRecognizer(),
+        llm=FakeLLMService(SQLiteContextManager(str(tmp_path / "context.db"))),
+        tts=FakeSpeechSynthesizer(),
+        performance_recorder=SQLitePerformanceRecorder(str(tmp_path / "performance.db")),
+        voice_recorder_enabled=False
+    )
+    original_recorder = sts.performance_recorder
+
+    (tmp_path / "transcript.txt").write_text("\n".join(f"Request {i}" for i in range(8)), encoding="utf-8")
+    requests = load_requests(str(tmp_path / "transcript.txt"))
+
+    report = await Replayer(sts, concurrency=4).run(requests)
+    summary = report.to_dict()
+
+    assert summary["requests"] == 8
+    assert summary["errors"] == 0
+    # 2 rounds of 4 concurrent requests that take about 0.1 sec for the first audio
+    assert summary["throughput"] > 8 / 0.6
+    assert 0.1 <= summary["ttfa"]["p50"] < 0.2
+    assert set(summary["stages"]["llm_first_chunk_time"]) == {"mean", "p50", "p90", "p95", "p99", "max"}
+    assert all(r.record is not None for r in report.results)
+    assert "Throughput" in report.format()
+    assert sts.performance_recorder is original_recorder
+
+    # Arrival rate
+    report = await Replayer(sts, concurrency=8, rate=20).run(requests[:4])
+    assert report.elapsed >= 0.15
+
+    await sts.shutdown()
@@ -0,0 +1,83 @@
+import asyncio
+from time import time_ns
+import pytest
+from litests.tracer import Tracer, InMemorySpanExporter
+from litests.tracer.otlp import OTLPSpanExporter
+
+
+@pytest.mark.asyncio
+async def test_tracer():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter)
+
+    root = tracer.start_span("invoke", session_id="session")
+    with tracer.span("stt", root):
+        await asyncio.sleep(0.05)
+    with pytest.raises(ValueError):
+        with tracer.span("llm", root):
+            raise ValueError("error")
+
+    # Spans are exported when the root span ends
+    assert exporter.spans == []
+    tracer.end_span(root, context_id="context")
+    assert [s.name for s in exporter.spans] == ["invoke", "stt", "llm"]
+    assert tracer.traces == {}
+
+    stt_span = exporter.get_spans("stt")[0]
+    assert stt_span.trace_id == root.trace_id
+    assert stt_span.parent_span_id == root.span_id
+    assert 0.05 <= stt_span.duration < 0.1
+    assert exporter.get_spans("llm")[0].attributes["error"] == "ValueError('error')"
+    assert root.attributes == {"session_id": "session", "context_id": "context"}
+
+    # Monotonic time is converted to wall clock time
+    assert abs(root.start_unix_ns - time_ns()) < 1e9
+
+
+def test_tracer_unfinished_span():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter)
+
+    root = tracer.start_span("invoke")
+    child = tracer.start_span("tts", root, index=0)
+    tracer.end_span(root)
+
+    # Child not ended is ended with the root
+    exported_child = exporter.get_spans("tts")[0]
+    assert exported_child.end_ns == root.end_ns
+    assert exported_child.end_unix_ns >= exported_child.start_unix_ns
+    assert exported_child.attributes == {"index": 0, "unfinished": True}
+
+    # Updates after the export don't affect the exported spans
+    tracer.end_span(child, error="CancelledError()")
+    child.set_attribute("emit_wait", 0.1)
+    assert exported_child is not child
+    assert exported_child.attributes == {"index": 0, "unfinished": True}
+
+
+def test_otlp_exporter():
+    tracer = Tracer()
+    root = tracer.start_span("invoke", user_id="user")
+    child = tracer.start_span("tts", root, index=0, queue_wait=0.1, is_cached=False)
+    tracer.end_span(child, error="TimeoutError()")
+    tracer.end_span(root)
+
+    exporter = OTLPSpanExporter(endpoint="http://localhost:4318/v1/traces", service_name="test")
+    otlp = exporter.to_otlp([root, child])
+    exporter.close()
+
+    resource_spans = otlp["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "test"}}]
+    spans = resource_spans["scopeSpans"][0]["spans"]
+    assert spans[0]["parentSpanId"] == ""
+    assert spans[1]["parentSpanId"] == root.span_id
+    assert spans[1]["traceId"] == root.trace_id
+    assert len(spans[1]["traceId"]) == 32 and len(spans[1]["spanId"]) == 16
+    assert spans[1]["attributes"] == [
+        {"key": "index", "value": {"intValue": "0"}},
+        {"key": "queue_wait", "value": {"doubleValue": 0.1}},
+        {"key": "is_cached", "value": {"boolValue": False}},
+        {"key": "error", "value": {"stringValue": "TimeoutError()"}},
+    ]
+    assert spans[1]["status"] == {"code": 2}
+    assert int(spans[1]["endTimeUnixNano"]) - int(spans[1]["startTimeUnixNano"]) == child.end_ns - child.start_ns
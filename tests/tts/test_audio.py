@@ -0,0 +1,88 @@
+import numpy
+import pytest
+from litests.tts import SpeechSynthesizer
+from litests.tts.audio import AudioChunk, AudioChunkDecoder, AudioFormat, AudioTranscoder, transcode
+
+
+def make_wav(sample_rate: int = 24000, channels: int = 1, frames: int = 2400) -> bytes:
+    samples = (numpy.sin(numpy.arange(frames * channels) / 10) * 10000).astype("<i2")
+    return AudioChunk(samples.tobytes(), sample_rate, channels, 2).to_wav()
+
+
+class WavSpeechSynthesizer(SpeechSynthesizer):
+    async def synthesize(self, text, style_info = None, language = None):
+        return make_wav()
+
+    async def synthesize_stream(self, text, style_info = None, language = None):
+        wav = make_wav()
+        # Split in the middle of header and frames
+        for i in range(0, len(wav), 1001):
+            yield wav[i:i + 1001]
+
+
+def test_audio_chunk_decoder():
+    wav = make_wav(sample_rate=16000, channels=2)
+    decoder = AudioChunkDecoder()
+    chunks = [decoder.feed(wav[i:i + 7]) for i in range(0, len(wav), 7)]
+    chunks = [c for c in chunks if c]
+    assert all(len(c.data) % 4 == 0 for c in chunks)
+    assert (chunks[0].sample_rate, chunks[0].channels, chunks[0].sample_width) == (16000, 2, 2)
+    assert b"".join(c.data for c in chunks) == AudioChunk.from_wav(wav).data
+
+    # Headerless PCM
+    decoder = AudioChunkDecoder(sample_rate=8000)
+    assert decoder.feed(b"\x01\x02\x03").data == b"\x01\x02"
+    assert decoder.feed(b"\x04").data == b"\x03\x04"
+
+
+def test_transcode():
+    chunk = AudioChunk.from_wav(make_wav(sample_rate=24000, channels=2))
+
+    # Resample and downmix
+    pcm = transcode(chunk, AudioFormat("pcm", 8000, 1))
+    assert len(pcm) == 800 * 2
+
+    wav = transcode(chunk, AudioFormat("wav", 16000))
+    converted = AudioChunk.from_wav(wav)
+    assert (converted.sample_rate, converted.channels, len(converted.data)) == (16000, 2, 1600 * 4)
+
+    # Pass through
+    assert transcode(chunk, AudioFormat("pcm")) == chunk.data
+
+    # 24bit (negative samples are sign extended)
+    samples = numpy.array([0, 256, -256, 8388607, -8388608], dtype="<i4")
+    data = b"".join(int(v).to_bytes(3, "little", signed=True) for v in samples)
+    pcm = transcode(AudioChunk(data, 8000, 1, 3), AudioFormat("pcm"))
+    assert numpy.frombuffer(pcm, dtype="<i2").tolist() == [0, 1, -1, 32767, -32768]
+
+    # mu-law
+    samples = AudioChunk(numpy.array([0, 32767, -32768], dtype="<i2").tobytes(), 8000)
+    assert transcode(samples, AudioFormat("mulaw")) == bytes([0xFF, 0x80, 0x00])
+
+
+def test_audio_transcoder_stream():
+    # Resampling chunk by chunk makes the same audio as resampling at once
+    chunk = AudioChunk.from_wav(make_wav(sample_rate=24000, frames=2400))
+    expected = transcode(chunk, AudioFormat("pcm", 16000))
+
+    transcoder = AudioTranscoder(AudioFormat("pcm", 16000))
+    pcm = b"".join(
+        transcoder.transcode(AudioChunk(chunk.data[i:i + 202], 24000)) for i in range(0, len(chunk.data), 202)
+    )
+    assert pcm == expected
+
+
+@pytest.mark.asyncio
+async def test_synthesize_audio():
+    synthesizer = WavSpeechSynthesizer()
+    expected = AudioChunk.from_wav(make_wav()).data
+
+    chunks = [c async for c in synthesizer.synthesize_audio("Hello")]
+    assert len(chunks) == 1
+    assert chunks[0].data == expected
+
+    chunks = [c async for c in synthesizer.synthesize_audio("Hello", stream=True)]
+    assert len(chunks) > 1
+    assert b"".join(c.data for c in chunks) == expected
+
+    await synthesizer.close()
@@ -0,0 +1,117 @@
+import asyncio
+from collections import Counter
+import httpx
+import pytest
+from litests.tts import SynthesisMetrics, synthesis_metrics
+from litests.tts.balancer import EndpointBalancer
+
+
+def create_client(latencies: dict, down: set = None, failing: set = None):
+    requested_hosts = []
+
+    async def handler(request: httpx.Request):
+        host = request.url.host
+        requested_hosts.append(host)
+        if host in (down or set()):
+            raise httpx.ConnectError("Connection refused")
+        if host in (failing or set()):
+            return httpx.Response(500, content=b"Internal Server Error")
+        await asyncio.sleep(latencies.get(host, 0.01))
+        return httpx.Response(200, content=host.encode())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requested_hosts
+
+
+@pytest.mark.asyncio
+async def test_balancer_least_outstanding():
+    balancer = EndpointBalancer(["http://a", "http://b", "http://c"], strategy="least_outstanding")
+    http_client, requested_hosts = create_client({})
+
+    await asyncio.gather(*[balancer.request(http_client, "POST", "/synthesis") for _ in range(6)])
+    assert Counter(requested_hosts) == {"a": 2, "b": 2, "c": 2}
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_balancer_latency_and_ejection():
+    balancer = EndpointBalancer(["http://fast", "http://slow"], eject_ratio=3.0)
+    http_client, requested_hosts = create_client({"fast": 0.01, "slow": 0.1})
+
+    metrics = SynthesisMetrics()
+    token = synthesis_metrics.set(metrics)
+    for _ in range(10):
+        await balancer.request(http_client, "GET", "/")
+    synthesis_metrics.reset(token)
+
+    # Slow endpoint is ejected after it is measured and fast one is used
+    assert requested_hosts.count("slow") == 1
+    assert balancer.endpoints[1].ejected_until > 0
+    assert metrics.endpoint_counts["http://fast"] == 9
+    assert metrics.get_endpoint_latencies()["http://slow"] >= 0.1
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_balancer_retry_and_health_check():
+    balancer = EndpointBalancer(["http://down", "http://up"], health_check_path="/version")
+    http_client, requested_hosts = create_client({}, down={"down"})
+
+    # Retried on the other endpoint
+    resp = await balancer.request(http_client, "GET", "/")
+    assert resp.content == b"up"
+    assert balancer.endpoints[0].error_count == 1
+
+    # Ejected by health check
+    balancer.endpoints[0].ejected_until = 0
+    await balancer.health_check(http_client)
+    assert balancer.endpoints[0].ejected_until > 0
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_balancer_unmeasured_and_cost():
+    balancer = EndpointBalancer(["http://a", "http://b"], eject_ratio=3.0)
+    a, b = balancer.endpoints
+
+    # Unmeasured endpoint with outstanding requests is not preferred to the measured idle one
+    a.latency = 0.01
+    b.outstanding = 3
+    assert balancer.select() is a
+    b.outstanding = 0
+    assert balancer.select() is b
+
+    # Long text doesn't eject the healthy endpoint
+    balancer.record_latency(b, 0.01)
+    balancer.record_latency(b, 1.0, cost=100)
+    assert b.ejected_until == 0
+    assert b.latency == pytest.approx(0.01)
+
+    # No endpoints measured: least outstanding
+    balancer = EndpointBalancer(["http://a", "http://b"])
+    balancer.endpoints[0].outstanding = 1
+    assert balancer.select() is balancer.endpoints[1]
+
+
+@pytest.mark.asyncio
+async def test_balancer_server_error():
+    balancer = EndpointBalancer(["http://failing", "http://up"])
+    http_client, requested_hosts = create_client({}, failing={"failing"})
+
+    # Server error is not recorded as latency but ejects the endpoint, and retried on the other one
+    resp = await balancer.request(http_client, "GET", "/")
+    assert resp.content == b"up"
+    assert requested_hosts == ["failing", "up"]
+    assert balancer.endpoints[0].latency == 0
+    assert balancer.endpoints[0].error_count == 1
+    assert balancer.endpoints[0].ejected_until > 0
+
+    # Raised when all endpoints fail
+    balancer = EndpointBalancer(["http://failing"])
+    with pytest.raises(httpx.HTTPStatusError):
+        await balancer.request(http_client, "GET", "/")
+
+    await http_client.aclose()
+
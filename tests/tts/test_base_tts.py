@@ -0,0 +1,25 @@
+from litests.tts import SpeechSynthesizerDummy
+
+
+def test_parse_style():
+    tts = SpeechSynthesizerDummy(style_mapper={"[face:Joy]": "joy", "[face:Angry]": "angry", "[face:Joy+]": "very_joy"})
+
+    assert tts.parse_style(None) is None
+    assert tts.parse_style({"styled_text": "Hello"}) is None
+    assert tts.parse_style({"styled_text": "[face:Angry]Hello"}) == "angry"
+    assert tts.parse_style({"styled_text": "[face:Joy+]Hello"}) == "very_joy"
+
+    # The first keyword in style_mapper wins
+    assert tts.parse_style({"styled_text": "[face:Angry]Hello[face:Joy]"}) == "joy"
+
+    # Style is carried over only when the segment has no keywords
+    assert tts.parse_style({"styled_text": "Hello", "carried_style": "angry"}) == "angry"
+    assert tts.parse_style({"styled_text": "[face:Joy]Hello", "carried_style": "angry"}) == "joy"
+
+    # Recompiled when style_mapper is updated
+    tts.style_mapper = {"(smile)": "joy"}
+    assert tts.parse_style({"styled_text": "(smile)Hello"}) == "joy"
+    assert tts.parse_style({"styled_text": "[face:Angry]Hello"}) is None
+
+    tts.style_mapper = None
+    assert tts.parse_style({"styled_text": "(smile)Hello"}) is None
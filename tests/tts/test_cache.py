@@ -0,0 +1,63 @@
+import pytest
+from litests.tts import SpeechSynthesizer, SynthesisMetrics, synthesis_metrics
+from litests.tts.cache import CachedSpeechSynthesizer
+
+
+class CountingSpeechSynthesizer(SpeechSynthesizer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.speaker = "speaker1"
+        self.audio_format = "wav"
+        self.synthesized_texts = []
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        self.synthesized_texts.append(text)
+        return f"{text}/{self.parse_style(style_info)}/{language}".encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_cached_synthesizer_memory():
+    synthesizer = CountingSpeechSynthesizer(style_mapper={"[face:joy]": "happy"})
+    tts = CachedSpeechSynthesizer(synthesizer, max_memory_bytes=40)
+
+    metrics = SynthesisMetrics()
+    token = synthesis_metrics.set(metrics)
+    assert await tts.synthesize("hello", {"styled_text": "hello"}) == b"hello/None/None"
+    assert await tts.synthesize("hello", {"styled_text": "hello"}) == b"hello/None/None"
+    synthesis_metrics.reset(token)
+    assert synthesizer.synthesized_texts == ["hello"]
+    assert (metrics.cache_hits, metrics.cache_misses) == (1, 1)
+
+    # Resolved style and language are parts of key
+    assert await tts.synthesize("hello", {"styled_text": "[face:joy]hello"}) == b"hello/happy/None"
+    assert await tts.synthesize("hello", language="ja-JP") == b"hello/None/ja-JP"
+    assert len(synthesizer.synthesized_texts) == 3
+
+    # Bounded by bytes (least recently used one is evicted)
+    assert tts.memory_bytes <= 40
+    assert len(tts.memory_cache) == 2
+    await tts.synthesize("hello", {"styled_text": "hello"})
+    assert len(synthesizer.synthesized_texts) == 4
+
+    # Empty text is not synthesized
+    assert await tts.synthesize(" ") == b""
+
+    await tts.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_synthesizer_disk(tmp_path):
+    synthesizer = CountingSpeechSynthesizer()
+    tts = CachedSpeechSynthesizer(synthesizer, cache_dir=str(tmp_path / "tts_cache"))
+    await tts.warmup(["Just a moment.", "Hello!"])
+    assert synthesizer.synthesized_texts == ["Just a moment.", "Hello!"]
+    assert len(list((tmp_path / "tts_cache").glob("*.bin"))) == 2
+    await tts.close()
+
+    # Survives restart
+    synthesizer = CountingSpeechSynthesizer()
+    tts = CachedSpeechSynthesizer(synthesizer, cache_dir=str(tmp_path / "tts_cache"))
+    assert await tts.synthesize("Just a moment.") == b"Just a moment./None/None"
+    assert synthesizer.synthesized_texts == []
+    assert tts.cache_hits == 1
+    await tts.close()
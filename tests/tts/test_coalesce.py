@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from litests.tts import SpeechSynthesizer, SynthesisMetrics, synthesis_metrics
+from litests.tts.coalesce import CoalescingSpeechSynthesizer
+
+
+class SlowSpeechSynthesizer(SpeechSynthesizer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.speaker = "speaker1"
+        self.synthesized_texts = []
+        self.cancelled = 0
+
+    async def synthesize(self, text: str, style_info: dict = None, language: str = None) -> bytes:
+        self.synthesized_texts.append(text)
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"{text}/{self.parse_style(style_info)}".encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_coalescing_synthesizer():
+    synthesizer = SlowSpeechSynthesizer(style_mapper={"[face:joy]": "happy"})
+    tts = CoalescingSpeechSynthesizer(synthesizer)
+
+    metrics_list = [SynthesisMetrics() for _ in range(4)]
+
+    async def synthesize(styled_text: str, metrics: SynthesisMetrics):
+        # Measure for each caller as TTS workers of the pipeline do
+        synthesis_metrics.set(metrics)
+        return await tts.synthesize("Hello", {"styled_text": styled_text})
+
+    audios = await asyncio.gather(
+        synthesize("Hello", metrics_list[0]),
+        synthesize("Hello", metrics_list[1]),
+        synthesize("Hello", metrics_list[2]),
+        synthesize("[face:joy]Hello", metrics_list[3]),
+    )
+    assert audios == [b"Hello/None", b"Hello/None", b"Hello/None", b"Hello/happy"]
+    assert synthesizer.synthesized_texts == ["Hello", "Hello"]
+    assert tts.coalesced_count == 2
+    assert [m.coalesced for m in metrics_list] == [0, 1, 1, 0]
+    assert tts.inflight == {}
+
+    # Not coalesced after completion
+    await tts.synthesize("Hello")
+    assert len(synthesizer.synthesized_texts) == 3
+
+    await tts.close()
+
+
+@pytest.mark.asyncio
+async def test_coalescing_synthesizer_cancel():
+    synthesizer = SlowSpeechSynthesizer()
+    tts = CoalescingSpeechSynthesizer(synthesizer)
+
+    # Cancelling one of callers doesn't affect the others
+    task1 = asyncio.create_task(tts.synthesize("Hello"))
+    task2 = asyncio.create_task(tts.synthesize("Hello"))
+    await asyncio.sleep(0.05)
+    task1.cancel()
+    assert await task2 == b"Hello/None"
+    assert synthesizer.cancelled == 0
+
+    # Synthesis is cancelled when all callers are cancelled
+    task3 = asyncio.create_task(tts.synthesize("World"))
+    await asyncio.sleep(0.05)
+    task3.cancel()
+    await asyncio.gather(task3, return_exceptions=True)
+    await asyncio.sleep(0.01)
+    assert synthesizer.cancelled == 1
+    assert tts.inflight == {}
+    assert tts.waiters == {}
+
+    await tts.close()
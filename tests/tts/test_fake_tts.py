@@ -0,0 +1,40 @@
+import asyncio
+from time import perf_counter
+import pytest
+from litests.tts.audio import AudioChunk
+from litests.tts.fake import FakeSpeechSynthesizer
+
+
+@pytest.mark.asyncio
+async def test_fake_speech_synthesizer():
+    tts = FakeSpeechSynthesizer(latency=0.1, seconds_per_char=0.1, sample_rate=16000)
+
+    start = perf_counter()
+    audio = await tts.synthesize("Hello")
+    assert 0.1 <= perf_counter() - start < 0.15
+    chunk = AudioChunk.from_wav(audio)
+    assert chunk.sample_rate == 16000
+    assert len(chunk.data) == 2 * 16000 * 0.5
+
+    # Streamed in chunks
+    chunks = [c async for c in tts.synthesize_stream("Hello")]
+    assert len(chunks) == 4
+    assert b"".join(chunks) == audio
+    audio_chunks = [c async for c in tts.synthesize_audio("Hello", stream=True)]
+    assert b"".join(c.data for c in audio_chunks) == chunk.data
+
+    assert await tts.synthesize(" ") == b""
+    assert tts.synthesize_count == 3
+
+    # Latency for each text and cancellation
+    tts.latencies = {"Bye": 0.0}
+    start = perf_counter()
+    await tts.synthesize("Bye")
+    assert perf_counter() - start < 0.05
+    task = asyncio.create_task(tts.synthesize("Hello"))
+    await asyncio.sleep(0.05)
+    assert tts.running == 1
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert (tts.running, tts.max_running, tts.cancelled) == (0, 1, 1)
+    await tts.close()
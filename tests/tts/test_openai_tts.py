@@ -109,3 +109,23 @@ async def test_openai_synthesizer_empty_text():
     assert len(tts_data) == 0, "Expected empty bytes for empty text."
 
     await synthesizer.close()
+
+
+@pytest.mark.asyncio
+async def test_openai_synthesizer_compressed_format():
+    """
+    Compressed audio (e.g. mp3) can't be decoded into PCM chunks to transcode.
+    """
+    synthesizer = OpenAISpeechSynthesizer(
+        openai_api_key=OPENAI_API_KEY,
+        speaker="shimmer",
+        audio_format="mp3"
+    )
+
+    with pytest.raises(ValueError):
+        synthesizer.create_audio_decoder()
+
+    synthesizer.audio_format = "pcm"
+    assert synthesizer.create_audio_decoder().sample_rate == 24000
+
+    await synthesizer.close()
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import pytest
+from litests.stt.google import GoogleSpeechRecognizer
+from litests.tts.piper import PiperSpeechSynthesizer
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+PIPER_MODEL_PATH = os.getenv("PIPER_MODEL_PATH")   # e.g. en_US-lessac-medium.onnx
+
+
+@pytest.mark.skipif(not PIPER_MODEL_PATH or not GOOGLE_API_KEY, reason="PIPER_MODEL_PATH and GOOGLE_API_KEY are required")
+@pytest.mark.asyncio
+async def test_piper_synthesizer_with_google_stt():
+    """
+    Test the PiperSpeechSynthesizer by synthesizing speech on local CPU
+    and verifying the synthesized audio with Google STT.
+    This test requires:
+      - Piper voice model at PIPER_MODEL_PATH (English)
+      - Valid GOOGLE_API_KEY environment variable
+    """
+
+    # 1) Create synthesizer instance
+    synthesizer = PiperSpeechSynthesizer(
+        voice_models={"lessac": PIPER_MODEL_PATH},
+        max_workers=2,
+        debug=True
+    )
+
+    # 2) Load voices in workers and call TTS for multiple segments at once (batched across workers)
+    await synthesizer.warmup()
+    tts_data_list = await asyncio.gather(
+        synthesizer.synthesize("This is a test for speech synthesizer."),
+        synthesizer.synthesize("Hello."),
+    )
+    assert all(len(d) > 0 for d in tts_data_list), "Synthesized audio data is empty."
+    assert synthesizer.batch_tasks == set(), "Flush tasks should be discarded when done."
+
+    # 3) Recognize synthesized speech via GoogleSpeechRecognizer
+    recognizer = GoogleSpeechRecognizer(
+        google_api_key=GOOGLE_API_KEY,
+        sample_rate=22050,  # Sampling rate of medium quality voice
+        language="en-US"
+    )
+
+    recognized_text = await recognizer.transcribe(tts_data_list[0])
+
+    # 4) Verify recognized text
+    assert "test" in recognized_text, (
+        f"Expected 'test' in recognized result, but got: {recognized_text}"
+    )
+
+    # 5) Cleanup
+    await recognizer.close()
+    await synthesizer.close()
+
+
+@pytest.mark.skipif(not PIPER_MODEL_PATH, reason="PIPER_MODEL_PATH is required")
+@pytest.mark.asyncio
+async def test_piper_synthesizer_empty_text():
+    """
+    If empty text is provided, Piper should return empty bytes
+    (no synthesis performed).
+    """
+    synthesizer = PiperSpeechSynthesizer(
+        voice_models={"lessac": PIPER_MODEL_PATH},
+        debug=True
+    )
+
+    tts_data = await synthesizer.synthesize("    ")  # Empty or just whitespace
+    assert len(tts_data) == 0, "Expected empty bytes for empty text."
+
+    await synthesizer.close()
@@ -1,4 +1,6 @@
+import asyncio
 import os
+import httpx
 import pytest
 from litests.stt.google import GoogleSpeechRecognizer
 from litests.tts.speech_gateway import SpeechGatewaySpeechSynthesizer
@@ -116,3 +118,39 @@ async def test_speech_gateway_synthesizer_empty_text():
     assert len(tts_data) == 0, "Expected empty bytes for empty text."
 
     await synthesizer.close()
+
+
+@pytest.mark.asyncio
+async def test_speech_gateway_synthesizer_stream_latency():
+    """
+    Latency of the endpoint is measured until the first chunk, not including
+    the time that the consumer takes, without network access.
+    """
+    async def stream_audio():
+        for chunk in [b"chunk1", b"chunk2", b"chunk3"]:
+            yield chunk
+
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=stream_audio())
+
+    synthesizer = SpeechGatewaySpeechSynthesizer(
+        service_name="sbv2",
+        speaker="0-0",
+        tts_urls=["http://gateway1/tts", "http://gateway2/tts"]
+    )
+    synthesizer.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    assert synthesizer.tts_url == "http://gateway1/tts"
+
+    text = "Hello."
+    chunks = []
+    async for chunk in synthesizer.synthesize_stream(text):
+        chunks.append(chunk)
+        await asyncio.sleep(0.1)
+    assert chunks == [b"chunk1", b"chunk2", b"chunk3"]
+
+    latency = synthesizer.balancer.endpoints[0].latency * len(text)
+    assert 0.05 <= latency < 0.1
+
+    await synthesizer.close()
+
@@ -0,0 +1,67 @@
+import asyncio
+from time import perf_counter
+import pytest
+from litests.tts.speech_gateway import SpeechGatewaySpeechSynthesizer
+
+
+async def start_fake_tts_server(chunks: list, interval: float):
+    # Minimal HTTP/1.1 server that returns audio in chunked transfer encoding
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        headers = await reader.readuntil(b"\r\n\r\n")
+        content_length = 0
+        for line in headers.decode().split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                content_length = int(line.split(":")[1])
+        await reader.readexactly(content_length)
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: audio/wav\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for i, chunk in enumerate(chunks):
+            if i > 0:
+                await asyncio.sleep(interval)
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_synthesize_stream_first_byte_latency():
+    chunks = [b"RIFF" + b"\x00" * 1000, b"\x01" * 1000, b"\x02" * 1000]
+    server, port = await start_fake_tts_server(chunks, interval=0.3)
+    tts = SpeechGatewaySpeechSynthesizer(
+        service_name="dummy",
+        speaker="0",
+        tts_url=f"http://127.0.0.1:{port}/tts"
+    )
+
+    try:
+        # Whole audio
+        start = perf_counter()
+        audio = await tts.synthesize("Hello")
+        total_latency = perf_counter() - start
+        assert audio == b"".join(chunks)
+
+        # Streamed audio
+        start = perf_counter()
+        first_byte_latency = None
+        streamed_chunks = []
+        async for chunk in tts.synthesize_stream("Hello"):
+            if first_byte_latency is None:
+                first_byte_latency = perf_counter() - start
+            streamed_chunks.append(chunk)
+
+        assert b"".join(streamed_chunks) == b"".join(chunks)
+        assert total_latency >= 0.6
+        assert first_byte_latency < 0.3
+
+        # Empty text
+        assert [c async for c in tts.synthesize_stream(" ")] == []
+
+    finally:
+        await tts.close()
+        server.close()
+        await server.wait_closed()
@@ -1,4 +1,10 @@
+import asyncio
+import gc
+import io
+import json
 import os
+import zipfile
+import httpx
 import pytest
 from litests.stt.google import GoogleSpeechRecognizer
 from litests.tts.voicevox import VoicevoxSpeechSynthesizer
@@ -65,3 +71,92 @@ async def test_voicevox_synthesizer_empty_text():
     assert len(tts_data) == 0, "Expected empty bytes for empty text."
 
     await synthesizer.close()
+
+
+def create_fake_voicevox(**kwargs):
+    # Fake VOICEVOX engine with mock transport
+    requests = []
+
+    async def handler(request: httpx.Request):
+        requests.append(request)
+        if request.url.path == "/audio_query":
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, json={"text": request.url.params["text"], "speaker": request.url.params["speaker"]})
+        elif request.url.path == "/synthesis":
+            query = json.loads(request.content)
+            return httpx.Response(200, content=f"{query['text']}/{request.url.params['speaker']}".encode())
+        elif request.url.path == "/initialize_speaker":
+            return httpx.Response(204)
+        elif request.url.path == "/multi_synthesis":
+            zip_buffer = io.BytesIO()
+            with zipfile.ZipFile(zip_buffer, "w") as zf:
+                for i, query in enumerate(json.loads(request.content)):
+                    zf.writestr(f"{i + 1:03}.wav", f"{query['text']}/{request.url.params['speaker']}")
+            return httpx.Response(200, content=zip_buffer.getvalue())
+
+    synthesizer = VoicevoxSpeechSynthesizer(speaker=46, style_mapper={"[face:joy]": "47"}, **kwargs)
+    synthesizer.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return synthesizer, requests
+
+
+@pytest.mark.asyncio
+async def test_voicevox_synthesizer_audio_query_cache():
+    synthesizer, requests = create_fake_voicevox(audio_query_cache_size=2)
+    assert synthesizer.base_url == "http://127.0.0.1:50021"
+
+    assert await synthesizer.synthesize("Hello") == b"Hello/46"
+    assert await synthesizer.synthesize("Hello") == b"Hello/46"
+    assert await synthesizer.synthesize("Hello", {"styled_text": "[face:joy]Hello"}) == b"Hello/47"
+    assert [r.url.path for r in requests].count("/audio_query") == 2
+
+    # Prefetch query while the current one is synthesizing
+    await synthesizer.prefetch("World")
+    await asyncio.sleep(0.15)
+    assert await synthesizer.synthesize("World") == b"World/46"
+    assert [r.url.path for r in requests].count("/audio_query") == 3
+
+    # Least recently used one is evicted
+    assert await synthesizer.synthesize("Hello") == b"Hello/46"
+    assert [r.url.path for r in requests].count("/audio_query") == 4
+
+    # Cached query is copied not to be modified by callers
+    query = await synthesizer.get_audio_query("Hello", 46)
+    query["speedScale"] = 2.0
+    assert "speedScale" not in await synthesizer.get_audio_query("Hello", 46)
+
+    await synthesizer.close()
+
+
+@pytest.mark.asyncio
+async def test_voicevox_synthesizer_multi_synthesis():
+    synthesizer, requests = create_fake_voicevox(batch_size=3, batch_wait=0.05)
+
+    synthesize_task = asyncio.gather(
+        synthesizer.synthesize("One"),
+        synthesizer.synthesize("Two"),
+        synthesizer.synthesize("Three", {"styled_text": "[face:joy]Three"}),
+        synthesizer.synthesize("Four"),
+    )
+    # Flush tasks are kept while waiting for the batch
+    await asyncio.sleep(0.12)
+    assert len(synthesizer.batch_tasks) > 0
+    gc.collect()
+    audios = await synthesize_task
+    assert audios == [b"One/46", b"Two/46", b"Three/47", b"Four/46"]
+    assert synthesizer.batch_tasks == set()
+
+    paths = [r.url.path for r in requests]
+    assert paths.count("/multi_synthesis") == 1   # One, Two and Four
+    assert paths.count("/synthesis") == 1         # Three (different speaker)
+
+    await synthesizer.close()
+
+
+@pytest.mark.asyncio
+async def test_voicevox_synthesizer_warmup():
+    synthesizer, requests = create_fake_voicevox()
+
+    await synthesizer.warmup()
+    assert sorted(int(r.url.params["speaker"]) for r in requests if r.url.path == "/initialize_speaker") == [46, 47]
+
+    await synthesizer.close()
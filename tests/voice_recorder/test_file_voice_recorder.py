@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from litests.voice_recorder import RequestVoice, ResponseVoice, ResponseVoices
+from litests.voice_recorder.file import FileVoiceRecorder
+
+
+@pytest.mark.asyncio
+async def test_record(tmp_path):
+    voice_recorder = FileVoiceRecorder(record_dir=str(tmp_path), sample_rate=16000)
+    assert await voice_recorder.record(RequestVoice("transaction1", b"\x00\x01" * 100)) is True
+    assert voice_recorder.record_nowait(ResponseVoice("transaction1", 0, b"response0", "wav")) is True
+    assert voice_recorder.record_nowait(ResponseVoices("transaction2", [b"response0", b"response1"], "wav")) is True
+    await asyncio.sleep(0.1)
+    await voice_recorder.stop()
+
+    # Header is written with data
+    request_voice = (tmp_path / "transaction1_request.wav").read_bytes()
+    assert request_voice[:44] == voice_recorder.create_wav_header(200, 16000, 1, 2)
+    assert request_voice[44:] == b"\x00\x01" * 100
+    assert (tmp_path / "transaction1_response_0.wav").read_bytes() == b"response0"
+    assert (tmp_path / "transaction2_response_0.wav").read_bytes() == b"response0"
+    assert (tmp_path / "transaction2_response_1.wav").read_bytes() == b"response1"
+
+
+@pytest.mark.asyncio
+async def test_record_overflow(tmp_path):
+    # Drop newest
+    voice_recorder = FileVoiceRecorder(record_dir=str(tmp_path / "newest"), max_queue_size=2)
+    results = [voice_recorder.record_nowait(ResponseVoice(f"transaction{i}", 0, b"response", "wav")) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert voice_recorder.dropped_count == 2
+    await asyncio.sleep(0.1)
+    await voice_recorder.stop()
+    assert sorted(p.name for p in (tmp_path / "newest").iterdir()) == ["transaction0_response_0.wav", "transaction1_response_0.wav"]
+
+    # Drop oldest
+    voice_recorder = FileVoiceRecorder(record_dir=str(tmp_path / "oldest"), max_queue_size=2, overflow_policy="drop_oldest")
+    results = [voice_recorder.record_nowait(ResponseVoice(f"transaction{i}", 0, b"response", "wav")) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert voice_recorder.dropped_count == 2
+    await asyncio.sleep(0.1)
+    await voice_recorder.stop()
+    assert sorted(p.name for p in (tmp_path / "oldest").iterdir()) == ["transaction2_response_0.wav", "transaction3_response_0.wav"]
+
+
+@pytest.mark.asyncio
+async def test_record_stop(tmp_path):
+    class SlowFileVoiceRecorder(FileVoiceRecorder):
+        async def save_voice(self, id, voice_bytes, audio_format):
+            await asyncio.sleep(0.05)
+            await super().save_voice(id, voice_bytes, audio_format)
+
+    # Queued voices are saved before stopping
+    voice_recorder = SlowFileVoiceRecorder(record_dir=str(tmp_path / "drained"))
+    for i in range(3):
+        voice_recorder.record_nowait(ResponseVoice("transaction1", i, b"response", "pcm"))
+    await voice_recorder.stop()
+    assert sorted(p.name for p in (tmp_path / "drained").iterdir()) == [f"transaction1_response_{i}.pcm" for i in range(3)]
+
+    # Cancelled after timeout
+    voice_recorder = SlowFileVoiceRecorder(record_dir=str(tmp_path / "timeout"))
+    for i in range(3):
+        voice_recorder.record_nowait(ResponseVoice("transaction1", i, b"response", "wav"))
+    await voice_recorder.stop(timeout=0.08)
+    assert len(list((tmp_path / "timeout").iterdir())) == 1
+